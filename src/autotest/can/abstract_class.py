@@ -9,11 +9,13 @@
 from abc import ABCMeta, abstractmethod
 from concurrent.futures import ThreadPoolExecutor, ALL_COMPLETED, wait
 from enum import Enum, unique
-from time import sleep
-from typing import Tuple, Any, List, Optional
+from time import sleep, monotonic
+from typing import Tuple, Any, List, Optional, Callable, Iterable
 
-from .message import Message
-from ..logger import logger
+from .message import Message, Frame
+from .stack import FrameStack, StackPolicyEnum, DEFAULT_CAPACITY
+from .capture import FrameCapture, DEFAULT_CAPTURE_CAPACITY
+from ..logger import logger, log_switch
 from ..checker import check_connect, can_tips
 
 dlc = {
@@ -34,6 +36,18 @@ dlc = {
     48: 14,
     64: 15
 }
+# dlc对应的数据长度
+dlc_lengths = dict((value, key) for key, value in dlc.items())
+
+# 设备接收缓冲区的帧数，打开设备的时候分配，之后每次接收都复用
+RECEIVE_BUFFER_SIZE = 2500
+# 接收线程每次读取设备时最长的等待时间(秒)，也是关闭CAN的时候接收线程退出前最长的等待时间
+RECEIVE_TIMEOUT = 0.1
+# 设备没有阻塞等待的时候，没有数据的情况下轮询间隔的最小值和最大值(秒)，收到数据后恢复为最小值
+MIN_RECEIVE_INTERVAL = 0.0005
+MAX_RECEIVE_INTERVAL = 0.004
+# 检查设备接收缓冲区是否溢出的间隔(秒)
+OVERRUN_CHECK_INTERVAL = 1
 
 
 @unique
@@ -89,11 +103,20 @@ class BaseCanDevice(metaclass=ABCMeta):
     def __init__(self):
         self._dlc = dlc
         self._is_open = False
+        # 设备接收缓冲区溢出(读取太慢导致丢帧)的次数
+        self._overruns = 0
 
     @property
     def is_open(self) -> bool:
         return self._is_open
 
+    @property
+    def overruns(self) -> int:
+        """
+        设备接收缓冲区溢出的次数，不支持检测的设备一直为0
+        """
+        return self._overruns
+
     @abstractmethod
     def open_device(self, baud_rate: BaudRateEnum = BaudRateEnum.HIGH, data_rate: BaudRateEnum = BaudRateEnum.DATA,
                     channel: int = 1):
@@ -130,6 +153,21 @@ class BaseCanDevice(metaclass=ABCMeta):
         """
         pass
 
+    def read(self, timeout: float) -> Tuple[int, Any]:
+        """
+        接收线程读取CAN消息，设备支持的时候阻塞等待到有数据或者超时，没有数据的时候返回0而不是抛出异常
+
+        默认调用receive，不支持阻塞读取的设备会立即返回，由接收线程自动增加轮询间隔
+
+        :param timeout: 最长等待时间，单位秒
+
+        :return: (帧数, 帧的数组)，没有数据的时候帧数为0
+        """
+        try:
+            return self.receive()
+        except RuntimeError:
+            return 0, None
+
 
 class BaseCanBus(metaclass=ABCMeta):
     def __init__(self, baud_rate: BaudRateEnum = BaudRateEnum.HIGH, data_rate: BaudRateEnum = BaudRateEnum.DATA,
@@ -150,8 +188,12 @@ class BaseCanBus(metaclass=ABCMeta):
         self._send_messages = dict()
         # 保存发送的事件信号的字典，用于发送
         self._event_send_messages = dict()
-        # 用于存放接收到的数据
-        self._stack = []
+        # 用于存放接收到的数据，固定容量的环形缓冲区
+        self._stack = FrameStack()
+        # 录制接收到的帧的numpy结构化数组，为None的时候不录制
+        self._capture = None
+        # 录制的时候是否同时保存到栈中
+        self._capture_stack = False
         # 周期性信号
         self._cycle = "Cycle"
         # 事件性信号
@@ -183,11 +225,98 @@ class BaseCanBus(metaclass=ABCMeta):
     def thread_pool(self) -> ThreadPoolExecutor:
         return self._thread_pool
 
-    def _get_dlc_length(self, dlc_length: int) -> int:
-        for key, value in self._dlc.items():
-            if dlc_length == value:
-                return key
-        raise RuntimeError(f"dlc {dlc} not support, only support {self._dlc.keys()}")
+    @property
+    def overruns(self) -> int:
+        """
+        设备接收缓冲区溢出的次数
+        """
+        return self._can.overruns
+
+    def _receive_loop(self, handle: Callable[[int, Any], None]):
+        """
+        接收线程的主循环，设备阻塞等待数据，读取到数据后交给handle处理
+
+        设备不支持阻塞读取(没有等待就返回)的时候，没有数据的情况下逐渐增加轮询间隔，收到数据后恢复
+
+        :param handle: 处理读取到的数据，参数为设备read返回的(帧数, 帧的数组)
+        """
+        interval = MIN_RECEIVE_INTERVAL
+        overruns = self._can.overruns
+        while self._can.is_open and self._need_receive:
+            start = monotonic()
+            try:
+                count, frames = self._can.read(RECEIVE_TIMEOUT)
+            except RuntimeError as e:
+                logger.debug(f"receive failed, error is {e}")
+                count, frames = 0, None
+            if count:
+                interval = MIN_RECEIVE_INTERVAL
+                # 处理失败只丢弃这一次读取到的数据，接收线程继续运行
+                try:
+                    handle(count, frames)
+                except Exception as e:
+                    logger.error(f"handle received frames failed, error is {e}")
+            elif monotonic() - start < RECEIVE_TIMEOUT / 2:
+                sleep(interval)
+                interval = min(interval * 2, MAX_RECEIVE_INTERVAL)
+            if self._can.overruns != overruns:
+                logger.warning(f"receive buffer of device overrun {self._can.overruns - overruns} times, "
+                               f"some frames are lost")
+                overruns = self._can.overruns
+
+    @staticmethod
+    def _get_dlc_length(dlc_length: int) -> int:
+        if dlc_length in dlc_lengths:
+            return dlc_lengths[dlc_length]
+        raise RuntimeError(f"dlc {dlc_length} not support, only support {list(dlc_lengths)}")
+
+    @staticmethod
+    def _to_frames(items: Iterable[Any], convert: Callable[[Any], Frame]) -> List[Frame]:
+        """
+        把设备读取到的帧逐个转换成Frame，转换失败(如不支持的dlc)的帧记录日志后跳过，不影响同一批中的其他帧
+
+        :param items: 设备读取到的帧
+
+        :param convert: 转换函数
+
+        :return: Frame对象的列表
+        """
+        frames = []
+        for item in items:
+            try:
+                frames.append(convert(item))
+            except RuntimeError as e:
+                logger.error(f"convert received frame failed, error is {e}")
+        return frames
+
+    def _save_frames(self, frames: List[Frame]):
+        """
+        保存接收线程一次读取到的一批帧
+
+        :param frames: 按照接收顺序排列的帧
+        """
+        receive_messages = self._receive_messages
+        for frame in frames:
+            receive_messages[frame.msg_id] = frame
+        if log_switch.trace:
+            for frame in frames:
+                logger.trace(f"message_id = {hex(frame.msg_id)}")
+        capture = self._capture
+        if capture is not None:
+            capture.extend(frames)
+            if not self._capture_stack:
+                # 不保存到栈中，但是等待帧的功能(wait_for_frame、wait_for_silence)仍然可用
+                self._stack.notify(frames)
+                return
+        self._stack.extend(frames)
+
+    def _check_stack(self):
+        """
+        录制的时候没有保存到栈中，栈中的帧不是最新的，不能用于查询
+        """
+        if self._capture is not None and not self._capture_stack:
+            raise RuntimeError("frames are saved to capture instead of stack, "
+                               "please stop capture or start capture with save_stack=True first")
 
     def __transmit(self, can: BaseCanDevice, message: Message, cycle_time: float):
         """
@@ -200,11 +329,13 @@ class BaseCanBus(metaclass=ABCMeta):
         logger.trace(f"cycle_time = {cycle_time}")
         msg_id = message.msg_id
         while can.is_open and not message.stop_flag and self._need_transmit:
-            logger.debug(f"send msg {hex(msg_id)} and cycle time is {message.cycle_time}")
+            if log_switch.debug:
+                logger.debug(f"send msg {hex(msg_id)} and cycle time is {message.cycle_time}")
             try:
                 can.transmit(message)
             except RuntimeError as e:
-                logger.trace(f"some issue found, error is {e}")
+                if log_switch.trace:
+                    logger.trace(f"some issue found, error is {e}")
             # 循环发送的等待周期
             sleep(cycle_time)
 
@@ -221,7 +352,8 @@ class BaseCanBus(metaclass=ABCMeta):
         condition1 = msg_id not in self._send_messages
         # msg_id在发送队列中，且stop_flag为真，即停止发送了得
         condition2 = msg_id in self._send_messages and self._send_messages[msg_id].stop_flag
-        logger.debug(f"condition1[{condition1}] and condition2 = [{condition2}]")
+        if log_switch.debug:
+            logger.debug(f"condition1[{condition1}] and condition2 = [{condition2}]")
         if condition1 or condition2:
             # 周期信号
             self._send_messages[msg_id] = message
@@ -257,8 +389,9 @@ class BaseCanBus(metaclass=ABCMeta):
                 self._event_send_messages[msg_id]) > 0:
             message = self._event_send_messages[msg_id].pop(0)
             can.transmit(message)
-            logger.debug(f"****** Transmit [Event] {msg_id} : {list(map(lambda x: hex(x), message.data))}"
-                         f"Event Cycle time [{message.cycle_time_fast}]")
+            if log_switch.debug:
+                logger.debug(f"****** Transmit [Event] {msg_id} : {bytes(message.data).hex(' ')}"
+                             f"Event Cycle time [{message.cycle_time_fast}]")
             sleep(cycle_time)
 
     def __event(self, can: BaseCanDevice, message: Message):
@@ -336,20 +469,43 @@ class BaseCanBus(metaclass=ABCMeta):
         :param message: message对象
         """
         cycle_time = message.cycle_time
-        logger.debug(f"message send type is {message.msg_send_type}")
+        if log_switch.debug:
+            logger.debug(f"message send type is {message.msg_send_type}")
         if message.msg_send_type == self._cycle or cycle_time > 0:
-            logger.debug("cycle send message")
+            if log_switch.debug:
+                logger.debug("cycle send message")
             # 周期信号
             self.__cycle_msg(self._can, message)
         elif message.msg_send_type == self._event:
-            logger.debug("event send message")
+            if log_switch.debug:
+                logger.debug("event send message")
             # 事件信号
             self.__event(self._can, message)
         elif message.msg_send_type == self._cycle_event:
-            logger.debug("cycle&event send message")
+            if log_switch.debug:
+                logger.debug("cycle&event send message")
             # 周期事件信号
             self.__cycle_msg(self._can, message)
 
+    @check_connect("_can", can_tips, is_bus=True)
+    def transmit_messages(self, messages: List[Message]):
+        """
+        批量发送CAN帧函数，用于一次修改多个message的场景
+
+        与逐个调用transmit不同，已经在周期发送的周期事件信号不会暂停再恢复周期发送的线程，替换data后直接触发事件发送
+
+        :param messages: message对象的集合
+        """
+        for message in messages:
+            msg_id = message.msg_id
+            is_sending = msg_id in self._send_messages and not self._send_messages[msg_id].stop_flag
+            if is_sending and message.msg_send_type == self._cycle_event:
+                # 周期发送的线程读取的是同一个data对象，替换后下一个周期就会发送新的值
+                self._send_messages[msg_id].data = message.data
+                self.__event(self._can, message)
+            else:
+                self.transmit(message)
+
     @check_connect("_can", can_tips, is_bus=True)
     def transmit_one(self, message: Message):
         """
@@ -413,13 +569,13 @@ class BaseCanBus(metaclass=ABCMeta):
                     self.transmit(item)
 
     @check_connect("_can", can_tips, is_bus=True)
-    def receive(self, message_id: int) -> Message:
+    def receive(self, message_id: int) -> Frame:
         """
         接收函数。此函数从指定的设备CAN通道的接收缓冲区中读取数据。
 
         :param message_id: 接收所需Message的ID
 
-        :return: Message对象
+        :return: 最近收到的Frame对象
         """
         if message_id in self._receive_messages:
             return self._receive_messages[message_id]
@@ -427,11 +583,98 @@ class BaseCanBus(metaclass=ABCMeta):
             raise RuntimeError(f"message_id {message_id} not receive")
 
     @check_connect("_can", can_tips, is_bus=True)
-    def get_stack(self) -> List[Message]:
+    def get_stack(self) -> List[Frame]:
+        """
+        获取CAN的stack的快照，不会受到之后接收或者清除的影响
+        """
+        self._check_stack()
+        return self._stack.snapshot()
+
+    @check_connect("_can", can_tips, is_bus=True)
+    def get_frames(self, message_id: int) -> List[Frame]:
         """
-        获取CAN的stack
+        获取栈中某个message的所有帧，只复制这个message的帧，不需要遍历整个栈
+
+        :param message_id: message的ID
+
+        :return: 按照接收的顺序排列的帧
         """
-        return self._stack
+        self._check_stack()
+        return self._stack.get_frames(message_id)
+
+    @check_connect("_can", can_tips, is_bus=True)
+    def frames_between(self, message_id: int, start_time: int, end_time: int) -> List[Frame]:
+        """
+        通过二分查找获取栈中某个message在[start_time, end_time]之间收到的帧
+
+        :param message_id: message的ID
+
+        :param start_time: 开始时间(包含)，单位微秒
+
+        :param end_time: 结束时间(包含)，单位微秒
+
+        :return: 按照接收的顺序排列的帧
+        """
+        self._check_stack()
+        return self._stack.frames_between(message_id, start_time, end_time)
+
+    @check_connect("_can", can_tips, is_bus=True)
+    def last_before(self, message_id: int, time_stamp: int) -> Optional[Frame]:
+        """
+        通过二分查找获取栈中某个message在time_stamp(包含)之前收到的最后一帧
+
+        :param message_id: message的ID
+
+        :param time_stamp: 时间戳，单位微秒
+
+        :return: Frame对象，没有的时候返回None
+        """
+        self._check_stack()
+        return self._stack.last_before(message_id, time_stamp)
+
+    @check_connect("_can", can_tips, is_bus=True)
+    def time_range(self) -> Optional[Tuple[int, int]]:
+        """
+        栈中保存的帧的时间范围
+
+        :return: (最早的帧的时间戳, 最后的帧的时间戳)，单位微秒，栈为空的时候返回None
+        """
+        self._check_stack()
+        return self._stack.time_range()
+
+    @check_connect("_can", can_tips, is_bus=True)
+    def wait_for_frame(self,
+                       message_id: Optional[int] = None,
+                       predicate: Optional[Callable[[Frame], bool]] = None,
+                       timeout: Optional[float] = None,
+                       latest: bool = False) -> Optional[Frame]:
+        """
+        等待收到满足条件的帧，接收线程收到帧的时候立即返回
+
+        :param message_id: message的ID，为None的时候等待任意帧
+
+        :param predicate: 帧需要满足的条件，为None的时候收到帧就返回
+
+        :param timeout: 超时时间，单位秒，为None的时候一直等待
+
+        :param latest: 是否先检查最后收到的帧
+
+        :return: Frame对象，超时返回None
+        """
+        return self._stack.wait_for_frame(message_id, predicate, timeout, latest)
+
+    @check_connect("_can", can_tips, is_bus=True)
+    def wait_for_silence(self, duration: float, timeout: Optional[float] = None) -> bool:
+        """
+        等待连续duration时间内没有收到任何帧
+
+        :param duration: 静默时间，单位秒
+
+        :param timeout: 超时时间，单位秒，为None的时候一直等待
+
+        :return: 是否等到了静默
+        """
+        return self._stack.wait_for_silence(duration, timeout)
 
     @check_connect("_can", can_tips, is_bus=True)
     def clear_stack_data(self):
@@ -440,6 +683,61 @@ class BaseCanBus(metaclass=ABCMeta):
         """
         self._stack.clear()
 
+    @property
+    def dropped_frames(self) -> int:
+        """
+        栈满了之后被覆盖或者丢弃的帧数
+        """
+        return self._stack.dropped
+
+    def set_stack(self, capacity: int = DEFAULT_CAPACITY, policy: StackPolicyEnum = StackPolicyEnum.OVERWRITE):
+        """
+        设置栈的容量以及栈满了之后的处理策略，已经收到的帧会被清除
+
+        :param capacity: 容量(帧数)
+
+        :param policy: 栈满了之后的处理策略，默认覆盖最早收到的帧
+        """
+        self._stack = FrameStack(capacity, policy)
+
+    @property
+    def capture(self) -> Optional[FrameCapture]:
+        """
+        正在录制的帧，没有录制的时候返回None
+        """
+        return self._capture
+
+    def start_capture(self, capacity: int = DEFAULT_CAPTURE_CAPACITY, save_stack: bool = False) -> FrameCapture:
+        """
+        开始把接收到的帧录制到numpy结构化数组中，用于长时间高帧率的录制，需要安装numpy
+
+        录制的时候默认不再保存到栈中，栈中已有的帧会被清除，查询栈中帧的功能(如get_stack、frames_between、is_lost_message)
+
+        会抛出异常，receive以及等待帧的功能(如wait_for_frame、is_can_bus_lost)不受影响
+
+        :param capacity: 初始容量(帧数)，写满之后自动扩容
+
+        :param save_stack: 是否同时保存到栈中
+
+        :return: FrameCapture对象
+        """
+        if not save_stack:
+            # 避免wait_for_frame(latest=True)取到录制之前的帧
+            self._stack.clear()
+        self._capture_stack = save_stack
+        self._capture = FrameCapture(capacity, self._channel_index, self._can_fd)
+        return self._capture
+
+    def stop_capture(self) -> Optional[FrameCapture]:
+        """
+        停止录制，之后接收到的帧恢复保存到栈中
+
+        :return: 录制的帧，没有录制的时候返回None
+        """
+        capture = self._capture
+        self._capture = None
+        return capture
+
 
 class Singleton(type):
     """
@@ -0,0 +1,17 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        __init__.py
+# @Author:      philosophy
+# @Created:     2024/03/16 - 10:02
+# --------------------------------------------------------
+"""
+CAN模块的性能测试，不需要连接CAN盒，使用生成的矩阵表和模拟的设备
+
+使用方法：
+
+    python -m autotest.can.benchmark.tracing
+
+    python -m autotest.can.benchmark.parser --output result.json
+"""
@@ -0,0 +1,187 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        matrix
+# @Author:      philosophy
+# @Created:     2024/03/16 - 10:05
+# --------------------------------------------------------
+import random
+from typing import List
+
+from ..message import Messages, SignalType
+
+"""
+生成性能测试使用的矩阵表以及DBC文件
+"""
+
+# DBC文件的类型
+# plain: 只有BO_/SG_以及message的周期等必要的属性
+PLAIN = "plain"
+# attributes: 每个signal都有CM_注释、BA_属性以及VAL_值表
+ATTRIBUTES = "attributes"
+# multiline: signal的注释为多行
+MULTILINE = "multiline"
+# gbk: 中文注释以及值表，使用gbk编码
+GBK = "gbk"
+PROFILES = PLAIN, ATTRIBUTES, MULTILINE, GBK
+
+
+def get_signals(index: int, rand: random.Random, data_length: int = 8) -> List[SignalType]:
+    """
+    生成一个message的signals，signal依次排列填满data，偶数message为Intel，奇数message为Motorola
+
+    :param index: message的序号
+
+    :param rand: 随机数生成器
+
+    :param data_length: data的长度
+
+    :return: signal列表
+    """
+    signals = []
+    position = 0
+    is_intel = index % 2 == 0
+    while True:
+        bit_length = rand.randint(1, 16)
+        if position + bit_length > data_length * 8:
+            break
+        if is_intel:
+            start_bit = position
+        else:
+            # Motorola MSB的start_bit为最高位
+            start_bit = position // 8 * 8 + 7 - position % 8
+        signals.append({
+            "name": f"Signal_{index}_{len(signals)}",
+            "signal_size": bit_length,
+            "start_bit": start_bit,
+            "is_sign": False,
+            "byte_type": is_intel,
+            "factor": rand.choice([1, 1, 0.5, 0.1]),
+            "offset": rand.choice([0, 0, -40]),
+            "minimum": 0,
+            "maximum": 2 ** bit_length - 1,
+            "unit": "",
+            "receiver": "HU",
+            "start_value": rand.randrange(2 ** bit_length),
+        })
+        position += bit_length
+    return signals
+
+
+def get_messages(count: int, data_length: int = 8, seed: int = 0) -> Messages:
+    """
+    生成矩阵表，格式与DbcParser解析出来的一致
+
+    :param count: message的数量
+
+    :param data_length: 每个message的data长度
+
+    :param seed: 随机数种子，相同的种子生成相同的矩阵表
+
+    :return: message列表
+    """
+    rand = random.Random(seed)
+    messages = []
+    for index in range(count):
+        messages.append({
+            "id": 0x100 + index,
+            "name": f"Message_{index}",
+            "length": data_length,
+            "sender": "GW",
+            "msg_send_type": "Cycle",
+            "msg_cycle_time": 100,
+            "diag_request": False,
+            "diag_response": False,
+            "diag_state": False,
+            "signals": get_signals(index, rand, data_length),
+        })
+    return messages
+
+
+def _get_message_id(msg_id: int) -> int:
+    # 超过标准帧范围的使用扩展帧，DbcParser解析后会过滤掉
+    return msg_id if msg_id <= 0x7ff else msg_id | 0x80000000
+
+
+def get_dbc(messages: Messages, profile: str = PLAIN, seed: int = 0) -> str:
+    """
+    把get_messages生成的矩阵表转换成DBC文件的内容
+
+    :param messages: 矩阵表
+
+    :param profile: DBC文件的类型，参考PROFILES
+
+    :param seed: 随机数种子，用于生成注释和值表
+
+    :return: DBC文件的内容
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"profile {profile} not support, only support {PROFILES}")
+    rand = random.Random(seed)
+    is_chinese = profile == GBK
+    lines = ['VERSION ""', "", "NS_ :", "    CM_", "    BA_DEF_", "    BA_", "    VAL_", "",
+             "BS_:", "", "BU_: GW HU", ""]
+    for message in messages:
+        msg_id = _get_message_id(message["id"])
+        lines.append(f"BO_ {msg_id} {message['name']}: {message['length']} {message['sender']}")
+        for signal in message["signals"]:
+            byte_type = 1 if signal["byte_type"] else 0
+            lines.append(f" SG_ {signal['name']} : {signal['start_bit']}|{signal['signal_size']}@{byte_type}+ "
+                         f"({signal['factor']},{signal['offset']}) [{signal['minimum']}|{signal['maximum']}] "
+                         f"\"{signal['unit']}\" {signal['receiver']}")
+        lines.append("")
+    if profile != PLAIN:
+        for message in messages:
+            msg_id = _get_message_id(message["id"])
+            for signal in message["signals"]:
+                if profile == MULTILINE:
+                    comment = "\r\n".join(f"line {index} of {signal['name']}" for index in range(rand.randint(2, 4)))
+                elif is_chinese:
+                    comment = f"{signal['name']}的注释，第{rand.randint(1, 100)}个"
+                else:
+                    comment = f"comment of {signal['name']}"
+                lines.append(f"CM_ SG_ {msg_id} {signal['name']} \"{comment}\";")
+    lines.append('BA_DEF_ BO_  "GenMsgCycleTime" INT 0 10000;')
+    lines.append('BA_DEF_ BO_  "GenMsgSendType" ENUM  "Cycle","Event","CE";')
+    lines.append('BA_DEF_ SG_  "GenSigStartValue" INT 0 65535;')
+    lines.append('BA_DEF_ BO_  "GenMsgILSupport" ENUM  "No","Yes";')
+    lines.append('BA_DEF_DEF_  "GenMsgCycleTime" 0;')
+    lines.append('BA_DEF_DEF_  "GenMsgSendType" "Cycle";')
+    lines.append('BA_DEF_DEF_  "GenSigStartValue" 0;')
+    lines.append('BA_DEF_DEF_  "GenMsgILSupport" "Yes";')
+    for message in messages:
+        msg_id = _get_message_id(message["id"])
+        lines.append(f"BA_ \"GenMsgCycleTime\" BO_ {msg_id} {message['msg_cycle_time']};")
+        lines.append(f"BA_ \"GenMsgSendType\" BO_ {msg_id} 0;")
+        if profile != PLAIN:
+            lines.append(f"BA_ \"GenMsgILSupport\" BO_ {msg_id} 1;")
+            for signal in message["signals"]:
+                lines.append(f"BA_ \"GenSigStartValue\" SG_ {msg_id} {signal['name']} {signal['start_value']};")
+    if profile != PLAIN:
+        texts = ("关闭", "打开", "无效") if is_chinese else ("Off", "On", "Invalid")
+        for message in messages:
+            msg_id = _get_message_id(message["id"])
+            for signal in message["signals"]:
+                count = min(len(texts), 1 << signal["signal_size"])
+                values = " ".join(f"{index} \"{texts[index]}\"" for index in range(count))
+                lines.append(f"VAL_ {msg_id} {signal['name']} {values} ;")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def write_dbc(file: str, count: int, profile: str = PLAIN, seed: int = 0):
+    """
+    生成DBC文件，gbk类型的使用gbk编码，其他的使用utf-8编码
+
+    :param file: DBC文件
+
+    :param count: message的数量
+
+    :param profile: DBC文件的类型，参考PROFILES
+
+    :param seed: 随机数种子，相同的种子生成相同的文件
+    """
+    content = get_dbc(get_messages(count, seed=seed), profile, seed)
+    encoding = "gbk" if profile == GBK else "utf-8"
+    with open(file, "w", encoding=encoding, newline="") as f:
+        f.write(content)
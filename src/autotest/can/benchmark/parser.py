@@ -0,0 +1,177 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        parser
+# @Author:      philosophy
+# @Created:     2024/03/23 - 09:40
+# --------------------------------------------------------
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from time import perf_counter
+from typing import Dict, Any, Callable, Sequence, Optional
+
+from ..cache import CACHE_FOLDER_ENV
+from ..dbc_parser import DbcParser
+from ..message import get_message
+from .matrix import write_dbc, PROFILES
+
+"""
+DBC解析以及矩阵表加载的性能测试，统计耗时以及内存峰值，结果保存为json文件，用于对比不同提交之间的性能变化
+
+测试使用的DBC文件根据message数量和类型(参考matrix.PROFILES)生成，相同的参数每次生成的文件都相同
+
+使用方法：
+
+    python -m autotest.can.benchmark.parser --sizes 100 1000 5000 --output result.json
+"""
+
+# 默认的message数量
+SIZES = 100, 1000, 5000
+
+
+@contextmanager
+def cache_folder(folder: str):
+    """
+    临时修改矩阵表的缓存目录，避免使用或者污染用户目录下的缓存
+
+    :param folder: 缓存目录
+    """
+    old_folder = os.environ.get(CACHE_FOLDER_ENV)
+    os.environ[CACHE_FOLDER_ENV] = folder
+    try:
+        yield
+    finally:
+        if old_folder is None:
+            os.environ.pop(CACHE_FOLDER_ENV, None)
+        else:
+            os.environ[CACHE_FOLDER_ENV] = old_folder
+
+
+def measure(function: Callable[[], Any], repeat: int = 1,
+            prepare: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """
+    统计函数的耗时以及内存峰值
+
+    耗时取多次运行中最短的一次，内存峰值单独使用tracemalloc运行一次统计，不影响耗时
+
+    :param function: 要统计的函数
+
+    :param repeat: 统计耗时的运行次数
+
+    :param prepare: 每次运行前调用，不计入统计，如清除缓存
+
+    :return: {"seconds": 耗时, "peak_memory": 内存峰值(byte)}
+    """
+    times = []
+    for _ in range(repeat):
+        if prepare:
+            prepare()
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    if prepare:
+        prepare()
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "peak_memory": peak}
+
+
+def benchmark_file(dbc_file: str, folder: str, repeat: int = 1) -> Dict[str, Dict[str, float]]:
+    """
+    统计一个DBC文件的解析、转换json文件以及加载矩阵表的性能
+
+    get_message分为两种情况，cold为没有任何缓存，warm为矩阵表和编解码模块都已经缓存
+
+    :param dbc_file: DBC文件
+
+    :param folder: 临时目录，用于输出json文件以及缓存
+
+    :param repeat: 统计耗时的运行次数
+
+    :return: {测试项: {"seconds": 耗时, "peak_memory": 内存峰值}}
+    """
+    json_file = os.path.join(folder, "matrix.json")
+    cache = os.path.join(folder, "cache")
+
+    def clear_cache():
+        if os.path.exists(cache):
+            for name in os.listdir(cache):
+                os.remove(os.path.join(cache, name))
+
+    result = dict()
+    result["parse"] = measure(lambda: DbcParser().parse(dbc_file), repeat)
+    result["parse_to_file"] = measure(lambda: DbcParser().parse_to_file(dbc_file, json_file), repeat)
+    with cache_folder(cache):
+        result["get_message_cold"] = measure(lambda: get_message(dbc_file), repeat, clear_cache)
+        get_message(dbc_file)
+        result["get_message_warm"] = measure(lambda: get_message(dbc_file), repeat)
+    return result
+
+
+def run(sizes: Sequence[int] = SIZES, profiles: Sequence[str] = PROFILES, repeat: int = 1,
+        seed: int = 0) -> Dict[str, Any]:
+    """
+    生成DBC文件并依次运行性能测试
+
+    :param sizes: message的数量
+
+    :param profiles: DBC文件的类型，参考matrix.PROFILES
+
+    :param repeat: 统计耗时的运行次数
+
+    :param seed: 生成DBC文件的随机数种子
+
+    :return: 测试环境以及每个DBC文件的测试结果
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="autotest_benchmark_") as folder:
+        for size in sizes:
+            for profile in profiles:
+                dbc_file = os.path.join(folder, f"{profile}_{size}.dbc")
+                write_dbc(dbc_file, size, profile, seed)
+                results.append({
+                    "messages": size,
+                    "profile": profile,
+                    "file_size": os.path.getsize(dbc_file),
+                    "results": benchmark_file(dbc_file, folder, repeat)
+                })
+    return {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "seed": seed,
+        "benchmarks": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark of DbcParser and get_message with generated dbc files")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="message count of dbc files")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=list(PROFILES), help="type of dbc files")
+    parser.add_argument("--repeat", type=int, default=1, help="run times of each benchmark, the fastest one is used")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of dbc files")
+    parser.add_argument("--output", help="json file to save the result, print to console if not set")
+    args = parser.parse_args()
+    result = json.dumps(run(args.sizes, args.profiles, args.repeat, args.seed), indent=4)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(result)
+    else:
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
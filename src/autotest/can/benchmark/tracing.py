@@ -0,0 +1,166 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        tracing
+# @Author:      philosophy
+# @Created:     2024/03/16 - 10:20
+# --------------------------------------------------------
+import argparse
+import json
+import random
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Tuple, Any
+
+from autotest.logger import logger, log_switch
+from ..message import get_message
+from ..usbcan.usbcan_basic import VciCanObj
+from ..abstract_class import BaseCanBus
+from ..usbcan.usbcan_bus import UsbCanBus
+from .matrix import get_messages
+
+"""
+对比打开和关闭trace log的时候，编解码以及接收线程的吞吐量
+
+打开trace log的时候log输出到一个空的sink中，只统计格式化log的开销
+
+使用方法：
+
+    python -m autotest.can.benchmark.tracing --messages 100 --rounds 20 --frames 100000
+"""
+
+
+@contextmanager
+def tracing(enable: bool):
+    """
+    临时打开或者关闭热点路径的trace log
+
+    :param enable: 是否打开
+    """
+    trace, debug = log_switch.trace, log_switch.debug
+    handler_id = logger.add(lambda message: None, level="TRACE") if enable else None
+    log_switch.trace, log_switch.debug = enable, enable
+    try:
+        yield
+    finally:
+        log_switch.trace, log_switch.debug = trace, debug
+        if handler_id is not None:
+            logger.remove(handler_id)
+
+
+def benchmark_codec(message_count: int, rounds: int) -> float:
+    """
+    编解码的吞吐量，每次操作为设置所有signal的值后编码，然后写入新的data后读取所有signal的值
+
+    :param message_count: message的数量
+
+    :param rounds: 轮数
+
+    :return: 每秒操作的message数量
+    """
+    id_messages, _ = get_message(get_messages(message_count))
+    rand = random.Random(0)
+    payloads = [bytes(rand.randrange(256) for _ in range(8)) for _ in range(64)]
+    start = perf_counter()
+    for index in range(rounds):
+        for message in id_messages.values():
+            for signal in message.signals.values():
+                signal.value = index & signal.layout[3]
+            message.update(True)
+            message.data = list(payloads[index % len(payloads)])
+            message.update(False)
+            for signal in message.signals.values():
+                _ = signal.physical_value
+    return rounds * len(id_messages) / (perf_counter() - start)
+
+
+class _FakeDevice(object):
+    """
+    模拟的CAN盒，每次读取返回同样的一批帧，读取指定次数后关闭
+    """
+
+    def __init__(self, reads: int, batch_size: int):
+        self.__reads = reads
+        self.__frames = (VciCanObj * batch_size)()
+        for index in range(batch_size):
+            frame = self.__frames[index]
+            frame.id = 0x100 + index % 64
+            frame.time_stamp = index * 10
+            frame.data_len = 8
+            for i in range(8):
+                frame.data[i] = (index + i) & 0xff
+
+    @property
+    def is_open(self) -> bool:
+        return self.__reads > 0
+
+    @property
+    def overruns(self) -> int:
+        return 0
+
+    def read(self, timeout: float) -> Tuple[int, Any]:
+        self.__reads -= 1
+        return len(self.__frames), self.__frames
+
+
+def benchmark_receive(frame_count: int, batch_size: int = 2500) -> float:
+    """
+    接收线程的吞吐量，使用UsbCanBus的接收函数处理模拟CAN盒收到的帧
+
+    :param frame_count: 帧的数量
+
+    :param batch_size: 每次从CAN盒读取的帧数
+
+    :return: 每秒处理的帧数
+    """
+    reads = max(1, frame_count // batch_size)
+    # 不加载CAN盒的dll，只初始化BaseCanBus的属性后替换成模拟的CAN盒
+    bus = object.__new__(UsbCanBus)
+    BaseCanBus.__init__(bus)
+    bus._can = _FakeDevice(reads, batch_size)
+    try:
+        start = perf_counter()
+        bus._UsbCanBus__receive()
+        seconds = perf_counter() - start
+    finally:
+        bus.thread_pool.shutdown()
+    # 接收线程处理失败的时候只输出log，没有全部保存说明统计的不是正常的处理流程
+    stack = bus._stack
+    if len(stack) + stack.dropped != reads * batch_size:
+        raise RuntimeError(f"only {len(stack) + stack.dropped} of {reads * batch_size} frames are handled")
+    return reads * batch_size / seconds
+
+
+def run(message_count: int = 100, rounds: int = 20, frame_count: int = 100000) -> Dict[str, Dict[str, float]]:
+    """
+    分别在关闭和打开trace log的情况下运行性能测试
+
+    :param message_count: 编解码测试的message数量
+
+    :param rounds: 编解码测试的轮数
+
+    :param frame_count: 接收测试的帧数
+
+    :return: {"codec": {"off": x, "on": y}, "receive": {"off": x, "on": y}}
+    """
+    result = {"codec": dict(), "receive": dict()}
+    for enable in (False, True):
+        key = "on" if enable else "off"
+        with tracing(enable):
+            result["codec"][key] = benchmark_codec(message_count, rounds)
+            result["receive"][key] = benchmark_receive(frame_count)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="benchmark of codec and receive loop with trace log on and off")
+    parser.add_argument("--messages", type=int, default=100, help="message count of the matrix")
+    parser.add_argument("--rounds", type=int, default=20, help="rounds of encode and decode")
+    parser.add_argument("--frames", type=int, default=100000, help="frame count of receive loop")
+    args = parser.parse_args()
+    print(json.dumps(run(args.messages, args.rounds, args.frames), indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        cache
+# @Author:      philosophy
+# @Created:     2024/03/09 - 14:20
+# --------------------------------------------------------
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Optional, Any
+
+from ..logger import logger
+
+"""
+矩阵表相关的磁盘缓存工具
+
+缓存目录默认为用户目录下的.autotest/cache，可以通过环境变量AUTOTEST_CACHE_FOLDER修改
+"""
+
+# 缓存目录的环境变量
+CACHE_FOLDER_ENV = "AUTOTEST_CACHE_FOLDER"
+
+
+def get_cache_folder() -> Optional[str]:
+    """
+    获取缓存目录，不存在则创建
+
+    :return: 缓存目录，无法创建的时候返回None
+    """
+    folder = os.environ.get(CACHE_FOLDER_ENV, os.path.join(os.path.expanduser("~"), ".autotest", "cache"))
+    try:
+        os.makedirs(folder, exist_ok=True)
+        return folder
+    except OSError as e:
+        logger.debug(f"can not create cache folder {folder}, error is {e}")
+        return None
+
+
+def get_content_hash(content: bytes, *args: str) -> str:
+    """
+    获取内容的哈希值
+
+    :param content: 内容
+
+    :param args: 一起参与计算的其他内容，如版本号、编码等
+
+    :return: 哈希值
+    """
+    sha = hashlib.sha256(content)
+    for arg in args:
+        sha.update(b"\x00")
+        sha.update(arg.encode("utf-8"))
+    return sha.hexdigest()
+
+
+def get_file_hash(file: str, *args: str) -> str:
+    """
+    获取文件内容的哈希值
+
+    :param file: 文件
+
+    :param args: 一起参与计算的其他内容，如版本号、编码等
+
+    :return: 哈希值
+    """
+    with open(file, "rb") as f:
+        return get_content_hash(f.read(), *args)
+
+
+def write_atomic(file: str, content: bytes):
+    """
+    原子方式写入文件，先写入同目录的临时文件然后替换，多个进程同时写入的时候不会读取到写了一半的文件
+
+    :param file: 文件
+
+    :param content: 内容
+    """
+    folder = os.path.dirname(file)
+    fd, temp_file = tempfile.mkstemp(dir=folder, prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(temp_file, file)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+
+def read_cache(name: str) -> Optional[Any]:
+    """
+    读取缓存目录中pickle格式的缓存
+
+    :param name: 缓存文件名
+
+    :return: 缓存的对象，不存在或者读取失败的时候返回None
+    """
+    folder = get_cache_folder()
+    if folder is None:
+        return None
+    file = os.path.join(folder, name)
+    try:
+        with open(file, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        logger.debug(f"read cache {file} failed, error is {e}")
+        return None
+
+
+def write_cache(name: str, obj: Any):
+    """
+    以pickle格式原子写入缓存目录，多个进程同时生成同一个缓存的时候以最后一个为准，内容是相同的
+
+    :param name: 缓存文件名
+
+    :param obj: 要缓存的对象
+    """
+    folder = get_cache_folder()
+    if folder is None:
+        return
+    file = os.path.join(folder, name)
+    try:
+        write_atomic(file, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+    except OSError as e:
+        logger.debug(f"write cache {file} failed, error is {e}")
+
+
+def remove_cache(prefix: str, suffix: str = "") -> int:
+    """
+    删除缓存目录中以prefix开头、以suffix结尾的缓存文件
+
+    :param prefix: 文件名前缀
+
+    :param suffix: 文件名后缀
+
+    :return: 删除的文件数量
+    """
+    folder = get_cache_folder()
+    if folder is None:
+        return 0
+    count = 0
+    for name in os.listdir(folder):
+        if name.startswith(prefix) and name.endswith(suffix):
+            try:
+                os.remove(os.path.join(folder, name))
+                count += 1
+            except FileNotFoundError:
+                # 其他进程已经删除了
+                pass
+    return count
@@ -8,13 +8,18 @@
 # --------------------------------------------------------
 import time
 import random
-import copy
 from time import sleep
-from typing import Tuple, Union, List, Any, Dict, Optional
-
-from .message import Message, get_message, MessageType
+from itertools import count
+from typing import Tuple, Union, List, Any, Dict, Optional, Iterable, Callable
+
+from .message import Message, Frame, get_message, load_messages, create_message, Messages, Matrix, Number, \
+    decode_data
+from .codec import load_codec
+from .columnar import SignalColumns, decode_columns, is_numpy_available
+from .capture import FrameCapture, DEFAULT_CAPTURE_CAPACITY
 from .abstract_class import BaseCanBus, CanBoxDeviceEnum, BaudRateEnum, Singleton
-from ..logger import logger
+from .stack import StackPolicyEnum, DEFAULT_CAPACITY, filter_frames
+from ..logger import logger, log_switch
 
 FilterNode = Union[str, Union[Tuple[str, ...], List[str]]]
 MessageIdentity = Union[int, str]
@@ -145,6 +150,14 @@ class CanBus(metaclass=Singleton):
         """
         self._can.transmit(message)
 
+    def transmit_messages(self, messages: List[Message]):
+        """
+        批量发送CAN消息帧
+
+        :param messages: Message对象的集合
+        """
+        self._can.transmit_messages(messages)
+
     def transmit_one(self, message: Message):
         """
         仅发一帧数据
@@ -169,7 +182,7 @@ class CanBus(metaclass=Singleton):
         """
         self._can.clear_stack_data()
 
-    def get_stack(self) -> List[Message]:
+    def get_stack(self) -> List[Frame]:
         """
         获取当前栈中所收到的消息
 
@@ -177,6 +190,135 @@ class CanBus(metaclass=Singleton):
         """
         return self._can.get_stack()
 
+    def get_frames(self, message_id: int) -> List[Frame]:
+        """
+        获取栈中某个message的所有帧
+
+        :param message_id: message的ID
+
+        :return: 按照接收的顺序排列的帧
+        """
+        return self._can.get_frames(message_id)
+
+    def frames_between(self, message_id: int, start_time: int, end_time: int) -> List[Frame]:
+        """
+        获取栈中某个message在[start_time, end_time]之间收到的帧
+
+        :param message_id: message的ID
+
+        :param start_time: 开始时间(包含)，单位微秒
+
+        :param end_time: 结束时间(包含)，单位微秒
+
+        :return: 按照接收的顺序排列的帧
+        """
+        return self._can.frames_between(message_id, start_time, end_time)
+
+    def last_before(self, message_id: int, time_stamp: int) -> Optional[Frame]:
+        """
+        获取栈中某个message在time_stamp(包含)之前收到的最后一帧
+
+        :param message_id: message的ID
+
+        :param time_stamp: 时间戳，单位微秒
+
+        :return: Frame对象，没有的时候返回None
+        """
+        return self._can.last_before(message_id, time_stamp)
+
+    def time_range(self) -> Optional[Tuple[int, int]]:
+        """
+        栈中保存的帧的时间范围
+
+        :return: (最早的帧的时间戳, 最后的帧的时间戳)，单位微秒，栈为空的时候返回None
+        """
+        return self._can.time_range()
+
+    def wait_for_frame(self,
+                       message_id: Optional[int] = None,
+                       predicate: Optional[Callable[[Frame], bool]] = None,
+                       timeout: Optional[float] = None,
+                       latest: bool = False) -> Optional[Frame]:
+        """
+        等待收到满足条件的帧，接收线程收到帧的时候立即返回
+
+        :param message_id: message的ID，为None的时候等待任意帧
+
+        :param predicate: 帧需要满足的条件，为None的时候收到帧就返回
+
+        :param timeout: 超时时间，单位秒，为None的时候一直等待
+
+        :param latest: 是否先检查最后收到的帧
+
+        :return: Frame对象，超时返回None
+        """
+        return self._can.wait_for_frame(message_id, predicate, timeout, latest)
+
+    def wait_for_silence(self, duration: float, timeout: Optional[float] = None) -> bool:
+        """
+        等待总线静默，即连续duration时间内没有收到任何帧
+
+        :param duration: 静默时间，单位秒
+
+        :param timeout: 超时时间，单位秒，为None的时候一直等待
+
+        :return: 是否等到了静默，超时返回False
+        """
+        return self._can.wait_for_silence(duration, timeout)
+
+    @property
+    def dropped_frames(self) -> int:
+        """
+        栈满了之后被覆盖或者丢弃的帧数
+        """
+        return self._can.dropped_frames
+
+    @property
+    def overruns(self) -> int:
+        """
+        设备接收缓冲区溢出的次数
+        """
+        return self._can.overruns
+
+    def set_stack(self, capacity: int = DEFAULT_CAPACITY, policy: StackPolicyEnum = StackPolicyEnum.OVERWRITE):
+        """
+        设置栈的容量以及栈满了之后的处理策略，已经收到的帧会被清除
+
+        :param capacity: 容量(帧数)
+
+        :param policy: 栈满了之后的处理策略，默认覆盖最早收到的帧
+        """
+        self._can.set_stack(capacity, policy)
+
+    @property
+    def capture(self) -> Optional[FrameCapture]:
+        """
+        正在录制的帧，没有录制的时候返回None
+        """
+        return self._can.capture
+
+    def start_capture(self, capacity: int = DEFAULT_CAPTURE_CAPACITY, save_stack: bool = False) -> FrameCapture:
+        """
+        开始把接收到的帧录制到numpy结构化数组中，用于长时间高帧率的录制，需要安装numpy
+
+        默认不保存到栈中，这个时候查询栈中帧的功能(如get_stack、is_lost_message)会抛出异常，参考BaseCanBus.start_capture
+
+        :param capacity: 初始容量(帧数)，写满之后自动扩容
+
+        :param save_stack: 是否同时保存到栈中，默认不保存
+
+        :return: FrameCapture对象
+        """
+        return self._can.start_capture(capacity, save_stack)
+
+    def stop_capture(self) -> Optional[FrameCapture]:
+        """
+        停止录制，之后接收到的帧恢复保存到栈中
+
+        :return: 录制的帧，没有录制的时候返回None
+        """
+        return self._can.stop_capture()
+
 
 class CanService(CanBus):
     """
@@ -207,7 +349,7 @@ class CanService(CanBus):
     """
 
     def __init__(self,
-                 messages: Union[str, MessageType],
+                 messages: Union[str, Messages, Matrix],
                  encoding: str = "utf-8",
                  can_box_device: Union[CanBoxDeviceEnum, str, None] = None,
                  baud_rate: Union[BaudRateEnum, int] = BaudRateEnum.HIGH,
@@ -216,11 +358,16 @@ class CanService(CanBus):
                  can_fd: bool = False,
                  max_workers: int = 300):
         super().__init__(can_box_device, baud_rate, data_rate, channel_index, can_fd, max_workers)
-        logger.debug(f"read message from file {messages}")
-        self.__messages, self.__name_messages = get_message(messages, encoding=encoding)
-        # 备份message, 可以作为初始值发送
-        self.__backup_messages = copy.deepcopy(self.__messages)
-        self.__backup_name_messages = copy.deepcopy(self.__name_messages)
+        content_hash = None
+        if isinstance(messages, str):
+            logger.debug(f"read message from file {messages}")
+            messages, content_hash = load_messages(messages, encoding)
+        self.__messages, self.__name_messages = get_message(messages, encoding=encoding, content_hash=content_hash)
+        # 矩阵表中message的原始定义，重新加载矩阵表的时候用于对比是否变化
+        self.__sources = dict((msg["id"], msg) for msg in messages) if isinstance(messages, list) else dict()
+        # 初始值的快照, 恢复的时候原地修改message，不需要复制整个矩阵表
+        self.__default_snapshots = dict((msg_id, message.get_snapshot())
+                                        for msg_id, message in self.__messages.items())
 
     @property
     def name_messages(self) -> Dict[str, Any]:
@@ -234,21 +381,56 @@ class CanService(CanBus):
         """
         恢复初始的message值
         """
-        self.__messages = copy.deepcopy(self.__backup_messages)
-        self.__name_messages = copy.deepcopy(self.__backup_name_messages)
-
-    def __set_message(self, msg_id: int, data: list) -> Message:
-        """
-        :param msg_id: 消息ID
-
-        :param data: 数据
-
-        :return: Message对象
-        """
-        msg = self.messages[msg_id]
-        msg.data = data
-        msg.update(False)
-        return msg
+        for msg_id, snapshot in self.__default_snapshots.items():
+            self.__messages[msg_id].restore(snapshot)
+
+    def reload_matrix(self, messages: str, encoding: str = "utf-8") -> Tuple[List[int], List[int], List[int]]:
+        """
+        运行中重新加载矩阵表(如DBC文件修改了)，不需要停止CAN的发送线程
+
+        只有定义变化了的message才会重新创建，并且原地替换原来的Message对象(参考Message.reload)，
+
+        布局相同的signal保留当前的值，删除的message停止发送
+
+        创建时传入的是load_matrices的结果的时候没有原始定义，第一次重新加载会替换所有的message
+
+        :param messages: json或者dbc文件
+
+        :param encoding: 编码格式，默认utf-8
+
+        :return: (新增的msg id, 修改的msg id, 删除的msg id)
+        """
+        matrix, _ = load_messages(messages, encoding)
+        sources = dict((msg["id"], msg) for msg in matrix)
+        changed_sources = [msg for msg_id, msg in sources.items() if self.__sources.get(msg_id) != msg]
+        added, changed = [], []
+        if changed_sources:
+            # 只为变化了的message生成编解码函数，按照这部分message的内容缓存
+            codec = load_codec(changed_sources)
+            for msg in changed_sources:
+                message = create_message(msg, codec)
+                msg_id = message.msg_id
+                # 初始值的快照在继承当前值之前获取
+                self.__default_snapshots[msg_id] = message.get_snapshot()
+                old_message = self.__messages.get(msg_id)
+                if old_message is None:
+                    self.__messages[msg_id] = message
+                    added.append(msg_id)
+                else:
+                    self.__name_messages.pop(old_message.msg_name, None)
+                    old_message.reload(message)
+                    message = old_message
+                    changed.append(msg_id)
+                self.__name_messages[message.msg_name] = message
+        removed = [msg_id for msg_id in self.__messages if msg_id not in sources]
+        for msg_id in removed:
+            message = self.__messages.pop(msg_id)
+            self.__name_messages.pop(message.msg_name, None)
+            self.__default_snapshots.pop(msg_id, None)
+            message.stop_flag = True
+        self.__sources = sources
+        logger.info(f"reload matrix {messages}, added {len(added)}, changed {len(changed)}, removed {len(removed)}")
+        return added, changed, removed
 
     @staticmethod
     def __is_message_in_node(message: Message, filter_sender: FilterNode) -> bool:
@@ -308,15 +490,18 @@ class CanService(CanBus):
                     else:
                         max_value = 2 ** sig.bit_length - 1
                         value = random.randint(0, max_value)
-                        logger.trace(f"value is [{value}]")
+                        if log_switch.trace:
+                            logger.trace(f"value is [{value}]")
                         sig.value = value
             else:
                 for sig_name, sig in message.signals.items():
                     max_value = 2 ** sig.bit_length - 1
                     value = random.randint(0, max_value)
-                    logger.trace(f"value is [{value}]")
+                    if log_switch.trace:
+                        logger.trace(f"value is [{value}]")
                     sig.value = value
-        logger.trace(f"sender is {message.sender}")
+        if log_switch.trace:
+            logger.trace(f"sender is {message.sender}")
         self.send_can_message(message)
         # # 避免错误发生后不再发送数据，容错处理
         # try:
@@ -341,21 +526,106 @@ class CanService(CanBus):
                 return msg.msg_id
         raise RuntimeError(f"{signal_name} can not be found in messages")
 
-    def send_can_message_by_id_or_name(self, msg: MessageIdentity):
+    def __get_signal_values(self,
+                            stack: Iterable[Frame],
+                            signal_name: str,
+                            msg_id: int,
+                            physical: bool = True) -> List[int]:
         """
-        据矩阵表中定义的Messages，通过msg ID或者name来发送message到网络中
+        获取栈中某个signal的所有值，只解析这一个signal，不会修改矩阵表中的Message
 
-        该方法仅发送Message消息，但不会改变Message的值，如需改变值，请使用send_can_signal_message方法
+        :param stack: 栈中消息
+
+        :param signal_name: 信号名称
+
+        :param msg_id: 信号ID
+
+        :param physical: 是否返回物理值， False则返回总线值
+
+        :return: 按收到的顺序排列的值
+        """
+        if is_numpy_available():
+            columns = self.get_signal_columns(stack, [signal_name], msg_id)[signal_name]
+            values = columns.physical_values if physical else columns.values
+            return values.tolist()
+        if msg_id not in self.messages or signal_name not in self.messages[msg_id].signals:
+            raise RuntimeError(f"{signal_name} is not in {msg_id}")
+        signal = self.messages[msg_id].signals[signal_name]
+        values = [decode_data(frame.data, signal.layout) for frame in filter_frames(stack, msg_id)]
+        if physical:
+            return [signal.to_physical_value(value) for value in values]
+        return values
+
+    def get_signal_columns(self,
+                           stack: Iterable[Frame],
+                           signal_names: Iterable[str],
+                           msg_id: Optional[int] = None) -> Dict[str, SignalColumns]:
+        """
+        批量解析栈中的signal，返回每个signal的时间戳、总线值和物理值（numpy数组）
+
+        需要安装numpy
+
+        :param stack: 栈中消息，或者任意可以迭代的帧集合
+
+        :param signal_names: 信号名称集合
+
+        :param msg_id: 信号所在的msg id，为空的时候根据信号名称查找
+
+        :return: {signal_name: SignalColumns}
+        """
+        signals = dict()
+        for signal_name in signal_names:
+            signals[signal_name] = msg_id if msg_id is not None else self.__get_msg_id_from_signal_name(signal_name)
+        return decode_columns(stack, self.messages, signals)
+
+    def get_capture_columns(self,
+                            capture: FrameCapture,
+                            signal_names: Iterable[str],
+                            msg_id: Optional[int] = None,
+                            start_time: Optional[int] = None,
+                            end_time: Optional[int] = None) -> Dict[str, SignalColumns]:
+        """
+        批量解析录制的帧中的signal，返回每个signal的时间戳、总线值和物理值（numpy数组）
+
+        :param capture: 录制的帧，start_capture或者stop_capture的返回值
+
+        :param signal_names: 信号名称集合
+
+        :param msg_id: 信号所在的msg id，为空的时候根据信号名称查找
+
+        :param start_time: 开始时间(包含)，单位微秒，为空的时候不限制
+
+        :param end_time: 结束时间(包含)，单位微秒，为空的时候不限制
+
+        :return: {signal_name: SignalColumns}
+        """
+        signals = dict()
+        for signal_name in signal_names:
+            signals[signal_name] = msg_id if msg_id is not None else self.__get_msg_id_from_signal_name(signal_name)
+        return capture.decode(self.messages, signals, start_time, end_time)
+
+    def __get_message(self, msg: MessageIdentity) -> Message:
+        """
+        根据msg的名字或者id获取矩阵表中的Message
 
         :param msg： msg的名字或者id
         """
         if isinstance(msg, int):
-            send_msg = self.messages[msg]
+            return self.messages[msg]
         elif isinstance(msg, str):
-            send_msg = self.name_messages[msg]
+            return self.name_messages[msg]
         else:
             raise RuntimeError(f"msg only support str or int, but now is {msg}")
-        self.send_can_message(send_msg, False)
+
+    def send_can_message_by_id_or_name(self, msg: MessageIdentity):
+        """
+        据矩阵表中定义的Messages，通过msg ID或者name来发送message到网络中
+
+        该方法仅发送Message消息，但不会改变Message的值，如需改变值，请使用send_can_signal_message方法
+
+        :param msg： msg的名字或者id
+        """
+        self.send_can_message(self.__get_message(msg), False)
 
     def send_can_signal_message(self, msg: MessageIdentity, signal: Dict[str, int]):
         """
@@ -369,18 +639,41 @@ class CanService(CanBus):
 
             如： {"signal_name1": 0x1, "signal_name2": 0x2}
         """
-        if isinstance(msg, str):
-            msg_id = self.name_messages[msg]
-        elif isinstance(msg, int):
-            msg_id = msg
-        else:
-            raise RuntimeError(f"msg only support msg id or msg name but current value is {msg}")
-        set_message = self.messages[msg_id]
+        set_message = self.__get_message(msg)
         for name, value in signal.items():
             set_signal = set_message.signals[name]
             set_signal.physical_value = value
         set_message.check_message()
-        self.send_can_message_by_id_or_name(msg_id)
+        self.send_can_message(set_message, False)
+
+    def apply_signals(self, signals: Dict[MessageIdentity, Dict[str, Number]]):
+        """
+        批量设置多个message中的signal并发送，每个message只编码一次，然后一次性交给CAN发送，
+
+        适用于一次改变多个整车状态的场景，代替多次调用send_can_signal_message
+
+        :param signals: 需要修改的信号，其中key是msg的名字或者id，value是{信号名字: 物理值}
+
+            如： {0x152: {"signal_name1": 0x1, "signal_name2": 0x2}, "msg_name": {"signal_name3": 50}}
+        """
+        # 先按message分组并找到所有的signal，名字错误的时候不会修改任何值
+        group_signals = dict()
+        for msg, values in signals.items():
+            message = self.__get_message(msg)
+            for name in values:
+                if name not in message.signals:
+                    raise RuntimeError(f"{name} is not in {hex(message.msg_id)}")
+            if message.msg_id not in group_signals:
+                group_signals[message.msg_id] = message, dict()
+            group_signals[message.msg_id][1].update(values)
+        messages = []
+        for message, values in group_signals.values():
+            for name, value in values.items():
+                message.signals[name].physical_value = value
+            message.check_message()
+            message.update(True)
+            messages.append(message)
+        self.transmit_messages(messages)
 
     def send_can_message(self, send_msg: Message, type_: bool = False):
         """
@@ -396,24 +689,28 @@ class CanService(CanBus):
         """
         send_msg.check_message(type_)
         if not type_:
-            logger.debug("now update message")
+            if log_switch.debug:
+                logger.debug("now update message")
             send_msg.update(True)
-        logger.debug(f"msg Id {hex(send_msg.msg_id)}, msg data is {list(map(lambda x: hex(x), send_msg.data))}")
+        if log_switch.debug:
+            logger.debug(f"msg Id {hex(send_msg.msg_id)}, msg data is {bytes(send_msg.data).hex(' ')}")
         self.transmit(send_msg)
 
-    def receive_can_message(self, message_id: int) -> Message:
+    def receive_can_message(self, message_id: int) -> Union[Message, Frame]:
         """
         接收在CAN上收到的Message消息，当能够在内置的messages对象中查询到则能够查询到具体的signals的值，否则只能查询到8byte数据
 
         :param message_id: message id值
 
-        :return: Message对象
+        :return: Message对象，不在messages中的返回收到的Frame对象
         """
-        receive_msg = self.receive(message_id)
+        return self.__to_message(self.receive(message_id))
+
+    def __to_message(self, receive_msg: Frame) -> Union[Message, Frame]:
         try:
-            # 如果能在messages对象中查询到相关内容，更新一下value值
+            # 如果能在messages对象中查询到相关内容，更新一下value值（读取signal的时候才解析）
             json_msg = self.messages[receive_msg.msg_id]
-            json_msg.data = receive_msg.data
+            json_msg.data = list(receive_msg.data)
             json_msg.update(False)
             return json_msg
         except KeyError:
@@ -431,6 +728,56 @@ class CanService(CanBus):
         """
         return self.receive_can_message(message_id).signals[signal_name].physical_value
 
+    def wait_for_message(self, message_id: int, timeout: Optional[float] = None) -> Union[Message, Frame, None]:
+        """
+        等待收到某个message，收到的时候立即返回，不需要sleep之后再调用receive_can_message
+
+        :param message_id: message id值
+
+        :param timeout: 超时时间，单位秒，为None的时候一直等待
+
+        :return: 与receive_can_message相同，超时返回None
+        """
+        frame = self._can.wait_for_frame(message_id, timeout=timeout)
+        return None if frame is None else self.__to_message(frame)
+
+    def wait_for_signal(self,
+                        signal_name: str,
+                        predicate: Callable[[Number], bool],
+                        timeout: Optional[float] = None,
+                        msg_id: Optional[int] = None,
+                        latest: bool = True) -> Optional[Number]:
+        """
+        等待signal的物理值满足条件，收到满足条件的帧的时候立即返回
+
+        如：等待车速大于100
+
+            service.wait_for_signal("VehicleSpeed", lambda value: value > 100, timeout=5)
+
+        :param signal_name: 信号名称
+
+        :param predicate: 物理值需要满足的条件
+
+        :param timeout: 超时时间，单位秒，为None的时候一直等待
+
+        :param msg_id: 信号所在的msg id，为None的时候根据信号名称查找
+
+        :param latest: 是否先检查最后收到的值，默认最后收到的值满足条件的时候直接返回
+
+        :return: 满足条件的物理值，超时返回None
+        """
+        if msg_id is None:
+            msg_id = self.__get_msg_id_from_signal_name(signal_name)
+        if msg_id not in self.messages or signal_name not in self.messages[msg_id].signals:
+            raise RuntimeError(f"{signal_name} is not in {msg_id}")
+        signal = self.messages[msg_id].signals[signal_name]
+
+        def get_value(frame: Frame) -> Number:
+            return signal.to_physical_value(decode_data(frame.data, signal.layout))
+
+        frame = self._can.wait_for_frame(msg_id, lambda x: predicate(get_value(x)), timeout, latest)
+        return None if frame is None else get_value(frame)
+
     def is_lost_message(self,
                         msg_id: int,
                         cycle_time: int,
@@ -450,7 +797,7 @@ class CanService(CanBus):
 
         :param lost_period: 信号丢失周期（默认为10个周期)
 
-        :param continue_time: 检测时间（当不为空的时候，会清空数据并等待time ms，然后再检测数据)
+        :param continue_time: 检测时间，单位秒（等待continue_time后只检测这段时间内收到的数据，不会清空栈数据)
 
         :param cycle_time: 信号周期 单位ms
 
@@ -461,26 +808,38 @@ class CanService(CanBus):
             logger.info(f"judge bus status")
             if self.is_can_bus_lost(bus_time):
                 return True
-        logger.debug(f"sleep {continue_time}")
-        # 清空栈数据，继续接收数据
-        self.clear_stack_data()
-        time.sleep(continue_time)
-        stack = self._can.get_stack()
-        logger.debug(f"stack size is {len(stack)}")
-        # 过滤掉没有用的数据
-        msg_stack_list = list(filter(lambda x: x.msg_id == msg_id, stack))
-        msg_stack_size = len(msg_stack_list)
-        logger.debug(f"msg_stack_size is {msg_stack_size}")
+        # 记录开始检测时最后一帧的时间戳，之后只检测这个时间戳之后收到的帧
+        time_range = self._can.time_range()
+        start_time = time_range[1] + 1 if time_range else 0
         # 计算continue_time时间内应该受到的帧数量
         receive_msg_size = (continue_time * 1000) / cycle_time
         logger.debug(f"receive_msg_size is {receive_msg_size}")
+        if lost_period:
+            logger.debug(f"sleep {continue_time}")
+            time.sleep(continue_time)
+        else:
+            # 收到足够的帧之后立即返回，不需要等待整个检测时间
+            counter = count(1)
+            if self._can.wait_for_frame(msg_id, lambda x: next(counter) >= receive_msg_size, continue_time):
+                logger.info(f"receive {receive_msg_size} messages before {continue_time}s")
+                return False
+        time_range = self._can.time_range()
+        # 只获取这个message在检测时间内的帧
+        if time_range:
+            end_time = time_range[1]
+            start_time = max(start_time, end_time - continue_time * 1000000)
+            msg_stack_list = self._can.frames_between(msg_id, start_time, end_time)
+        else:
+            msg_stack_list = []
+        msg_stack_size = len(msg_stack_list)
+        logger.debug(f"msg_stack_size is {msg_stack_size}")
         if lost_period:
             logger.debug(f"lost_period exist")
             # 确保至少收到两个以上的信号
             if msg_stack_size < 2:
                 return True
             else:
-                pass_time = (int(msg_stack_list[-1].time_stamp, 16) - int(msg_stack_list[-2].time_stamp, 16)) / 1000
+                pass_time = (msg_stack_list[-1].time_stamp - msg_stack_list[-2].time_stamp) / 1000
                 judge_time = cycle_time * lost_period
                 logger.info(f"pass time is {pass_time} and judge time is {judge_time}")
                 # 最后两帧的间隔时间大于信号周期间隔时间且收到的消息小于应该收到的消息去掉信号丢失周期应该收到的消息
@@ -495,15 +854,12 @@ class CanService(CanBus):
         """
         can总线是否数据丢失，如果检测周期内有一帧can信号表示can网络没有中断
 
-        :param continue_time: 清空数据，10s内收不到任何的CAN消息表示CAN总线丢失
+        :param continue_time: 检测时间，单位秒，continue_time内收不到任何的CAN消息表示CAN总线丢失，收到消息的时候立即返回
         """
-        # 清空栈数据
-        self.clear_stack_data()
-        time.sleep(continue_time)
-        return len(self._can.get_stack()) == 0
+        return self._can.wait_for_frame(timeout=continue_time) is None
 
     @staticmethod
-    def is_msg_value_changed(stack: List[Message], msg_id: int) -> bool:
+    def is_msg_value_changed(stack: List[Frame], msg_id: int) -> bool:
         """
         检测某个msg是否有变化，只能检测到整个8byte数据是否有变化
 
@@ -517,15 +873,14 @@ class CanService(CanBus):
             False: 没有变化
         """
         # 过滤掉没有用的数据
-        data_list = list(filter(lambda x: x.msg_id == msg_id, stack))
+        data_list = filter_frames(stack, msg_id)
         duplicate = set()
         for message in data_list:
-            data = message.data
-            duplicate.add(data)
+            # Frame的data是bytes，可以直接放入set中
+            duplicate.add(message.data)
         return len(duplicate) > 1
 
-    @staticmethod
-    def is_signal_value_changed(stack: List[Message], msg_id: int, signal_name: str) -> bool:
+    def is_signal_value_changed(self, stack: List[Frame], msg_id: int, signal_name: str) -> bool:
         """
         检测某个msg中某个signal是否有变化
 
@@ -540,16 +895,10 @@ class CanService(CanBus):
 
             False: 没有变化
         """
-        # 过滤掉没有用的数据
-        data_list = list(filter(lambda x: x.msg_id == msg_id, stack))
-        duplicate = set()
-        for message in data_list:
-            signal = message.signals[signal_name]
-            duplicate.add(signal.value)
-        return len(duplicate) > 1
+        return len(set(self.__get_signal_values(stack, signal_name, msg_id, False))) > 1
 
     def get_receive_signal_values(self,
-                                  stack: List[Message],
+                                  stack: List[Frame],
                                   signal_name: str,
                                   msg_id: Optional[str] = None) -> List[int]:
         """
@@ -561,20 +910,11 @@ class CanService(CanBus):
         """
         if msg_id is None:
             msg_id = self.__get_msg_id_from_signal_name(signal_name)
-        result = []
-        filter_messages = list(filter(lambda x: x.msg_id == msg_id, stack))
-        for msg in filter_messages:
-            message = self.__set_message(msg.msg_id, msg.data)
-            if signal_name not in message.signals:
-                raise RuntimeError(f"{signal_name} is not in {msg_id}")
-            else:
-                signal = message.signals[signal_name]
-                if signal.physical_value not in result:
-                    result.append(signal.physical_value)
-        return result
+        # 去重并保持出现的顺序
+        return list(dict.fromkeys(self.__get_signal_values(stack, signal_name, msg_id)))
 
     def check_signal_value(self,
-                           stack: List[Message],
+                           stack: List[Frame],
                            signal_name: str,
                            expect_value: int,
                            msg_id: Optional[int] = None,
@@ -598,18 +938,9 @@ class CanService(CanBus):
         if msg_id is None:
             msg_id = self.__get_msg_id_from_signal_name(signal_name)
         if count:
-            # 过滤需要的msg
-            filter_messages = list(filter(lambda x: x.msg_id == msg_id, stack))
-            logger.debug(f"filter messages length is {len(filter_messages)}")
-            msg_count = 0
-            for msg in filter_messages:
-                logger.debug(f"msg data = {msg.data}")
-                # 此时的msg只有data，需要调用方法更新内容
-                message = self.__set_message(msg.msg_id, msg.data)
-                actual_value = message.signals[signal_name].physical_value
-                logger.debug(f"actual_value = {actual_value}")
-                if actual_value == expect_value:
-                    msg_count += 1
+            actual_values = self.__get_signal_values(stack, signal_name, msg_id)
+            logger.debug(f"filter messages length is {len(actual_values)}")
+            msg_count = actual_values.count(expect_value)
             logger.info(f"except count is {count}, actual count = {msg_count}")
             if exact:
                 return msg_count == count
@@ -0,0 +1,208 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        capture
+# @Author:      philosophy
+# @Created:     2024/04/20 - 10:05
+# --------------------------------------------------------
+from threading import Lock
+from typing import Dict, List, Optional, Any
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .message import Message, Frame
+from .columnar import SignalColumns, extract_values, to_physical_values
+
+"""
+长时间高帧率录制CAN数据用的帧存储
+
+接收线程把每次从设备读取到的一批帧直接写入到一个可以自动扩容的numpy结构化数组中，每帧固定占用79 byte，
+
+不再为每一帧保留Frame对象，如CAN FD 5000帧/秒录制1个小时约1.4G内存
+
+分析的时候通过列(如timestamp、id)的向量化运算按照msg id或者时间范围筛选，使用方法：
+
+    can_service.start_capture(capacity=20000000)
+    ...
+    capture = can_service.stop_capture()
+    rows = capture.select(0x152, start_time, end_time)
+    rows["timestamp"], rows["data"][:, :8]
+
+需要安装numpy
+"""
+
+# 每帧data的最大长度(CAN FD)
+MAX_DATA_LENGTH = 64
+# 默认的初始容量(帧数)，写满之后容量翻倍
+DEFAULT_CAPTURE_CAPACITY = 65536
+# flags中表示CAN FD通道的位，Frame中没有帧类型，按照通道设置，CAN FD通道上收到的标准CAN帧也会设置
+FLAG_FD = 0x01
+
+# 帧的结构，timestamp单位为微秒，dlc为CAN的DLC编码(0-15)，data长度不足64的部分补0
+FRAME_DTYPE = np.dtype([
+    ("timestamp", np.uint64),
+    ("channel", np.uint8),
+    ("id", np.uint32),
+    ("flags", np.uint8),
+    ("dlc", np.uint8),
+    ("data", np.uint8, (MAX_DATA_LENGTH,))
+]) if np is not None else None
+
+# data长度(0-64)对应的dlc编码，不是标准长度的时候取能容纳该长度的最小dlc
+_DLC_CODES = np.searchsorted(np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 12, 16, 20, 24, 32, 48, 64]),
+                             np.arange(MAX_DATA_LENGTH + 1)).astype(np.uint8) if np is not None else None
+
+
+class FrameCapture(object):
+    """
+    保存接收到的帧的numpy结构化数组，字段参考FRAME_DTYPE
+
+    接收线程调用extend写入，其他线程可以同时读取，读取到的数组是已经写入部分的视图，之后写入的帧不会改变已经读取到的内容
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPTURE_CAPACITY, channel: int = 0, can_fd: bool = False):
+        """
+        :param capacity: 初始容量(帧数)，预计的帧数已知的时候直接设置，避免扩容时复制整个数组
+
+        :param channel: 写入到channel字段的通道号
+
+        :param can_fd: 是否是CAN FD通道，是的时候所有帧的flags字段都设置FLAG_FD
+        """
+        if np is None:
+            raise RuntimeError("numpy is not installed, please install numpy first")
+        if capacity <= 0:
+            raise ValueError(f"capacity must be greater than 0, but capacity is {capacity}")
+        self.__array = np.zeros(capacity, dtype=FRAME_DTYPE)
+        self.__size = 0
+        self.__channel = channel
+        self.__flags = FLAG_FD if can_fd else 0
+        self.__lock = Lock()
+
+    @property
+    def capacity(self) -> int:
+        return len(self.__array)
+
+    @property
+    def frames(self) -> Any:
+        """
+        已经写入的所有帧，结构化数组的视图
+        """
+        with self.__lock:
+            return self.__array[:self.__size]
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __grow(self, size: int):
+        capacity = len(self.__array)
+        while capacity < size:
+            capacity *= 2
+        array = np.zeros(capacity, dtype=FRAME_DTYPE)
+        array[:self.__size] = self.__array[:self.__size]
+        self.__array = array
+
+    def extend(self, frames: List[Frame]):
+        """
+        批量写入一次读取到的帧
+
+        :param frames: 按照接收顺序排列的帧
+        """
+        count = len(frames)
+        if count == 0:
+            return
+        lengths = np.fromiter((len(frame.data) for frame in frames), dtype=np.int64, count=count)
+        data = b"".join(frame.data[:MAX_DATA_LENGTH].ljust(MAX_DATA_LENGTH, b"\x00") for frame in frames)
+        with self.__lock:
+            start = self.__size
+            if start + count > len(self.__array):
+                self.__grow(start + count)
+            rows = self.__array[start:start + count]
+            rows["timestamp"] = np.fromiter((frame.time_stamp for frame in frames), dtype=np.uint64, count=count)
+            rows["channel"] = self.__channel
+            rows["id"] = np.fromiter((frame.msg_id for frame in frames), dtype=np.uint32, count=count)
+            rows["flags"] = self.__flags
+            rows["dlc"] = _DLC_CODES[np.minimum(lengths, MAX_DATA_LENGTH)]
+            rows["data"] = np.frombuffer(data, dtype=np.uint8).reshape(count, MAX_DATA_LENGTH)
+            self.__size = start + count
+
+    def clear(self):
+        """
+        清除已经写入的帧，保留已经分配的容量
+        """
+        with self.__lock:
+            self.__size = 0
+
+    def column(self, name: str) -> Any:
+        """
+        获取某一列的视图
+
+        :param name: 字段名，参考FRAME_DTYPE
+
+        :return: numpy数组
+        """
+        return self.frames[name]
+
+    def select(self,
+               msg_id: Optional[int] = None,
+               start_time: Optional[int] = None,
+               end_time: Optional[int] = None) -> Any:
+        """
+        按照msg id以及时间范围筛选帧
+
+        :param msg_id: message的ID，为空的时候不筛选
+
+        :param start_time: 开始时间(包含)，单位微秒，为空的时候不限制
+
+        :param end_time: 结束时间(包含)，单位微秒，为空的时候不限制
+
+        :return: 按照接收的顺序排列的帧，结构化数组
+        """
+        frames = self.frames
+        mask = np.ones(len(frames), dtype=bool)
+        if msg_id is not None:
+            mask &= frames["id"] == msg_id
+        if start_time is not None:
+            mask &= frames["timestamp"] >= start_time
+        if end_time is not None:
+            mask &= frames["timestamp"] <= end_time
+        return frames[mask]
+
+    def decode(self,
+               messages: Dict[int, Message],
+               signals: Dict[str, int],
+               start_time: Optional[int] = None,
+               end_time: Optional[int] = None) -> Dict[str, SignalColumns]:
+        """
+        批量解析signal，与columnar.decode_columns的结果一致
+
+        :param messages: 矩阵表中的messages，{msg_id: Message}
+
+        :param signals: 需要解析的signal以及所属的msg id, 如{"signal_name1": 0x152, "signal_name2": 0x153}
+
+        :param start_time: 开始时间(包含)，单位微秒，为空的时候不限制
+
+        :param end_time: 结束时间(包含)，单位微秒，为空的时候不限制
+
+        :return: {signal_name: SignalColumns}
+        """
+        for signal_name, msg_id in signals.items():
+            if msg_id not in messages:
+                raise RuntimeError(f"{hex(msg_id)} is not in messages")
+            if signal_name not in messages[msg_id].signals:
+                raise RuntimeError(f"{signal_name} is not in {hex(msg_id)}")
+        result = dict()
+        selected = dict()
+        for signal_name, msg_id in signals.items():
+            message = messages[msg_id]
+            signal = message.signals[signal_name]
+            if msg_id not in selected:
+                rows = self.select(msg_id, start_time, end_time)
+                selected[msg_id] = rows["timestamp"].astype(np.int64), rows["data"][:, :message.data_length]
+            time_stamps, matrix = selected[msg_id]
+            values = extract_values(matrix, signal.layout)
+            result[signal_name] = SignalColumns(time_stamps, values, to_physical_values(signal, values))
+        return result
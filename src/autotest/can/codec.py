@@ -0,0 +1,325 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        codec
+# @Author:      philosophy
+# @Created:     2024/03/09 - 14:35
+# --------------------------------------------------------
+import json
+import keyword
+import marshal
+import os
+import re
+import sys
+from pprint import pformat
+from decimal import Decimal
+from types import ModuleType, CodeType
+from typing import List, Dict, Any, Optional, Tuple, Union, Set
+
+from ..logger import logger
+from .cache import get_cache_folder, get_content_hash, write_atomic
+
+"""
+根据矩阵表生成每个message专用的编解码函数
+
+每个message生成两个函数，所有的移位、掩码、factor和offset都直接写在代码里面：
+
+    encode_0x152(data, values) -> bytes: 把values（{signal_name: 总线值}）写入到data中，返回新的data
+
+    decode_0x152(data) -> dict: 解析data，返回{signal_name: (总线值, 物理值)}
+
+生成的代码以及编译后的代码按照矩阵表内容的哈希值缓存到磁盘上，下次加载相同的矩阵表的时候直接加载编译后的代码
+"""
+
+# 生成代码的版本，生成规则变化的时候需要修改，使旧的缓存失效
+CODEC_VERSION = "2"
+# 缓存目录中编解码模块文件名的前缀
+CODEC_PREFIX = "autotest_codec_"
+
+# 总线值转换成物理值的参数，(factor, offset, 小数位数)，整数计算的时候小数位数为None
+Conversion = Tuple[Union[int, float], Union[int, float], Optional[int]]
+
+
+def get_function_name(type_: str, msg_id: int) -> str:
+    """
+    获取生成的函数名
+
+    :param type_: encode或者decode
+
+    :param msg_id: msg id
+
+    :return: 函数名，如encode_0x152
+    """
+    return f"{type_}_{hex(msg_id)}"
+
+
+def get_conversion(factor: Union[int, float, str], offset: Union[int, float, str]) -> Conversion:
+    """
+    预先计算总线值转换成物理值的参数
+
+    factor和offset都是整数的时候只使用整数计算，不会丢失精度；
+
+    否则使用float计算，并按照factor和offset的小数位数四舍五入，如factor为0.1的时候总线值3转换成0.3而不是0.30000000000000004
+
+    :param factor: 计算因子
+
+    :param offset: 偏移量
+
+    :return: (factor, offset, 小数位数)
+    """
+    factor = Decimal(str(factor))
+    offset = Decimal(str(offset))
+    if factor == factor.to_integral_value() and offset == offset.to_integral_value():
+        return int(factor), int(offset), None
+    digits = max(-factor.normalize().as_tuple().exponent, -offset.normalize().as_tuple().exponent, 0)
+    return float(factor), float(offset), digits
+
+
+def get_physical_expression(conversion: Conversion, variable: str) -> str:
+    """
+    生成总线值转换成物理值的表达式，与Signal.to_physical_value的计算方式一致
+
+    :param conversion: 参考get_conversion
+
+    :param variable: 总线值的变量名
+
+    :return: 表达式
+    """
+    factor, offset, digits = conversion
+    expression = variable if factor == 1 else f"{variable} * {factor!r}"
+    if offset != 0:
+        expression = f"{expression} + {offset!r}"
+    if digits is not None:
+        expression = f"round({expression}, {digits})"
+    return expression
+
+
+def _get_layout(signal: Dict[str, Any]) -> Tuple[int, int, int, str]:
+    """
+    计算signal在整个payload整数中的最低位、结束byte、掩码以及字节序
+
+    :param signal: signal字典
+
+    :return: (结束byte, 最低位所在的位置(在字节序对应的整数中), 掩码, 字节序)
+    """
+    start_bit = signal["start_bit"]
+    bit_length = signal["signal_size"]
+    mask = (1 << bit_length) - 1
+    if signal["byte_type"]:
+        end_byte = (start_bit + bit_length - 1) // 8 + 1
+        return end_byte, start_bit, mask, "little"
+    else:
+        last_position = start_bit // 8 * 8 + 7 - start_bit % 8 + bit_length - 1
+        end_byte = last_position // 8 + 1
+        return end_byte, last_position, mask, "big"
+
+
+def _generate_message(message: Dict[str, Any]) -> List[str]:
+    """
+    生成一个message的编解码函数
+    """
+    msg_id = message["id"]
+    signals = message["signals"]
+    layouts = [_get_layout(signal) for signal in signals]
+    length = max([layout[0] for layout in layouts] + [0])
+    lines = []
+    # 编码函数, 按照signal的顺序依次写入，和Message.update的顺序保持一致
+    lines.append(f"def {get_function_name('encode', msg_id)}(data, values):")
+    lines.append(f"    if len(data) < {length}:")
+    lines.append(f"        raise ValueError(\"{hex(msg_id)} need {length} bytes data, "
+                 f"but data length is \" + str(len(data)))")
+    lines.append(f"    payload = bytes(data[:{length}])")
+    current_order = None
+    for signal, (end_byte, position, mask, byte_order) in zip(signals, layouts):
+        if byte_order != current_order:
+            if current_order is not None:
+                lines.append(f"    payload = raw.to_bytes({length}, \"{current_order}\")")
+            lines.append(f"    raw = int.from_bytes(payload, \"{byte_order}\")")
+            current_order = byte_order
+        shift = position if byte_order == "little" else length * 8 - 1 - position
+        clear_mask = ((1 << length * 8) - 1) ^ (mask << shift)
+        name = signal["name"]
+        lines.append(f"    value = values[{name!r}]")
+        lines.append(f"    if not 0 <= value <= {mask}:")
+        lines.append(f"        raise ValueError(\"value[\" + str(value) + \"] must in [0, {mask}]\")")
+        lines.append(f"    raw = (raw & {hex(clear_mask)}) | (value << {shift})")
+    if current_order is not None:
+        lines.append(f"    payload = raw.to_bytes({length}, \"{current_order}\")")
+    lines.append(f"    return payload + bytes(data[{length}:])")
+    lines.append("")
+    lines.append("")
+    # 解码函数
+    lines.append(f"def {get_function_name('decode', msg_id)}(data):")
+    lines.append(f"    if len(data) < {length}:")
+    lines.append(f"        raise ValueError(\"{hex(msg_id)} need {length} bytes data, "
+                 f"but data length is \" + str(len(data)))")
+    lines.append(f"    payload = bytes(data[:{length}])")
+    for byte_order in sorted(set(layout[3] for layout in layouts)):
+        lines.append(f"    {byte_order} = int.from_bytes(payload, \"{byte_order}\")")
+    items = []
+    for index, (signal, (end_byte, position, mask, byte_order)) in enumerate(zip(signals, layouts)):
+        shift = position if byte_order == "little" else length * 8 - 1 - position
+        variable = f"v{index}"
+        lines.append(f"    {variable} = ({byte_order} >> {shift}) & {hex(mask)}")
+        physical = get_physical_expression(get_conversion(signal["factor"], signal["offset"]), variable)
+        items.append(f"{signal['name']!r}: ({variable}, {physical})")
+    lines.append("    return {" + ", ".join(items) + "}")
+    lines.append("")
+    lines.append("")
+    return lines
+
+
+def generate_source(messages: List[Dict[str, Any]]) -> str:
+    """
+    根据矩阵表生成编解码函数的源代码
+
+    :param messages: 矩阵表（DbcParser解析出来或者json文件中读取到的message列表）
+
+    :return: 源代码
+    """
+    lines = [f"# generated by autotest.can.codec, version {CODEC_VERSION}, do not edit", "", ""]
+    for message in messages:
+        lines.extend(_generate_message(message))
+    return "\n".join(lines)
+
+
+def _get_identifier(name: str, used: Set[str]) -> str:
+    """
+    把message或者signal的名字转换成不重复的python标识符
+    """
+    identifier = re.sub(r"\W", "_", name)
+    if not identifier or identifier[0].isdigit() or keyword.iskeyword(identifier):
+        identifier = f"_{identifier}"
+    while identifier in used:
+        identifier = f"{identifier}_"
+    used.add(identifier)
+    return identifier
+
+
+def _generate_constants(message: Dict[str, Any], class_name: str) -> List[str]:
+    """
+    生成一个message的常量类，包含msg id、名字、每个signal的名字以及值表
+    """
+    lines = [f"class {class_name}(object):",
+             "    \"\"\"",
+             f"    {message['name']}({hex(message['id'])})",
+             "    \"\"\"",
+             f"    msg_id = {hex(message['id'])}",
+             f"    msg_name = {message['name']!r}"]
+    used = {"msg_id", "msg_name", "VALUES"}
+    values = dict()
+    for signal in message["signals"]:
+        lines.append(f"    {_get_identifier(signal['name'], used)} = {signal['name']!r}")
+        if signal.get("values"):
+            values[signal["name"]] = signal["values"]
+    if values:
+        lines.append("    # signal的值表")
+        lines.append(f"    VALUES = {pformat(values, width=120, sort_dicts=False)}".replace("\n", "\n    "))
+    lines.append("")
+    lines.append("")
+    return lines
+
+
+def generate_module(messages: List[Dict[str, Any]], source: str) -> str:
+    """
+    根据矩阵表生成可以直接导入的python模块的源代码，导入的时候不需要再解析DBC文件
+
+    模块中包含矩阵表messages、每个message的编解码函数以及常量类(IDE可以补全message和signal的名字)，使用方法：
+
+        id_messages, name_messages = get_message(module.messages, codec=module)
+
+    :param messages: 矩阵表
+
+    :param source: 矩阵表的来源，如DBC文件名，写入到模块的注释中
+
+    :return: 源代码
+    """
+    lines = ["# -*- coding:utf-8 -*-",
+             f"# generated by autotest.can.codec from {source}, version {CODEC_VERSION}, do not edit",
+             "\"\"\"",
+             f"{source}生成的矩阵表",
+             "",
+             "使用方法：",
+             "",
+             "    id_messages, name_messages = get_message(module.messages, codec=module)",
+             "\"\"\"",
+             "",
+             f"CODEC_VERSION = {CODEC_VERSION!r}",
+             "",
+             f"messages = {pformat(messages, width=120, sort_dicts=False)}",
+             "",
+             ""]
+    used = {"CODEC_VERSION", "messages"}
+    for message in messages:
+        used.add(get_function_name("encode", message["id"]))
+        used.add(get_function_name("decode", message["id"]))
+    for message in messages:
+        lines.extend(_generate_constants(message, _get_identifier(message["name"], used)))
+    for message in messages:
+        lines.extend(_generate_message(message))
+    return "\n".join(lines)
+
+
+def get_module_name(content_hash: str) -> str:
+    """
+    获取编解码模块的名字，同时也是缓存目录中的文件名(不包含.py)
+
+    :param content_hash: 矩阵表文件内容的哈希值
+
+    :return: 模块名
+    """
+    key = get_content_hash(content_hash.encode("utf-8"), CODEC_VERSION)
+    return f"{CODEC_PREFIX}{key[:16]}"
+
+
+def _load_from_code(module_name: str, file: str, code: CodeType) -> ModuleType:
+    module = ModuleType(module_name)
+    module.__file__ = file
+    exec(code, module.__dict__)
+    return module
+
+
+def _load_from_source(module_name: str, source: str) -> ModuleType:
+    module = ModuleType(module_name)
+    exec(compile(source, module_name, "exec"), module.__dict__)
+    return module
+
+
+def load_codec(messages: List[Dict[str, Any]], content_hash: Optional[str] = None) -> ModuleType:
+    """
+    加载矩阵表的编解码模块，缓存中存在编译好的代码则直接加载，否则生成后写入缓存再加载
+
+    :param messages: 矩阵表
+
+    :param content_hash: 矩阵表文件内容的哈希值，为空的时候根据messages计算
+
+    :return: 编解码模块
+    """
+    if content_hash is None:
+        content = json.dumps(messages, ensure_ascii=False, sort_keys=True, default=str)
+        content_hash = get_content_hash(content.encode("utf-8"))
+    module_name = get_module_name(content_hash)
+    folder = get_cache_folder()
+    if folder:
+        file = os.path.join(folder, f"{module_name}.py")
+        # 编译后的代码只能被相同版本的python加载
+        code_file = os.path.join(folder, f"{module_name}.{sys.implementation.cache_tag}.bin")
+        try:
+            try:
+                with open(code_file, "rb") as f:
+                    return _load_from_code(module_name, file, marshal.loads(f.read()))
+            except FileNotFoundError:
+                pass
+            except (EOFError, ValueError, TypeError) as e:
+                logger.debug(f"load codec from {code_file} failed, error is {e}")
+            logger.debug(f"generate codec file {file}")
+            source = generate_source(messages)
+            # 源代码只用于查看以及异常的时候显示代码行
+            write_atomic(file, source.encode("utf-8"))
+            code = compile(source, file, "exec")
+            write_atomic(code_file, marshal.dumps(code))
+            return _load_from_code(module_name, file, code)
+        except OSError as e:
+            logger.debug(f"load codec from {file} failed, error is {e}")
+    return _load_from_source(module_name, generate_source(messages))
@@ -0,0 +1,150 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        columnar
+# @Author:      philosophy
+# @Created:     2024/03/02 - 10:12
+# --------------------------------------------------------
+from typing import Dict, Iterable, List, NamedTuple, Any
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .message import Message, Signal, Layout
+from .stack import group_frames
+
+"""
+按列批量解析收到的CAN消息
+
+把栈中同一个msg id的所有帧拼成一个(帧数, byte数)的矩阵，然后对每个需要的signal一次性算出所有帧的值，
+
+避免逐帧修改矩阵表中的Message对象以及解析不需要的signal
+
+需要安装numpy
+"""
+
+
+class SignalColumns(NamedTuple):
+    """
+    某个signal在所有帧中的值
+    """
+    # 时间戳
+    time_stamps: Any
+    # 总线值
+    values: Any
+    # 物理值
+    physical_values: Any
+
+
+def is_numpy_available() -> bool:
+    """
+    是否安装了numpy
+    """
+    return np is not None
+
+
+def _check_numpy():
+    if np is None:
+        raise RuntimeError("numpy is not installed, please install numpy first")
+
+
+def get_data_matrix(frames: List[Any], data_length: int) -> Any:
+    """
+    把帧的data拼成(帧数, data_length)的uint8矩阵，长度不足的补0，超出的截断
+
+    :param frames: 帧的集合
+
+    :param data_length: 每帧的长度
+
+    :return: uint8矩阵
+    """
+    _check_numpy()
+    buffer = b"".join(bytes(frame.data[:data_length]).ljust(data_length, b"\x00") for frame in frames)
+    return np.frombuffer(buffer, dtype=np.uint8).reshape(len(frames), data_length)
+
+
+def extract_values(matrix: Any, layout: Layout) -> Any:
+    """
+    根据signal的布局从矩阵中一次性取出所有帧的总线值
+
+    :param matrix: get_data_matrix得到的矩阵
+
+    :param layout: signal的布局，参考get_layout
+
+    :return: uint64数组
+    """
+    _check_numpy()
+    start_byte, end_byte, shift, mask, byte_order = layout
+    if end_byte > matrix.shape[1]:
+        raise ValueError(f"signal need byte[{start_byte} - {end_byte - 1}], but data length is {matrix.shape[1]}")
+    span = matrix[:, start_byte:end_byte].astype(np.uint64)
+    # 统一成小端的顺序，第k个byte的权重为8k，再减去移位
+    if byte_order == "big":
+        span = span[:, ::-1]
+    values = np.zeros(matrix.shape[0], dtype=np.uint64)
+    for index in range(end_byte - start_byte):
+        position = index * 8 - shift
+        if position >= 0:
+            values |= span[:, index] << np.uint64(position)
+        else:
+            values |= span[:, index] >> np.uint64(-position)
+    return values & np.uint64(mask)
+
+
+def to_physical_values(signal: Signal, values: Any) -> Any:
+    """
+    总线值批量转换成物理值，与Signal.to_physical_value的计算方式一致
+
+    :param signal: Signal对象
+
+    :param values: 总线值数组
+
+    :return: 物理值数组，factor和offset都是整数的时候为int64数组，否则为按照小数位数四舍五入的float64数组
+    """
+    _check_numpy()
+    factor, offset, digits = signal.conversion
+    if digits is None:
+        return values.astype(np.int64) * factor + offset
+    return np.round(values.astype(np.float64) * factor + offset, digits)
+
+
+def decode_columns(frames: Iterable[Any],
+                   messages: Dict[int, Message],
+                   signals: Dict[str, int]) -> Dict[str, SignalColumns]:
+    """
+    批量解析帧中的signal
+
+    :param frames: 帧的集合，如get_stack()获取到的栈，只需要有msg_id、data、time_stamp属性
+
+    :param messages: 矩阵表中的messages，{msg_id: Message}
+
+    :param signals: 需要解析的signal以及所属的msg id, 如{"signal_name1": 0x152, "signal_name2": 0x153}
+
+    :return: {signal_name: SignalColumns}
+    """
+    _check_numpy()
+    msg_ids = set(signals.values())
+    for signal_name, msg_id in signals.items():
+        if msg_id not in messages:
+            raise RuntimeError(f"{hex(msg_id)} is not in messages")
+        if signal_name not in messages[msg_id].signals:
+            raise RuntimeError(f"{signal_name} is not in {hex(msg_id)}")
+    # 按msg id分组，get_stack()获取到的栈已经分好组，其他的只遍历一次帧
+    groups = group_frames(frames, msg_ids)
+    result = dict()
+    matrices = dict()
+    for signal_name, msg_id in signals.items():
+        message = messages[msg_id]
+        signal = message.signals[signal_name]
+        filter_frames = groups[msg_id]
+        if msg_id not in matrices:
+            time_stamps = np.fromiter((frame.time_stamp for frame in filter_frames), dtype=np.int64,
+                                      count=len(filter_frames))
+            matrices[msg_id] = time_stamps, get_data_matrix(filter_frames, message.data_length)
+        time_stamps, matrix = matrices[msg_id]
+        values = extract_values(matrix, signal.layout)
+        result[signal_name] = SignalColumns(time_stamps, values, to_physical_values(signal, values))
+    return result
@@ -6,19 +6,32 @@
 # @Author:      philosophy
 # @Created:     2022/02/19 - 22:06
 # --------------------------------------------------------
-import copy
 import json
+import os
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Tuple
 
-from ..logger import logger
+from ..logger import logger, log_switch
+from .codec import generate_module
 
 
 class DbcParser(object):
+    """
+    DBC文件解析
+
+    只读取一次文件并检测一次编码，逐行拼接出完整的语句(多行的注释等)后根据语句开头的关键字分发处理，
+
+    解析过程中维护msg id以及(msg id, signal name)的索引，处理CM_/BA_/VAL_的时候直接查找，不再遍历所有的message
+
+    不需要signal的注释(CM_)、值表(VAL_)或者不支持的属性(BA_)的时候可以在构造的时候跳过，减少解析的时间
+    """
+    # 解析器的版本，解析结果变化的时候需要修改，使缓存的矩阵表失效
+    VERSION = "2"
     # 定义常量
     BLANK = " "
     GBK = "gbk"
     UTF8 = "utf-8"
+    GB18030 = "GB18030"
     TRIM_BLANK = "\\s+"
     Y_AXIS = r"|"
     QUOTATION = "\""
@@ -79,6 +92,47 @@ class DbcParser(object):
     UNSIGNED = "unsigned"
     RIGHT_BRACKETS = ")"
     RIGHT_CENTER_BRACKETS = "]"
+    # 行中包含这些关键字的时候表示一个新的语句开始，否则是上一个语句的延续(如多行的注释)
+    STATEMENT_PATTERN = re.compile("|".join(re.escape(keyword) for keyword in (
+        BO, SG, CM, BA_DEF, BA_DEF_DEF, BA_DEF_DEF_REL, BA_DEF_REL, BA, VAL)))
+    # SG_ HU_LocTiY : 6|5@0+ (1,2019) [2019|2050] "year" TBox,CGW 去掉SG_之后的部分
+    SIGNAL_PATTERN = re.compile(r"([^:]*):\s*([^|]*)\|\s*([^@]*)@\s*(.)(.)\s*.([^)]*)\)\s*.([^\]]*)]\s*.([^\"]*)\"\s*(.*)")
+    # VAL_中的 1 "Balance Closed"
+    VALUE_PATTERN = re.compile(r"([^\"]*)\"([^\"]*)\"")
+    # BA_中支持的属性(大写)
+    ATTRIBUTES = frozenset(name.upper() for name in (
+        GEN_MSG_CYCLE_TIME_FAST, GEN_MSG_NR_OF_REPETITION, GEN_MSG_DELAY_TIME, GEN_MSG_SEND_TYPE, GEN_MSG_CYCLE_TIME,
+        NM_MESSAGE, NM_ASR_MESSAGE, DIAG_STATE, DIAG_REQUEST, DIAG_RESPONSE, V_FRAME_FORMAT, MODE_TRANSMISSION, PERIOD,
+        GEN_SIG_START_VALUE))
+
+    def __init__(self, comments: bool = True, values: bool = True, unknown_attributes: bool = True):
+        """
+        :param comments: 是否解析signal的注释(CM_ SG_)，不解析的时候signal中没有comment
+
+        :param values: 是否解析signal的值表(VAL_)，不解析的时候signal中没有values
+
+        :param unknown_attributes: 是否解析不支持的属性(BA_)，不解析的时候直接跳过，
+            也不会检查属性对应的message和signal是否存在
+        """
+        self.__comments = comments
+        self.__values = values
+        self.__unknown_attributes = unknown_attributes
+        self.__reset()
+
+    def __reset(self):
+        """
+        清除上一次解析的结果
+        """
+        # 解析出来的message
+        self.__messages = []
+        # 当前BO_的signals，SG_添加到这里
+        self.__signals = []
+        # {msg id: message}
+        self.__message_index = dict()
+        # {(msg id, signal name): signal}
+        self.__signal_index = dict()
+        # BA_DEF_中定义的属性
+        self.__attributes = dict()
 
     def parse(self, dbc_file: str, encoding: str = "gbk") -> List[Dict[str, Any]]:
         """
@@ -87,9 +141,8 @@ class DbcParser(object):
         :param dbc_file: DBC文件
         :return: messages
         """
-        contents = self.__read_content(dbc_file, encoding)
-        logger.trace(f"contents = {contents}")
-        messages = self.__parse_message(contents)
+        contents = self.__read_from_file(dbc_file, encoding)
+        messages = self.__parse_statements(self.__get_statements(contents))
         return self.__filter_messages(messages)
 
     def parse_to_file(self, dbc_file: str, json_file: str):
@@ -103,19 +156,26 @@ class DbcParser(object):
         with open(json_file, "w", encoding="utf-8") as f:
             f.write(json_str)
 
+    def parse_to_python(self, dbc_file: str, python_file: str):
+        """
+        解析DBC文件并生成可以直接导入的python模块，包含矩阵表、编解码函数以及message和signal名字的常量类，
+
+        测试的时候直接导入模块，不需要再解析DBC文件，参考codec.generate_module
+        :param dbc_file:  DBC文件
+        :param python_file: 输出的python文件
+        """
+        messages = self.parse(dbc_file)
+        source = generate_module(messages, os.path.basename(dbc_file))
+        with open(python_file, "w", encoding="utf-8") as f:
+            f.write(source)
+
     def __filter_messages(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         去除掉大于0x7ff的数据
         :param messages:
         :return:
         """
-        new_messages = copy.deepcopy(messages)
-        msg_ids = []
-        for i, message in enumerate(new_messages):
-            if message["id"] > 0x7ff:
-                msg_ids.append(i)
-        for msg_id in msg_ids:
-            new_messages.pop(msg_id)
+        new_messages = [message for message in messages if message["id"] <= 0x7ff]
         self.__set_message_default_value(new_messages)
         return new_messages
 
@@ -139,87 +199,108 @@ class DbcParser(object):
         :param replace_type:  取代的文字
         :return: 处理后的字符串
         """
-        return content.replace(replace_type, self.NULL) \
-            .replace(self.TRIM_BLANK, self.BLANK) \
-            .replace(self.SEMICOLON, self.NULL) \
-            .strip()
+        return content.replace(replace_type, self.NULL).replace(self.SEMICOLON, self.NULL).strip()
 
-    def __get_val_content(self, content: str) -> str:
+    def __get_message_by_id(self, message_id: int) -> Dict[str, Any]:
         """
-        处理VAL行数据
-        :param content:  dbc文件中读取到的内容
-        :return: 处理后的字符串
+        根据id获取message字典
         """
-        return content.replace(self.VAL, self.NULL) \
-            .replace(self.TRIM_BLANK, self.BLANK) \
-            .replace(f"{self.BLANK}{self.QUOTATION}{self.BLANK}", f"{self.BLANK}{self.QUOTATION}") \
-            .strip()
+        try:
+            return self.__message_index[message_id]
+        except KeyError:
+            raise RuntimeError(f"no message id[{message_id}] found in messages")
 
-    @staticmethod
-    def __get_message_by_id(messages: List[Dict[str, List[Any]]],
-                            message_id: int) -> Dict[str, List[Any]]:
+    def __get_signal_by_name(self, message_id: int, name: str) -> Dict[str, Any]:
         """
-        根据id获取message字典
+        根据message id和名字获取signal
         """
-        for message in messages:
-            if message["id"] == message_id:
-                return message
-        raise RuntimeError(f"no message id[{message_id}] found in messages")
+        try:
+            return self.__signal_index[(message_id, name)]
+        except KeyError:
+            raise RuntimeError(f"no signal name[{name}] found in signal")
 
-    @staticmethod
-    def __get_signal_by_name(signals: List[Dict[str, Any]], name: str) -> Dict[str, Any]:
+    def __read_from_file(self, dbc_file: str, encoding: str) -> Iterator[str]:
         """
-        根据名字获取signal
-        """
-        for signal in signals:
-            if signal["name"] == name:
-                return signal
-        raise RuntimeError(f"no signal name[{name}] found in signal")
+        读取dbc文件，依次尝试encoding、utf-8以及GB18030解码
 
-    @staticmethod
-    def __read_from_file(dbc_file: str, encoding: str) -> List[str]:
-        try:
-            with open(dbc_file, "r", encoding=encoding) as f:
-                contents = f.readlines()
-                return contents
-        except UnicodeDecodeError:
+        文件只读取一次，解码后逐行返回，不生成行的列表
+        :param dbc_file: dbc文件
+        :param encoding: 编码格式
+        :return: dbc文件中的行
+        """
+        with open(dbc_file, "rb") as f:
+            content = f.read()
+        text = None
+        for item in (encoding, self.UTF8):
             try:
-                with open(dbc_file, "r", encoding="utf-8") as f:
-                    contents = f.readlines()
-                    return contents
+                text = content.decode(item)
+                break
             except UnicodeDecodeError:
-                with open(dbc_file, "r", encoding="GB18030") as f:
-                    contents = f.readlines()
-                    return contents
+                continue
+        if text is None:
+            text = content.decode(self.GB18030)
+        del content
+        # 只有\r换行的文件
+        line_break = "\n" if "\n" in text else "\r"
+        start = 0
+        length = len(text)
+        while start < length:
+            end = text.find(line_break, start)
+            if end < 0:
+                end = length
+            yield text[start:end]
+            start = end + 1
 
-    def __read_content(self, dbc_file: str, encoding: str) -> List[str]:
+    def __get_statements(self, contents: Iterable[str]) -> Iterator[str]:
         """
-        从DBC文件中读取数据并且处理多行的情况
-        :param dbc_file: dbc文件
-        :return: 处理后的数据串列表
+        把DBC文件的行拼接成完整的语句
+
+        包含关键字的行开始一个新的语句，其他的行拼接到上一个语句中，CM_ "注释"之后的行忽略
+        :param contents: dbc文件中的行
+        :return: 语句
         """
-        # 处理后的数据
-        after_handle_contents = []
-        contents = self.__read_from_file(dbc_file, encoding)
-        final_content = ""
+        parts = []
         need_add = True
-        for index, content in enumerate(contents):
+        search = self.STATEMENT_PATTERN.search
+        for content in contents:
             # 去掉空行
             content = content.strip()
-            logger.trace(f"index = {index} and content is {content}")
-            if self.__judge_content(content, self.BO, self.SG, self.CM, self.BA_DEF, self.BA_DEF_DEF,
-                                    self.BA_DEF_DEF_REL, self.BA_DEF_REL, self.BA, self.VAL):
+            if search(content):
                 need_add = True
-                if len(final_content) != 0:
-                    after_handle_contents.append(final_content)
-                    final_content = ""
-                final_content += content
-            elif self.__judge_content(content, self.CM_ONLY_QUOTATION):
+                if parts:
+                    yield self.NULL.join(parts)
+                    parts = []
+                parts.append(content)
+            elif self.CM_ONLY_QUOTATION in content:
                 need_add = False
-            else:
-                if need_add:
-                    final_content += content + self.BLANK
-        return after_handle_contents
+            elif need_add:
+                parts.append(content + self.BLANK)
+        if parts:
+            yield self.NULL.join(parts)
+
+    def __parse_statements(self, statements: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        根据语句开头的关键字分发处理
+        :param statements: 语句
+        :return: messages
+        """
+        self.__reset()
+        handlers = {
+            self.BO: self.__set_message,
+            self.SG: self.__set_signal,
+            self.BA_DEF: self.__set_message_attribute,
+            self.BA_DEF_DEF: self.__set_default_value,
+            self.BA: self.__set_ba_values,
+        }
+        if self.__comments:
+            handlers[self.CM_ONLY] = self.__set_comments
+        if self.__values:
+            handlers[self.VAL] = self.__set_val_values
+        for content in statements:
+            handler = handlers.get(content[:content.find(self.BLANK) + 1])
+            if handler:
+                handler(content)
+        return self.__messages
 
     @staticmethod
     def __set_message_default_value(messages: List[Dict[str, Any]]):
@@ -246,57 +327,7 @@ class DbcParser(object):
             if "nm_message" not in message:
                 message["nm_message"] = False
 
-    def __parse_message(self, contents: List[str]) -> List[Dict[str, Any]]:
-        cm_flag = True
-        attr_dict = dict()
-        messages = []
-        message = dict()
-        signals = []
-        # 上一行是BO，这一行不是BO导致没有把数据传上去
-        for content in contents:
-            # 处理BO行，及Message
-            if content.startswith(self.BO):
-                if len(message) != 0:
-                    if not content.startswith(self.SG):
-                        message["signals"] = signals
-                        messages.append(message)
-                        message = dict()
-                        signals = []
-                    if content.startswith(self.BO):
-                        self.__set_message(message, content)
-                else:
-                    self.__set_message(message, content)
-            # 处理SG行，主要是signal
-            if content.startswith(self.SG):
-                signal = self.__get_signal(content)
-                logger.trace(f"signal = {signal}")
-                signals.append(signal)
-            # 处理CM行
-            if content.startswith(self.CM):
-                # 处理剩下的BO
-                if cm_flag:
-                    message["signals"] = signals
-                    messages.append(message)
-                    signals = []
-                    # message.clear()
-                    cm_flag = False
-                self.__set_comments(messages, content)
-            # 处理BA_DEF行 （BA的定义）
-            if content.startswith(self.BA_DEF):
-                self.__set_message_attribute(attr_dict, content)
-            # 处理BA_DEF_DEF行 （BA的默认值）
-            if content.startswith(self.BA_DEF_DEF):
-                self.__set_default_value(messages, content)
-            # 处理BA行
-            if content.startswith(self.BA):
-                self.__set_ba_values(messages, attr_dict, content)
-            # 处理VAL行
-            if content.startswith(self.VAL):
-                self.__set_val_values(messages, content)
-        logger.trace(f"messages = {messages}")
-        return messages
-
-    def __set_val_values(self, messages: List[Dict[str, Any]], content: str):
+    def __set_val_values(self, content: str):
         """
         /*
          *  处理VAL模块，返回键值对
@@ -304,69 +335,58 @@ class DbcParser(object):
          */
         """
         # 1069 BCU_BalnFlg105_RM 1 "Balance Closed" 0 "Balance Open" ;
-        val = self.__get_val_content(content)
-        val = val.replace(self.SEMICOLON, self.BLANK).strip()
-        blank_index = val.index(self.BLANK)
-        message_id = int(val[:blank_index].strip())
+        val = content.replace(self.VAL, self.NULL) \
+            .replace(f"{self.BLANK}{self.QUOTATION}{self.BLANK}", f"{self.BLANK}{self.QUOTATION}") \
+            .replace(self.SEMICOLON, self.BLANK) \
+            .strip()
+        message_id, other = val.split(self.BLANK, 1)
         # BCU_BalnFlg105_RM 1 "Balance Closed" 0 "Balance Open"
-        other = val[blank_index + 1:]
-        logger.trace(f"parse blank_index other = [{other}]")
-        blank_index = other.index(self.BLANK)
-        signal_name = other[:blank_index]
+        signal_name, other = other.split(self.BLANK, 1)
         # 1 "Balance Closed" 0 "Balance Open"
-        other = other[blank_index + 1:]
-        logger.trace(f"parse blank_index other = [{other}]")
         values = dict()
-        while len(other) > 0:
-            quotation_index = other.index(self.QUOTATION)
-            key = other[:quotation_index].strip()
-            other = other[quotation_index + 1:].strip()
-            quotation_index = other.index(self.QUOTATION)
-            value = other[:quotation_index].strip()
-            other = other[quotation_index + 1:].strip()
-            values[key] = re.sub(self.TRIM_BLANK, self.BLANK, value)
-        message = self.__get_message_by_id(messages, message_id)
-        signal = self.__get_signal_by_name(message["signals"], signal_name)
+        position = 0
+        for match in self.VALUE_PATTERN.finditer(other):
+            key, value = match.groups()
+            values[key.strip()] = re.sub(self.TRIM_BLANK, self.BLANK, value.strip())
+            position = match.end()
+        if other[position:].strip():
+            raise ValueError(f"value table is incorrect in content[{content}]")
+        signal = self.__get_signal_by_name(self.__get_message_by_id(int(message_id))["id"], signal_name)
         signal["values"] = values
 
-    def __set_ba_values(self, messages: List[Dict[str, Any]], attr_dict: Dict[str, Any], content: str):
+    def __set_ba_values(self, content: str):
         """
         /*
          * 处理BA_ "GenMsgDelayTime" BO_ 1069 0;
          *    BA_ "GenSigStartValue" SG_ 994 ESC_ReqTargetExternal 32256;
          */
         """
-        logger.trace(f"attr_dict = {attr_dict}")
-        ba = self.__get_content(content, self.BA)
-        logger.trace(f"ba = {ba}")
-        ba = ba.replace(self.SEMICOLON, self.NULL) \
+        if not self.__unknown_attributes:
+            name = content[len(self.BA):].lstrip().split(self.BLANK, 1)[0].replace(self.QUOTATION, self.NULL)
+            if name.upper() not in self.ATTRIBUTES:
+                return
+        ba = self.__get_content(content, self.BA) \
             .replace(self.QUOTATION, self.NULL) \
             .replace(f"{self.BLANK}{self.BLANK}", self.BLANK) \
             .strip()
         if self.BO in ba:
             split = ba.split(self.BLANK)
-            logger.trace(f"split is {split}")
             name = split[0].strip()
             message_id = int(split[2].strip())
             value = split[3].strip()
-            message = self.__get_message_by_id(messages, message_id)
-            logger.trace(f"msg id = [{message_id}] && message is {message}")
-            self.__handle_bo(message, name, value, attr_dict)
+            message = self.__get_message_by_id(message_id)
+            self.__handle_bo(message, name, value)
         elif self.SG in ba:
             split = ba.split(self.BLANK)
             name = split[0].strip()
             message_id = int(split[2].strip())
             signal_name = split[3].strip()
             value = split[4].strip()
-            message = self.__get_message_by_id(messages, message_id)
-            logger.trace(f"msg id = [{message_id}] && message is {message}")
+            message = self.__get_message_by_id(message_id)
             self.__handle_sg(message, name, signal_name, value)
-        else:
-            logger.trace(f"not standard ba")
 
-    def __handle_bo(self, message: Dict[str, Any], name: str, value: str, attr_dict: Dict[str, str]):
-        logger.trace(f"attr_dict = {attr_dict}")
-        logger.trace(f"type = [{name}] and value = [{value}]")
+    def __handle_bo(self, message: Dict[str, Any], name: str, value: str):
+        attr_dict = self.__attributes
         if name == self.GEN_MSG_CYCLE_TIME_FAST:
             message["msg_cycle_time_fast"] = int(value)
         elif name == self.GEN_MSG_NR_OF_REPETITION:
@@ -403,31 +423,29 @@ class DbcParser(object):
                 message["msg_send_type"] = "CE"
         elif name == self.PERIOD:
             message["msg_cycle_time"] = int(value)
-        else:
+        elif log_switch.debug:
             logger.debug(f"type is {name}, so nothing to do")
 
     def __handle_sg(self, message: Dict[str, Any], name: str, signal_name: str, value: str):
-        signal = self.__get_signal_by_name(message["signals"], signal_name)
+        signal = self.__get_signal_by_name(message["id"], signal_name)
         if name.upper() == self.GEN_SIG_START_VALUE.upper():
-            logger.trace(f"value is {value}")
             if self.POINT in value:
                 signal["start_value"] = float(value)
             else:
                 signal["start_value"] = int(value)
 
-    def __set_default_value(self, messages: List[Dict[str, Any]], content: str):
+    def __set_default_value(self, content: str):
         """
         /*
          *  BA_DEF_DEF_  "GatewayedSignals" "No";
          */
         """
+        messages = self.__messages
         ba_def_def = self.__get_content(content, self.BA_DEF_DEF)
-        logger.trace(f"ba_def_def  = {ba_def_def}")
         split = ba_def_def.split(self.BLANK)
         if len(split) == 2:
             name = split[0].replace(self.QUOTATION, self.NULL)
             value = split[1].replace(self.QUOTATION, self.NULL)
-            logger.trace(f"name = [{name}] and value = [{value}]")
             if name == self.GEN_MSG_CYCLE_TIME_FAST:
                 for message in messages:
                     message["msg_cycle_time_fast"] = int(value)
@@ -467,10 +485,8 @@ class DbcParser(object):
                     if len(signals) != 0:
                         for signal in signals:
                             signal["start_value"] = int(value)
-            else:
-                logger.trace(f"ba default type is [{name}], so nothing to do")
 
-    def __set_message_attribute(self, attr_dict: Dict[str, Any], content: str):
+    def __set_message_attribute(self, content: str):
         """
         /*
          *  解析BA_DEF_ SG_  "GenSigInactiveValue" INT 0 10000;
@@ -478,45 +494,33 @@ class DbcParser(object):
         """
         # BO_  "DiagResponse" ENUM  "No","Yes";
         ba_def = self.__get_content(content, self.BA_DEF)
-        logger.trace(f"ba def  = {ba_def}")
-        if not self.__judge_content(ba_def, self.BU, self.BO, self.EV, self.SG):
-            logger.trace(f"no {self.BU}，{self.BO}，{self.EV}，{self.SG} found in content[{content}]")
-            # "Manufactor" STRING ;
-            logger.trace("暂时不处理这类数据")
-        else:
+        # "Manufactor" STRING ; 这类数据暂时不处理
+        if self.__judge_content(ba_def, self.BU, self.BO, self.EV, self.SG):
             blank_index = ba_def.index(self.BLANK)
-            node_type = ba_def[:blank_index]
-            logger.trace(f"node_type is {node_type}")
             # "DiagResponse" ENUM  "No","Yes";
             other = ba_def[blank_index + 1:] \
                 .strip() \
-                .replace(self.QUOTATION, self.NULL) \
-                .replace(self.SEMICOLON, self.NULL)
-            logger.trace(f"parse blank_index other = [{other}]")
+                .replace(self.QUOTATION, self.NULL)
             # TpApplType STRING
             blank_index = other.index(self.BLANK)
             name = other[:blank_index].strip()
             # ENUM  "No","Yes";
             other = other[blank_index + 1:]
-            logger.trace(f"parse blank_index other = [{other}]")
             if self.BLANK in other:
                 blank_index = other.index(self.BLANK)
                 attr_type = other[:blank_index].strip()
-                logger.trace(f"attr_type = {attr_type}")
                 # "No","Yes";
                 other = other[blank_index + 1:].strip()
                 if attr_type.upper() == self.INT.upper() \
                         or attr_type.upper() == self.HEX.upper():
-                    logger.trace(f"attr_dict[{name}] = {other}")
-                    attr_dict[name] = other
+                    self.__attributes[name] = other
                 elif attr_type.upper() == self.ENUM:
-                    attr_dict[name] = other.split(self.COMMA)
-                    logger.trace(f"ENUM attr_dict[{name}] = {other}")
+                    self.__attributes[name] = other.split(self.COMMA)
 
-    def __set_comments(self, messages: List[Dict[str, Any]], content: str):
+    def __set_comments(self, content: str):
         """
         /*
-         *  处理CM模块的，返回键值对
+         *  处理CM模块的，返回键值对，只处理signal的注释
          *  CM_ SG_ 643 HU_SeatVertAdjMotTarPosn "Seat Vertical Adjust Motor Target Position 座椅垂直调节电机目标位置";
          *  解析案例
          *  comment = 'CM_' (char_string |
@@ -527,62 +531,49 @@ class DbcParser(object):
          *  ';' ;
          */
         """
-        logger.trace(f"cm content = {content}")
-        if not self.__judge_content(content, self.BU, self.BO, self.EV, self.SG):
-            raise ValueError(f"not {self.BU}, {self.BO}, {self.EV}, {self.SG} found in content[{content}]")
+        if not content.startswith(self.CM):
+            return
         cm = self.__get_content(content, self.CM_ONLY)
-        logger.trace(f"cm = {cm}")
-        if self.SG in cm:
-            cm = cm.replace(self.SG, self.BLANK).strip()
-            # SG_ 643 HU_SeatVertAdjMotTarPosn "Seat Vertical Adjust Motor Target Position 座椅垂直调节电机目标位置";
-            blank_index = cm.index(self.BLANK)
-            message_id = int(cm[:blank_index])
-            # HU_SeatVertAdjMotTarPosn "Seat Vertical Adjust Motor Target Position 座椅垂直调节电机目标位置";
-            other = cm[blank_index + 1:].strip()
-            logger.trace(f"parse blank_index other = [{other}]")
-            blank_index = other.index(self.BLANK)
-            signal_name = other[:blank_index]
-            other = other[blank_index + 1:].strip()
-            logger.trace(f"parse blank_index other = [{other}]")
-            # "Seat Vertical Adjust Motor Target Position 座椅垂直调节电机目标位置";
-            comment = other.replace(self.QUOTATION, self.BLANK).replace(self.SEMICOLON, self.BLANK)
-            message = self.__get_message_by_id(messages, message_id)
-            signal = self.__get_signal_by_name(message["signals"], signal_name)
-            signal["comment"] = re.sub(self.TRIM_BLANK, self.BLANK, comment).strip()
+        cm = cm.replace(self.SG, self.BLANK).strip()
+        # 643 HU_SeatVertAdjMotTarPosn "Seat Vertical Adjust Motor Target Position 座椅垂直调节电机目标位置";
+        message_id, other = cm.split(self.BLANK, 1)
+        # HU_SeatVertAdjMotTarPosn "Seat Vertical Adjust Motor Target Position 座椅垂直调节电机目标位置";
+        signal_name, other = other.strip().split(self.BLANK, 1)
+        # "Seat Vertical Adjust Motor Target Position 座椅垂直调节电机目标位置";
+        comment = other.strip().replace(self.QUOTATION, self.BLANK).replace(self.SEMICOLON, self.BLANK)
+        message = self.__get_message_by_id(int(message_id))
+        signal = self.__get_signal_by_name(message["id"], signal_name)
+        signal["comment"] = re.sub(self.TRIM_BLANK, self.BLANK, comment).strip()
 
-    def __set_message(self, message: Dict[str, Any], content: str):
+    def __set_message(self, content: str):
         """
         /*
          * 处理BO模块的，返回键值对
          * BO_ 883 GW_373: 8 Vector__XXX
          * 解析案例
          * BO_ message_id message_name ':' message_size transmitter {signal} ;
-         * 以及SG_ BCM_PMSErrorFlag : 13|2@0+ (1,0) [0|3] ""  HU
          */
         """
         bo = self.__get_content(content, self.BO)
-        logger.trace(f"bo = {bo}")
         # 883 GW_373: 8 Vector__XXX
-        blank_index = bo.index(self.BLANK)
-        message_id = bo[:blank_index].strip()
-        message["id"] = int(message_id)
+        message_id, other = bo.split(self.BLANK, 1)
         # GW_373: 8 Vector__XXX
-        other = bo[blank_index + 1:]
-        logger.trace(f"parse blank_index other = [{other}]")
-        colon_index = other.index(self.COLON)
-        name = other[:colon_index].strip()
-        message["name"] = name
+        name, other = other.split(self.COLON, 1)
         # 8 Vector__XXX
-        other = other[colon_index + 1:].strip()
-        logger.trace(f"parse colon_index other = [{other}]")
-        rest = other.split(self.BLANK)
-        length = rest[0].strip()
-        sender = rest[1].strip()
-        message["length"] = int(length)
-        message["sender"] = sender
-        logger.trace(f"message = {message}")
+        rest = other.strip().split(self.BLANK)
+        message = {
+            "id": int(message_id),
+            "name": name.strip(),
+            "length": int(rest[0]),
+            "sender": rest[1].strip(),
+            "signals": []
+        }
+        self.__messages.append(message)
+        # id重复的时候以第一个为准
+        self.__message_index.setdefault(message["id"], message)
+        self.__signals = message["signals"]
 
-    def __get_signal(self, content: str) -> Dict[str, Any]:
+    def __set_signal(self, content: str):
         """
         /*
          *  处理SG模块，返回键值对
@@ -598,61 +589,26 @@ class DbcParser(object):
          *  大端模式表示反向，小端模式表示顺向
          */
         """
-        signal = dict()
-        logger.trace(f"content = {content}")
         sg = self.__get_content(content, self.SG)
-        logger.trace(f"sg = {sg}")
-        #  分割第一个:
-        colon_index = sg.index(self.COLON)
-        logger.trace(f"colon_index position is {colon_index}")
-        name = sg[:colon_index].strip()
-        logger.trace(f"name = [{name}]")
-        # 加参数到对象中
-        signal["name"] = name
-        # 6|5@0+ (1,2019) [2019|2050] "year" TBox,CGW
-        other = sg[colon_index + 1:].strip()
-        logger.trace(f"parse colon_index other = [{other}]")
-        y_axis_index = other.index(self.Y_AXIS)
-        start_bit = other[:y_axis_index].strip()
-        signal["start_bit"] = int(start_bit)
-        # 5@0+ (1,2019) [2019|2050] "year" TBox,CGW
-        other = other[y_axis_index + 1:].strip()
-        logger.trace(f"parse y_axis_index other = [{other}]")
-        at_index = other.index(self.AT)
-        bit_size = other[:at_index]
-        signal["signal_size"] = int(bit_size)
-        # 0+ (1,2019) [2019|2050] "year" TBox,CGW
-        other = other[at_index + 1:].strip()
-        logger.trace(f"parse at_index other = [{other}]")
-        byte_order = other[0]
-        value_type = other[1]
-        signal["byte_type"] = True if byte_order == self.ONE else False
-        signal["is_sign"] = True if value_type == self.PLUS else False
-        # (1,2019) [2019|2050] "year" TBox,CGW
-        other = other[2:].strip()
-        logger.trace(f"parse other = [{other}]")
-        right_brackets_index = other.index(self.RIGHT_BRACKETS)
-        factor_offset = other[1:right_brackets_index].split(self.COMMA)
-        factor = factor_offset[0].strip()
-        offset = factor_offset[1].strip()
-        signal["factor"] = float(factor)
-        signal["offset"] = float(offset)
-        # [2019|2050] "year" TBox,CGW
-        other = other[right_brackets_index + 1:].strip()
-        logger.trace(f"parse right_brackets_index other = [{other}]")
-        right_center_brackets_index = other.index(self.RIGHT_CENTER_BRACKETS)
-        max_min = other[1:right_center_brackets_index].split(self.Y_AXIS)
-        minimum = max_min[0].strip()
-        maximum = max_min[1].strip()
-        signal["minimum"] = float(minimum)
-        signal["maximum"] = float(maximum)
-        # "year" TBox,CGW
-        other = other[right_center_brackets_index + 1:].strip()[1:]
-        logger.trace(f"parse right_center_brackets_index other = [{other}]")
-        quotation_index = other.index(self.QUOTATION)
-        unit = other[:quotation_index]
-        signal["unit"] = unit
-        other = other[quotation_index + 1:].strip()
-        receivers = other.split(self.COMMA)
-        signal["receiver"] = ",".join(receivers)
-        return signal
+        match = self.SIGNAL_PATTERN.match(sg)
+        if match is None:
+            raise ValueError(f"signal is incorrect in content[{content}]")
+        name, start_bit, bit_size, byte_order, value_type, factor_offset, min_max, unit, receiver = match.groups()
+        factor_offset = factor_offset.split(self.COMMA)
+        min_max = min_max.split(self.Y_AXIS)
+        signal = {
+            "name": name.strip(),
+            "start_bit": int(start_bit),
+            "signal_size": int(bit_size),
+            "byte_type": True if byte_order == self.ONE else False,
+            "is_sign": True if value_type == self.PLUS else False,
+            "factor": float(factor_offset[0]),
+            "offset": float(factor_offset[1]),
+            "minimum": float(min_max[0]),
+            "maximum": float(min_max[1]),
+            "unit": unit,
+            "receiver": receiver
+        }
+        self.__signals.append(signal)
+        if self.__messages and self.__message_index[self.__messages[-1]["id"]] is self.__messages[-1]:
+            self.__signal_index.setdefault((self.__messages[-1]["id"], signal["name"]), signal)
@@ -6,124 +6,120 @@
 # @Author:      philosophy
 # @Created:     2022/02/19 - 22:15
 # --------------------------------------------------------
-from typing import Union, List, Tuple, Dict
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from types import ModuleType
+from typing import Union, List, Tuple, Dict, Optional, Sequence
 
-from ..logger import logger
+from ..logger import logger, log_switch
 from .dbc_parser import DbcParser
-from ..utils import get_json_obj
+from .cache import get_file_hash, read_cache, write_cache, remove_cache
+from .codec import load_codec, get_function_name, get_conversion, get_module_name, CODEC_PREFIX, CODEC_VERSION
+from ..utils.utils import get_json_obj
 
 Number = Union[int, float]
 Values = Dict[str, str]
 SignalType = Dict[str, Union[str, int, float, bool, Values]]
 MessageType = Dict[str, Union[str, int, float, bool, List[SignalType]]]
 Messages = List[MessageType]
+# get_message的返回值，(id_messages, name_messages)
+Matrix = Tuple[Dict[int, "Message"], Dict[str, "Message"]]
 
 """
 工具类，单独给CAN Service中的Parser使用，基本上不对外使用
 
 该类的作用是根据start_bit和bit_length等值计算出来8byte的值或者反向计算。
 
-如需要可以将该类变成私有类
+计算方式为预先算出signal在data中所占据的byte范围、移位以及掩码，然后通过int.from_bytes/to_bytes整体读写
 """
 
-# 位长度
-_bit_length = 8
+# signal在data中的布局，(起始byte, 结束byte(不包含), 移位, 掩码, 字节序)
+Layout = Tuple[int, int, int, int, str]
+# message的快照，(data, ((signal_name, 总线值), ...))
+Snapshot = Tuple[Tuple[int, ...], Tuple[Tuple[str, int], ...]]
+# 缓存目录中矩阵表文件名的前缀
+MATRIX_PREFIX = "autotest_matrix_"
+# 缓存的矩阵表的格式版本，缓存的内容变化的时候需要修改
+MATRIX_VERSION = "1"
 
 
-def __completion_byte(byte_value: str, size: int = 8) -> str:
+def check_value(value: Number, min_: Number, max_: Number) -> bool:
     """
-    如果不足size位，补齐size位
+    校验value是否处于min和max之间[min, max]
+
+    :param value: 要校验的值
+
+    :param min_: 最小值
+
+    :param max_: 最大值
+
     :return:
+        True: 正确
+        False: 错误
     """
-    # 补齐8位
-    while len(byte_value) != size:
-        byte_value = "0" + byte_value
-    return byte_value
+    return min_ <= value <= max_
 
 
-def __get_position(start_bit: int, byte_length: int = 8) -> Tuple[int, int]:
+def get_layout(start_bit: int, byte_type: bool, bit_length: int) -> Layout:
     """
-    获取start_bit在整个8Byte中占据的位置以及在1 Byte中的位置
+    根据start_bit和bit_length计算signal在data中的布局
 
-    :param start_bit: 起始点
+    :param start_bit: 起始位
 
-    :return: 8 Byte中占据的位置，1 Byte中占据的位置
-    """
-    # 根据start_bit以及bin_value_length计算占据的byte有几个
-    # 计算start_bit是在第几个byte中，以及在byte中占据第几个bit
-    # 获取开始点在整个8byte数据的位置
-    logger.trace(f"start_bit = [{start_bit}] && byte_length = [{byte_length}]")
-    byte_index = -1
-    for i in range(byte_length):
-        if _bit_length * i <= start_bit <= _bit_length * i + 7:
-            byte_index = i
-            break
-    # 获取在单独这个byte中所占据的位置
-    bit_index = 7 - (start_bit - (start_bit // 8 * 8))
-    logger.trace(f"byte_index = [{byte_index}] && bit_index = [{bit_index}]")
-    return byte_index, bit_index
-
-
-def __split_bytes(value: str, length: int, bit_index: int, byte_type: bool) -> List[str]:
-    """
-    根据bit_index和length来算value拆分成几个byte
-    :param value:  要设置的值
-    :param length: 长度
-    :param bit_index: start_bit在一个byte中的位置
-    :return: byte集合
+    :param byte_type:  True表示Intel， False表示Motorola MSB模式
+
+    :param bit_length: signal 长度
+
+    :return: (起始byte, 结束byte(不包含), 移位, 掩码, 字节序)
     """
-    logger.trace(f"length is {length}, bit_index = {bit_index}")
-    values = []
+    start_byte = start_bit // 8
+    mask = (1 << bit_length) - 1
     if byte_type:
-        if length > bit_index + 1:
-            values.append(value[-bit_index - 1:])
-            # 把剩下的拿出来
-            value = value[:-bit_index - 1]
-            logger.trace(f"rest value is [{value}]")
-            while len(value) > _bit_length:
-                # 当剩余数据长度大于8表示还有一个byte， 先把数据加入列表中
-                values.append(value[-_bit_length:])
-                # 然后截取剩余的部分
-                value = value[:-_bit_length]
-            # 最后把剩余的部分加到列表中
-            values.append(value)
-        else:
-            # 只有一个byte
-            values.append(value)
+        # Intel模式start_bit为最低位，按小端方式把占据的byte拼成整数
+        end_byte = (start_bit + bit_length - 1) // 8 + 1
+        return start_byte, end_byte, start_bit % 8, mask, "little"
     else:
-        if length > (_bit_length - bit_index):
-            values.append(value[:_bit_length - bit_index])
-            # 把剩下的拿出来
-            value = value[_bit_length - bit_index:]
-            logger.trace(f"rest value is [{value}]")
-            while len(value) > _bit_length:
-                # 当剩余数据长度大于8表示还有一个byte， 先把数据加入列表中
-                values.append(value[:_bit_length])
-                # 然后截取剩余的部分
-                value = value[_bit_length:]
-            # 最后把剩余的部分加到列表中
-            values.append(value)
-        else:
-            # 只有一个byte
-            values.append(value)
-    return values
+        # Motorola MSB模式start_bit为最高位，按大端方式把占据的byte拼成整数，last_position为最低位在大端位序中的位置
+        last_position = start_byte * 8 + 7 - start_bit % 8 + bit_length - 1
+        end_byte = last_position // 8 + 1
+        return start_byte, end_byte, end_byte * 8 - 1 - last_position, mask, "big"
 
 
-def check_value(value: Number, min_: Number, max_: Number) -> bool:
+def encode_data(data: List[int], layout: Layout, value: int):
     """
-    校验value是否处于min和max之间[min, max]
+    根据signal的布局把value写入到data中
 
-    :param value: 要校验的值
+    :param data: 总线数据
 
-    :param min_: 最小值
+    :param layout: signal的布局，参考get_layout
 
-    :param max_: 最大值
+    :param value: signal总线值
+    """
+    start_byte, end_byte, shift, mask, byte_order = layout
+    if not 0 <= value <= mask:
+        raise ValueError(f"value[{value}] must in [0, {mask}]")
+    if end_byte > len(data):
+        raise ValueError(f"signal need byte[{start_byte} - {end_byte - 1}], but data length is {len(data)}")
+    raw = int.from_bytes(bytes(data[start_byte:end_byte]), byte_order)
+    raw = (raw & ~(mask << shift)) | (value << shift)
+    data[start_byte:end_byte] = raw.to_bytes(end_byte - start_byte, byte_order)
 
-    :return:
-        True: 正确
-        False: 错误
+
+def decode_data(data: List[int], layout: Layout) -> int:
     """
-    return min_ <= value <= max_
+    根据signal的布局从data中读取值
+
+    :param data: 总线数据
+
+    :param layout: signal的布局，参考get_layout
+
+    :return 查询到的值
+    """
+    start_byte, end_byte, shift, mask, byte_order = layout
+    if end_byte > len(data):
+        raise ValueError(f"signal need byte[{start_byte} - {end_byte - 1}], but data length is {len(data)}")
+    return (int.from_bytes(bytes(data[start_byte:end_byte]), byte_order) >> shift) & mask
 
 
 def set_data(data: List[int], start_bit: int, byte_type: bool, value: int, bit_length: int, byte_length: int = 8):
@@ -144,50 +140,9 @@ def set_data(data: List[int], start_bit: int, byte_type: bool, value: int, bit_l
 
     :param byte_length: 字段长度，默认值为8，CAN FD可调整
     """
-    logger.trace(f"data = {list(map(lambda x: hex(x), data))}), start_bit = [{start_bit}], "
-                 f"byte_type = [{byte_type}], value = [{value}], bit_length = [{bit_length}]")
-    byte_index, bit_index = __get_position(start_bit, byte_length)
-    # True表示Intel， False表示Motorola MSB模式, DBC解析出来只支持MSB模式, 不支持LSB模式，
-    # 对于LSB来说，在变成DBC的时候就处理了start bit
-    # 根据位数来算， 其中把value转换成了二进制的字符串
-    bin_value = __completion_byte(bin(value)[2:], bit_length)
-    logger.trace(f"bin_value = {bin_value}")
-    # 计算占据几个byte
-    holder_bytes = __split_bytes(bin_value, bit_length, bit_index, byte_type)
-    logger.trace(f"holder_bytes = {holder_bytes}")
-    for index, byte in enumerate(holder_bytes):
-        actual_index = byte_index + index
-        logger.trace(f"actual index = {actual_index}")
-        byte_value = __completion_byte(bin(data[actual_index])[2:])
-        logger.trace(f"the [{byte_index}] value is [{byte_value}]")
-        length = len(byte)
-        logger.trace(f"byte  = {byte}")
-        # 填充第一位
-        if index == 0:
-            if byte_type:
-                logger.trace(f"intel mode")
-                byte_value = byte_value[:bit_index + 1 - length] + byte + byte_value[bit_index + 1:]
-            else:
-                logger.trace("motorola mode")
-                byte_value = byte_value[:bit_index] + byte + byte_value[bit_index + length:]
-            logger.trace(f"first byte value = {byte_value}")
-        # 填充最后一位
-        elif index == len(holder_bytes) - 1:
-            if byte_type:
-                logger.trace(f"intel mode")
-                byte_value = byte_value[:_bit_length - length] + byte
-            else:
-                logger.trace("motorola mode")
-                byte_value = byte + byte_value[length:]
-            logger.trace(f"last byte value = {byte_value}")
-        # 填充中间的数据
-        else:
-            byte_value = byte
-        logger.trace(f"after handle byte_value = {byte_value}")
-        logger.trace(f"set {actual_index} data {bin(data[actual_index])[2:]} to {byte_value}")
-        # 把计算后的值设置会data中去, 此处注意字符串要转成2进制
-        data[actual_index] = int(byte_value, 2)
-    logger.trace(f"parser data is = {list(map(lambda x: hex(x), data))}")
+    if not check_value(start_bit, 0, byte_length * 8 - 1):
+        raise ValueError(f"start bit[{start_bit}] must in [0, {byte_length * 8 - 1}]")
+    encode_data(data, get_layout(start_bit, byte_type, bit_length), value)
 
 
 def get_data(data: List[int], start_bit: int, byte_type: bool, bit_length: int, byte_length: int = 8) -> int:
@@ -208,97 +163,219 @@ def get_data(data: List[int], start_bit: int, byte_type: bool, bit_length: int,
 
     :return 查询到的值
     """
-    logger.trace(f"data = {list(map(lambda x: hex(x), data))}), start_bit = [{start_bit}], "
-                 f"byte_type = [{byte_type}], bit_length = [{bit_length}]")
-    byte_index, bit_index = __get_position(start_bit, byte_length)
-    byte_value = __completion_byte(bin(data[byte_index])[2:])
-    logger.trace(f"the [{byte_index}] value is [{byte_value}]")
-    if byte_type:
-        logger.trace(f"intel mode")
-        if bit_length > bit_index + 1:
-            signal_value = byte_value[:bit_index + 1]
-            logger.trace(f"intel first signal_value = {signal_value}")
-            rest_length = bit_length - bit_index - 1
-            logger.trace(f"intel rest length = {rest_length}")
-            while rest_length > _bit_length:
-                byte_index += 1
-                byte_value = __completion_byte(bin(data[byte_index])[2:])
-                logger.trace(f"the [{byte_index}] value is [{byte_value}]")
-                signal_value = byte_value[:_bit_length] + signal_value
-                logger.trace(f"intel middle signal_value = {signal_value}")
-                rest_length = rest_length - _bit_length
-            # 最后一个value
-            byte_index += 1
-            byte_value = __completion_byte(bin(data[byte_index])[2:])
-            logger.trace(f"the [{byte_index}] value is [{byte_value}]")
-            logger.trace(f"rest_length = {rest_length}")
-            signal_value = byte_value[-rest_length:] + signal_value
-            logger.trace(f"intel last signal_value = {signal_value}")
-        else:
-            signal_value = byte_value[bit_index + 1 - bit_length:bit_index + 1]
-            logger.trace(f"only one byte value = {signal_value}")
+    if not check_value(start_bit, 0, byte_length * 8 - 1):
+        raise ValueError(f"start bit[{start_bit}] must in [0, {byte_length * 8 - 1}]")
+    return decode_data(data, get_layout(start_bit, byte_type, bit_length))
+
+
+def get_matrix_hash(file: str, encoding: str = "utf-8") -> str:
+    """
+    获取矩阵表文件的哈希值，由文件内容、解析器的版本以及编码格式共同决定
+
+    :param file: json或者dbc文件
+
+    :param encoding: 编码格式，dbc文件固定使用gbk解析
+
+    :return: 哈希值
+    """
+    if file.endswith(".json"):
+        return get_file_hash(file, MATRIX_VERSION, encoding)
+    elif file.endswith(".dbc"):
+        return get_file_hash(file, MATRIX_VERSION, DbcParser.VERSION, "gbk")
     else:
-        logger.trace(f"motorola mode")
-        if bit_length > (_bit_length - bit_index):
-            signal_value = byte_value[bit_index:]
-            logger.trace(f"motorola first signal_value = {signal_value}")
-            rest_length = bit_length - (_bit_length - bit_index)
-            logger.trace(f"rest length = {rest_length}")
-            while rest_length > _bit_length:
-                byte_index += 1
-                byte_value = __completion_byte(bin(data[byte_index])[2:])
-                logger.trace(f"the [{byte_index}] value is [{byte_value}]")
-                signal_value = signal_value + byte_value[:_bit_length]
-                logger.trace(f"motorola middle signal_value = {signal_value}")
-                rest_length = rest_length - _bit_length
-            # 最后一个value
-            byte_index += 1
-            byte_value = __completion_byte(bin(data[byte_index])[2:])
-            logger.trace(f"the [{byte_index}] value is [{byte_value}]")
-            logger.trace(f"rest_length = {rest_length}")
-            signal_value = signal_value + byte_value[:rest_length]
-            logger.trace(f"motorola last signal_value = {signal_value}")
-        else:
-            signal_value = byte_value[bit_index:bit_index + bit_length]
-    # 字符串转换成数字
-    return int(signal_value, 2)
+        raise RuntimeError("messages only support json or dbc file")
 
 
-def get_message(messages: Union[str, Messages], encoding: str = "utf-8") -> Tuple[Dict, Dict]:
+def _get_cache_name(content_hash: str) -> str:
+    return f"{MATRIX_PREFIX}{content_hash[:32]}.pickle"
+
+
+def load_messages(file: str, encoding: str = "utf-8", use_cache: bool = True) -> Tuple[Messages, str]:
     """
-    从Json或者python文件中获取id和name的message字典
+    从json或者dbc文件中读取矩阵表
 
-    :param messages: json文件所在位置或者dbc转换出的python文件中的messages
+    缓存目录中存在相同哈希值的矩阵表的时候直接读取，不再解析，否则解析后写入缓存
+
+    :param file: json或者dbc文件
 
     :param encoding: 编码格式，默认utf-8
 
-    :return: （id_messages, name_messages）
+    :param use_cache: 是否使用缓存
 
-        id_message是以id开头的字典类型，如{0x150: Message1, 0x151: Message2}, 其中Message1参考Message对象；
+    :return: (矩阵表, 文件的哈希值)
+    """
+    content_hash = get_matrix_hash(file, encoding)
+    cache_name = _get_cache_name(content_hash)
+    if use_cache:
+        messages = read_cache(cache_name)
+        if messages is not None:
+            if log_switch.debug:
+                logger.debug(f"load messages of {file} from cache {cache_name}")
+            return messages, content_hash
+    if file.endswith(".json"):
+        messages = get_json_obj(file, encoding=encoding)
+    else:
+        dbc_parser = DbcParser()
+        messages = dbc_parser.parse(file, encoding="gbk")
+    if use_cache:
+        write_cache(cache_name, messages)
+    return messages, content_hash
 
-        name_message是以name开头的字典类型，如{"name1": Message1, "name2": Message2}, 其中Message1参考Message对象;
 
+def clear_matrix_cache(file: Optional[str] = None, encoding: str = "utf-8") -> int:
+    """
+    清除矩阵表以及编解码模块的缓存
+
+    文件内容、解析器版本变化的时候缓存会自动失效，一般不需要手动清除
+
+    :param file: json或者dbc文件，为空的时候清除所有的缓存
+
+    :param encoding: 编码格式，默认utf-8
+
+    :return: 删除的缓存文件数量
     """
+    if file is None:
+        return remove_cache(MATRIX_PREFIX) + remove_cache(CODEC_PREFIX)
+    content_hash = get_matrix_hash(file, encoding)
+    return remove_cache(_get_cache_name(content_hash)) + remove_cache(get_module_name(content_hash))
+
+
+def create_message(msg: MessageType, codec: ModuleType) -> "Message":
+    """
+    根据矩阵表中的message字典创建Message对象
+
+    :param msg: message字典
+
+    :param codec: load_codec加载的编解码模块
+
+    :return: Message对象
+    """
+    message = Message()
+    message.set_value(msg)
+    message.encoder = getattr(codec, get_function_name("encode", message.msg_id))
+    message.decoder = getattr(codec, get_function_name("decode", message.msg_id))
+    return message
+
+
+def _get_matrix(messages: Messages, content_hash: Optional[str] = None,
+                 codec: Optional[ModuleType] = None) -> Matrix:
     id_messages = dict()
     name_messages = dict()
-    if isinstance(messages, str):
-        message_name = messages
-        if message_name.endswith(".json"):
-            messages = get_json_obj(message_name, encoding=encoding)
-        elif message_name.endswith(".dbc"):
-            dbc_parser = DbcParser()
-            messages = dbc_parser.parse(message_name, encoding="gbk")
-        else:
-            raise RuntimeError("messages only support json or dbc file")
+    if codec is None:
+        # 生成（或从缓存加载）每个message专用的编解码函数
+        codec = load_codec(messages, content_hash)
+    elif getattr(codec, "CODEC_VERSION", None) != CODEC_VERSION:
+        raise RuntimeError(f"codec version of {codec.__name__} is not {CODEC_VERSION}, please generate it again")
     for msg in messages:
-        message = Message()
-        message.set_value(msg)
+        message = create_message(msg, codec)
         id_messages[message.msg_id] = message
         name_messages[message.msg_name] = message
     logger.trace(f"total read message is {len(id_messages)}")
     return id_messages, name_messages
 
 
+def get_message(messages: Union[str, Messages, Matrix], encoding: str = "utf-8",
+                use_cache: bool = True, content_hash: Optional[str] = None,
+                codec: Optional[ModuleType] = None) -> Matrix:
+    """
+    从Json或者python文件中获取id和name的message字典
+
+    :param messages: json文件所在位置或者dbc转换出的python文件(参考DbcParser.parse_to_python)中的messages，
+
+        也可以是load_matrices加载好的矩阵表
+
+    :param encoding: 编码格式，默认utf-8
+
+    :param use_cache: 是否使用矩阵表的缓存，参考load_messages
+
+    :param content_hash: messages为矩阵表的时候，load_messages返回的哈希值，为空的时候根据矩阵表计算
+
+    :param codec: 编解码模块，如dbc转换出的python模块，为空的时候根据矩阵表生成
+
+    :return: （id_messages, name_messages）
+
+        id_message是以id开头的字典类型，如{0x150: Message1, 0x151: Message2}, 其中Message1参考Message对象；
+
+        name_message是以name开头的字典类型，如{"name1": Message1, "name2": Message2}, 其中Message1参考Message对象;
+
+    """
+    if isinstance(messages, tuple):
+        return messages
+    if isinstance(messages, str):
+        messages, content_hash = load_messages(messages, encoding, use_cache)
+    return _get_matrix(messages, content_hash, codec)
+
+
+def _load_in_process(file: str, encoding: str, use_cache: bool) -> Tuple[Messages, str]:
+    """
+    在子进程中解析矩阵表并生成编解码模块写入缓存，主进程直接加载编译好的代码
+    """
+    messages, content_hash = load_messages(file, encoding, use_cache)
+    load_codec(messages, content_hash)
+    return messages, content_hash
+
+
+def load_matrices(files: Sequence[str], encoding: str = "utf-8", max_workers: Optional[int] = None,
+                  use_cache: bool = True) -> List[Matrix]:
+    """
+    使用多个进程同时加载多个json或者dbc文件，用于多路CAN总线的车辆，每路总线一个矩阵表
+
+    文件在子进程中解析，主进程只创建Message对象，加载的时间取决于最大的文件而不是所有文件的总和
+
+    :param files: json或者dbc文件
+
+    :param encoding: 编码格式，默认utf-8
+
+    :param max_workers: 进程数量，默认为文件数量和CPU数量中较小的值，为1的时候在当前进程中依次加载
+
+    :param use_cache: 是否使用矩阵表的缓存，参考load_messages
+
+    :return: 与files顺序一致的矩阵表，可以直接传给CanService或者get_message，
+        同一个文件出现多次的时候每次都是不同的Message对象
+    """
+    for file in files:
+        if not file.endswith((".json", ".dbc")):
+            raise RuntimeError("messages only support json or dbc file")
+    unique_files = list(dict.fromkeys(files))
+    workers = min(len(unique_files), max_workers or os.cpu_count() or 1)
+    if workers <= 1:
+        results = [_load_in_process(file, encoding, use_cache) for file in unique_files]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_load_in_process, unique_files, repeat(encoding), repeat(use_cache)))
+    loaded = dict(zip(unique_files, results))
+    return [_get_matrix(*loaded[file]) for file in files]
+
+
+class Frame(object):
+    """
+    CAN总线上收到的一帧数据，只保存msg id、data以及时间戳
+
+    接收线程每收到一帧就会生成一个对象放入栈中，所以使用__slots__并且data保存为bytes，减少内存占用和创建的时间，
+
+    需要解析signal的时候通过CanService把data写入到矩阵表中的Message对象
+    """
+    __slots__ = ("msg_id", "data", "time_stamp")
+
+    def __init__(self, msg_id: int, data: Union[bytes, List[int]], time_stamp: int):
+        # 信号ID
+        self.msg_id = msg_id
+        # 信号数据
+        self.data = bytes(data)
+        # 时间印记
+        self.time_stamp = time_stamp
+
+    @property
+    def data_length(self) -> int:
+        return len(self.data)
+
+    def __str__(self):
+        return f"{hex(self.msg_id)} = {list(self.data)}"
+
+    def __repr__(self):
+        return f"Frame(msg_id={hex(self.msg_id)}, data={self.data.hex()}, time_stamp={self.time_stamp})"
+
+
 class Message(object):
     """
     CAN总线定义的Message，集合了CAN box发送的相关内容， 如msg_send_type/external_flag等
@@ -349,6 +426,14 @@ class Message(object):
         self.diag_state = False
         # 是否标准can
         self.is_standard_can = None
+        # 生成的编码函数，参考codec模块
+        self.encoder = None
+        # 生成的解码函数，参考codec模块
+        self.decoder = None
+        # data的版本，每次收到数据后加1，signal据此判断是否需要重新解析
+        self.data_version = 0
+        # 设置过值但是还没有写入到data中的signal名字
+        self.dirty_signals = set()
 
     def __str__(self):
         return f"{hex(self.msg_id)} = {self.data}"
@@ -391,7 +476,7 @@ class Message(object):
         else:
             self.__check_signals()
 
-    def update(self, type_: bool):
+    def update(self, type_: bool, lazy: bool = True):
         """
         更新8byte数据。
 
@@ -400,24 +485,96 @@ class Message(object):
             True: 发送数据
 
             False:  收到数据
+
+        :param lazy: 收到数据的时候是否延迟解析，默认只标记数据已变化，signal在第一次读取的时候才解析
         """
         # 发送数据
         if type_:
-            logger.trace("send message")
-            for name, signal in self.signals.items():
-                logger.trace(f"signal name = {signal.signal_name} and signal value = {signal.value}")
-                # 根据原来的数据message_data，替换某一部分的内容
-                set_data(self.data, signal.start_bit, signal.byte_type, signal.value, signal.bit_length,
-                         self.data_length)
-            logger.trace(f"msg id {hex(self.msg_id)} and data is {list(map(lambda x: hex(x), self.data))}")
+            if log_switch.trace:
+                logger.trace("send message")
+            # data即为已经编码好的数据，只需要把设置过值的signal重新写入
+            dirty_signals, self.dirty_signals = self.dirty_signals, set()
+            if not dirty_signals:
+                return
+            if self.encoder and len(dirty_signals) == len(self.signals):
+                values = dict((name, signal.value) for name, signal in self.signals.items())
+                data = list(self.encoder(self.data, values))
+            else:
+                data = list(self.data)
+                for name in dirty_signals:
+                    signal = self.signals[name]
+                    if log_switch.trace:
+                        logger.trace(f"signal name = {signal.signal_name} and signal value = {signal.value}")
+                    # 根据原来的数据message_data，替换某一部分的内容
+                    encode_data(data, signal.layout, signal.value)
+            # 整体替换data，周期发送的线程不会读取到写了一半的数据
+            self.data = data
+            if log_switch.trace:
+                logger.trace(f"msg id {hex(self.msg_id)} and data is {bytes(self.data).hex(' ')}")
         # 收到数据
         else:
-            logger.trace("receive message")
+            if log_switch.trace:
+                logger.trace("receive message")
+            # 收到的数据优先，之前设置过但还没有发送的值作废
+            self.dirty_signals.clear()
+            if lazy:
+                self.data_version += 1
+                return
+            if self.decoder:
+                for name, (value, physical_value) in self.decoder(self.data).items():
+                    self.signals[name].set_bus_value(value, physical_value)
+                return
             for name, signal in self.signals.items():
-                logger.trace(f"signal name = {signal.signal_name} and signal value = {signal.value}")
-                value = get_data(self.data, signal.start_bit, signal.byte_type, signal.bit_length, self.data_length)
-                logger.trace(f"value is {value}")
-                signal.value = value
+                if log_switch.trace:
+                    logger.trace(f"signal name = {signal.signal_name} and signal value = {signal.value}")
+                value = decode_data(self.data, signal.layout)
+                if log_switch.trace:
+                    logger.trace(f"value is {value}")
+                signal.set_bus_value(value, signal.to_physical_value(value))
+
+    def get_snapshot(self) -> Snapshot:
+        """
+        获取当前data以及所有signal总线值的快照，快照只包含tuple，不会被后续的修改影响
+
+        :return: 快照
+        """
+        return tuple(self.data), tuple((name, signal.value) for name, signal in self.signals.items())
+
+    def restore(self, snapshot: Snapshot):
+        """
+        原地恢复到快照时的值，不会创建新的Message/Signal对象，所以已经交给CAN发送的message也会使用恢复后的值
+
+        :param snapshot: get_snapshot获取到的快照
+        """
+        data, values = snapshot
+        for name, value in values:
+            self.signals[name].value = value
+        self.data = list(data)
+
+    def reload(self, message: "Message"):
+        """
+        使用新矩阵表中的message原地替换当前message的定义，布局相同的signal保留当前的值
+
+        已经交给CAN发送的message是同一个对象，所以发送的线程不需要停止，下一个周期就会发送新的data，
+
+        发送的周期在发送线程启动的时候已经确定，变化后需要重新发送才会生效
+
+        :param message: 新矩阵表中相同msg id的message，替换后不能再使用
+        """
+        if len(self.data) == len(message.data):
+            message.data = list(self.data)
+        for name, signal in message.signals.items():
+            old_signal = self.signals.get(name)
+            if old_signal is not None and old_signal.layout == signal.layout:
+                signal.value = old_signal.value
+        message.update(True)
+        for signal in message.signals.values():
+            signal.message = self
+        state = dict(message.__dict__)
+        state["stop_flag"] = self.stop_flag
+        state["time_stamp"] = self.time_stamp
+        # 一次性替换所有的属性，signals、编解码函数以及data同时生效
+        self.__dict__.update(state)
 
     def set_value(self, message: MessageType):
         """
@@ -475,6 +632,7 @@ class Message(object):
 
         for sig in message["signals"]:
             signal = Signal()
+            signal.message = self
             signal.set_value(sig)
             self.signals[signal.signal_name] = signal
 
@@ -511,6 +669,18 @@ class Signal(object):
         self.__value = 0
         # 物理值
         self.__physical_value = None
+        # 在data中的布局，由start_bit/byte_type/bit_length计算得出
+        self.layout = None
+        # 总线值转换成物理值的参数，由factor/offset计算得出，参考get_conversion
+        self.conversion = None
+        # 总线值的最大值
+        self.__max_value = 0
+        # factor为1且offset为0，物理值就是总线值
+        self.__is_identity = False
+        # 所属的message
+        self.message = None
+        # 解析时message的data版本
+        self.__version = 0
 
     def set_value(self, signal: SignalType):
         """
@@ -531,6 +701,10 @@ class Signal(object):
         self.maximum = signal["maximum"]
         self.unit = signal["unit"]
         self.receiver = signal["receiver"]
+        self.layout = get_layout(self.start_bit, self.byte_type, self.bit_length)
+        self.conversion = get_conversion(self.factor, self.offset)
+        self.__max_value = (1 << self.bit_length) - 1
+        self.__is_identity = self.conversion == (1, 0, None)
         if "start_value" in signal:
             self.value = signal["start_value"]
         else:
@@ -558,9 +732,8 @@ class Signal(object):
                 if not int(self.minimum) <= self.value <= int(self.maximum):
                     raise ValueError(f"value[{self.value}] must in [{self.minimum} , {self.maximum}]")
         # 检查当前设置的最大值是否超过bit length所允许的最大值
-        max_value = 2 ** self.bit_length - 1
-        if not check_value(self.value, 0, max_value):
-            raise ValueError(f"value[{self.value}] must in [0, {max_value}]")
+        if not check_value(self.value, 0, self.__max_value):
+            raise ValueError(f"value[{self.value}] must in [0, {self.__max_value}]")
 
     def check_start_bit_value(self):
         """
@@ -576,8 +749,78 @@ class Signal(object):
         if not check_value(self.bit_length, 0, 0x3f):
             raise ValueError(f"start bit[{self.bit_length}] must in [0, 0x3f]")
 
+    def to_physical_value(self, value: int) -> Number:
+        """
+        总线值转换成物理值，不改变signal当前的值
+
+        :param value: 总线值
+
+        :return: 物理值，factor和offset都是整数的时候为int，否则为按照小数位数四舍五入的float
+        """
+        if self.__is_identity:
+            return value
+        factor, offset, digits = self.conversion
+        if digits is None:
+            return value * factor + offset
+        return round(value * factor + offset, digits)
+
+    def to_bus_value(self, physical_value: Number) -> int:
+        """
+        物理值转换成总线值，不改变signal当前的值
+
+        :param physical_value: 物理值，不是int和float的时候(如数字字符串)先用float()转换
+
+        :return: 总线值，不能整除的时候取最接近的总线值
+        """
+        if not isinstance(physical_value, (int, float)):
+            physical_value = float(physical_value)
+        factor, offset, _ = self.conversion
+        value = physical_value - offset
+        if isinstance(value, int) and isinstance(factor, int):
+            quotient, remainder = divmod(value, factor)
+            if remainder == 0:
+                return quotient
+        return round(value / factor)
+
+    def set_bus_value(self, value: int, physical_value: Number):
+        """
+        直接设置总线值以及对应的物理值，用于解析收到的数据，不再重复计算物理值
+
+        :param value: 总线值
+
+        :param physical_value: 物理值
+        """
+        self.__value = value
+        self.__physical_value = physical_value
+        self.__sync_version()
+
+    def __sync_version(self):
+        """
+        记录当前值对应的message data版本
+        """
+        if self.message is not None:
+            self.__version = self.message.data_version
+
+    def __mark_dirty(self):
+        """
+        标记值已经修改，message发送的时候需要重新写入data
+        """
+        if self.message is not None:
+            self.message.dirty_signals.add(self.signal_name)
+
+    def __refresh(self):
+        """
+        message收到新的数据后，第一次读取的时候才从data中解析出值
+        """
+        if self.message is not None and self.__version != self.message.data_version:
+            value = decode_data(self.message.data, self.layout)
+            self.__value = value
+            self.__physical_value = self.to_physical_value(value)
+            self.__version = self.message.data_version
+
     @property
     def value(self):
+        self.__refresh()
         return self.__value
 
     @value.setter
@@ -586,17 +829,27 @@ class Signal(object):
         收到的消息，
         """
         self.__value = value
-        self.__physical_value = int((float(value) * float(self.factor)) + float(self.offset))
-        logger.debug(f"signal[{self.signal_name}]value is {self.__value} and physical value is {self.__physical_value}")
+        self.__physical_value = self.to_physical_value(value)
+        self.__sync_version()
+        self.__mark_dirty()
+        if log_switch.debug:
+            logger.debug(f"signal[{self.signal_name}]value is {self.__value} and "
+                         f"physical value is {self.__physical_value}")
 
     @property
     def physical_value(self):
+        self.__refresh()
         return self.__physical_value
 
     @physical_value.setter
     def physical_value(self, physical_value: Number):
-        self.__physical_value = physical_value
-        self.__value = int((float(physical_value) - float(self.offset)) / float(self.factor))
-        if self.__value < 0 or self.__value > (2 ** self.bit_length - 1):
+        value = self.to_bus_value(physical_value)
+        if not 0 <= value <= self.__max_value:
             raise RuntimeError("it need input physical value not bus value")
-        logger.debug(f"physical value is {self.__physical_value} and value is {self.__value}")
+        self.__value = value
+        # 保存实际能够发送的物理值
+        self.__physical_value = self.to_physical_value(value)
+        self.__sync_version()
+        self.__mark_dirty()
+        if log_switch.debug:
+            logger.debug(f"physical value is {self.__physical_value} and value is {self.__value}")
@@ -6,11 +6,12 @@
 # @Author:      philosophy
 # @Created:     2022/02/19 - 22:51
 # --------------------------------------------------------
-from time import sleep
-from autotest.logger import logger
+from typing import Any, List, Tuple
+
+from autotest.logger import logger, log_switch
 from .pcan_device import PCanDevice
 from ..abstract_class import BaseCanBus, BaudRateEnum
-from ..message import Message
+from ..message import Frame
 
 
 class PCanBus(BaseCanBus):
@@ -28,66 +29,39 @@ class PCanBus(BaseCanBus):
         self._can = PCanDevice(can_fd)
 
     @staticmethod
-    def __get_data(data, length: int) -> list:
+    def __get_frames(count: int, messages: List[Tuple[Any, Any]]) -> List[Frame]:
         """
-        转换pcan收的data为list
-
-        :param data: 收到的data数据
-
-        :param length:  长度
+        把读取到的帧批量转换成Frame，data通过bytes()一次复制(最多8byte)
 
-        :return: 8byte的list对象
-        """
-        msg_data = []
-        for i in range(length):
-            msg_data.append(data[i])
-        return msg_data
+        时间戳由毫秒、毫秒溢出次数以及微秒组成，转换成微秒
 
-    @staticmethod
-    def __get_time_stamp(timestamp) -> int:
-        """
-        peak CAN获取时间方法
+        :param count: 帧数
 
-        :param timestamp:  peak can读取的时间
+        :param messages: (message, timestamp)的列表
 
-        :return: 转换后的时间 (毫秒)
+        :return: Frame对象的列表
         """
-        time_stamp = timestamp.micros + 1000 * timestamp.millis + 0x100000000 * 1000 * timestamp.millis_overflow
-        return int(time_stamp / 1000)
+        return [Frame(message.id, bytes(message.data)[:message.len],
+                      timestamp.micros + 1000 * (timestamp.millis + 0x100000000 * timestamp.millis_overflow))
+                for message, timestamp in messages[:count]]
 
-    def __get_message(self, message, timestamp) -> Message:
+    def __handle(self, count: int, messages: List[Tuple[Any, Any]]):
         """
-        获取message对象
+        处理读取到的帧
 
-        :param message: message信息
+        :param count: 帧数
 
-        :return: PeakCanMessage对象
+        :param messages: (message, timestamp)的列表
         """
-        msg = Message()
-        msg.msg_id = message.id
-        msg.time_stamp = self.__get_time_stamp(timestamp)
-        msg.send_type = message.msg_type
-        msg.data_length = 8 if message.len > 8 else message.len
-        msg.data = self.__get_data(message.data, msg.data_length)
-        return msg
+        if log_switch.trace:
+            logger.trace(f"receive count is {count}")
+        self._save_frames(self.__get_frames(count, messages))
 
     def __receive(self):
         """
         CAN接收帧函数，在接收线程中执行
         """
-        while self._can.is_open and self._need_receive:
-            try:
-                receive_msg, timestamp = self._can.receive()
-                msg_id = receive_msg.id
-                logger.trace(f"msg id = {hex(msg_id)}")
-                receive_message = self.__get_message(receive_msg, timestamp)
-                self._receive_messages[msg_id] = receive_message
-                self._stack.append(receive_message)
-            except RuntimeError as e:
-                logger.trace(e)
-                continue
-            finally:
-                sleep(0.001)
+        self._receive_loop(self.__handle)
 
     def open_can(self):
         """
@@ -7,15 +7,17 @@
 # @Created:     2022/02/19 - 22:24
 # --------------------------------------------------------
 # 导入所需模块
-import pcan_basic
+import ctypes
+import platform
 from inspect import stack
-from ctypes import memmove, c_uint
+from ctypes import memmove, c_uint, c_void_p
 from typing import List, Any, Tuple
 
-from autotest.logger import logger
+from autotest.logger import logger, log_switch
 from autotest.checker import check_connect, can_tips
 from ..abstract_class import BaseCanDevice, BaudRateEnum
 from ..message import Message
+from . import pcan_basic
 
 baud_rate_list = {
     #   波特率
@@ -63,6 +65,8 @@ class PCanDevice(BaseCanDevice):
         self.__channel = pcan_basic.PCAN_USBBUS1
         #  是否CANFD，如果是CANFD则调用canfd接口
         self.__is_fd = is_fd
+        # 接收事件的句柄，收到帧的时候驱动会设置该事件，为None的时候不等待事件
+        self.__receive_event = None
 
     def __init_device(self, baud_rate: str, channel: int):
         """
@@ -91,10 +95,39 @@ class PCanDevice(BaseCanDevice):
             if ret == 0:
                 self._is_open = True
                 logger.debug(f"pcan is open success")
+                self.__create_receive_event()
             else:
                 self._is_open = False
                 raise RuntimeError(f"Method <{stack()[0][3]}> Init PEAK CAN channel_{hex(channel.value)} Failed.")
 
+    def __create_receive_event(self):
+        """
+        创建接收事件并设置到PCAN通道，接收队列为空的时候等待该事件，只支持Windows
+        """
+        if platform.system() != "Windows":
+            return
+        kernel32 = ctypes.windll.kernel32
+        kernel32.CreateEventW.restype = c_void_p
+        event = kernel32.CreateEventW(None, False, False, None)
+        if not event:
+            logger.debug("create pcan receive event failed")
+            return
+        ret = self.__can_basic.set_value(self.__channel, pcan_basic.PCAN_RECEIVE_EVENT, event)
+        if ret == pcan_basic.PCAN_ERROR_OK:
+            self.__receive_event = event
+        else:
+            kernel32.CloseHandle(c_void_p(event))
+            logger.debug(f"set pcan receive event failed, error code is {hex(ret)}")
+
+    def __close_receive_event(self):
+        """
+        取消PCAN通道的接收事件并关闭句柄
+        """
+        if self.__receive_event:
+            self.__can_basic.set_value(self.__channel, pcan_basic.PCAN_RECEIVE_EVENT, 0)
+            ctypes.windll.kernel32.CloseHandle(c_void_p(self.__receive_event))
+            self.__receive_event = None
+
     @staticmethod
     def __data_package_fd(frame_length: int, message_id: int, send_type: int, data_length: int, data: List[Any]):
         """
@@ -198,6 +231,7 @@ class PCanDevice(BaseCanDevice):
         """
         channel = self.__channel
         if self._is_open:
+            self.__close_receive_event()
             ret = self.__can_basic.uninitialize(channel)
             if ret == pcan_basic.PCAN_ERROR_OK:
                 logger.debug(f"close pcan success")
@@ -230,12 +264,57 @@ class PCanDevice(BaseCanDevice):
         try:
             ret = self.__can_basic.write(channel, p_send)
             if ret == pcan_basic.PCAN_ERROR_OK:
-                logger.trace(f"PEAK CAN channel_{hex(channel.value)} Transmit Success.")
+                if log_switch.trace:
+                    logger.trace(f"PEAK CAN channel_{hex(channel.value)} Transmit Success.")
             else:
                 raise RuntimeError(f"PEAK CAN channel_{hex(channel.value)} Transmit Failed.")
         except Exception as e:
             raise RuntimeError(f'PEAK CAN transmit failed. error info is {e}')
 
+    def __read_queue(self, frame_length: int) -> List[Tuple[Any, Any]]:
+        """
+        读取接收队列中的帧，直到队列为空或者达到frame_length
+
+        :param frame_length: 最多读取的帧数
+
+        :return: (message, timestamp)的列表
+        """
+        overrun = pcan_basic.PCAN_ERROR_QOVERRUN | pcan_basic.PCAN_ERROR_OVERRUN
+        read = self.__can_basic.read_fd if self.__is_fd else self.__can_basic.read
+        messages = []
+        while len(messages) < frame_length:
+            ret, message, timestamp = read(self.__channel)
+            if ret & overrun:
+                # 接收队列或者CAN控制器溢出，溢出之前的帧已经丢失，本次读取的帧仍然有效
+                self._overruns += 1
+                ret &= ~overrun
+            if ret == pcan_basic.PCAN_ERROR_OK:
+                messages.append((message, timestamp))
+            elif ret & pcan_basic.PCAN_ERROR_QRCVEMPTY:
+                break
+            elif messages:
+                break
+            else:
+                raise RuntimeError(f"PEAK CAN receive failed, error code is {hex(ret)}")
+        return messages
+
+    @check_connect("_is_open", can_tips)
+    def read(self, timeout: float, frame_length: int = 2500) -> Tuple[int, List[Tuple[Any, Any]]]:
+        """
+        接收线程读取CAN消息，接收队列为空的时候等待接收事件，直到有数据或者超时，超时返回0
+
+        :param timeout: 最长等待时间，单位秒
+
+        :param frame_length: 一次最多读取的帧数
+
+        :return: (帧数, (message, timestamp)的列表)
+        """
+        messages = self.__read_queue(frame_length)
+        if not messages and self.__receive_event:
+            ctypes.windll.kernel32.WaitForSingleObject(c_void_p(self.__receive_event), int(timeout * 1000))
+            messages = self.__read_queue(frame_length)
+        return len(messages), messages
+
     @check_connect("_is_open", can_tips)
     def receive(self, channel: int = None) -> Tuple[Any, Any]:
         """
@@ -252,7 +331,8 @@ class PCanDevice(BaseCanDevice):
             else:
                 ret, message, timestamp = self.__can_basic.read(channel)
             if ret == pcan_basic.PCAN_ERROR_OK:
-                logger.trace(f"PEAK CAN channel_{hex(channel.value)} Receive Success.")
+                if log_switch.trace:
+                    logger.trace(f"PEAK CAN channel_{hex(channel.value)} Receive Success.")
                 return message, timestamp
             else:
                 raise RuntimeError(f"Method <{stack()[0][3]}> PEAK CAN Receive Failed.")
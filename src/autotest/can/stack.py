@@ -0,0 +1,476 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        stack
+# @Author:      philosophy
+# @Created:     2024/03/23 - 14:10
+# --------------------------------------------------------
+from bisect import bisect_left, bisect_right
+from enum import Enum, unique
+from threading import Lock, Condition
+from time import monotonic, sleep
+from typing import List, Iterator, Iterable, Dict, Tuple, Optional, Sequence, Callable
+
+from .message import Frame
+
+"""
+接收线程保存收到的帧使用的栈
+
+栈为预先分配好容量的环形缓冲区，长时间运行的时候内存不会无限增长，栈满了之后根据策略覆盖最早的帧或者丢弃新收到的帧
+
+接收的同时按照msg id保存每个message的历史，查询某个message的帧的时候不需要遍历整个栈
+
+同一个栈(即同一个通道)中帧的时间戳(单位微秒)保证单调不减，可以通过二分查找获取某个时间段内的帧
+
+等待某个帧的线程通过条件变量等待，接收线程收到帧的时候立即唤醒，不需要固定时间的sleep
+"""
+
+# 栈默认的容量(帧数)
+DEFAULT_CAPACITY = 500000
+# 时间戳比上一帧小超过这个值(微秒)的时候认为设备时钟重置或者回绕，小于这个值的认为是抖动或者乱序
+TIME_STAMP_RESET_THRESHOLD = 1000000
+# message的历史中已经移除的帧超过这个数量并且超过一半的时候才真正删除，避免每次移除都移动整个列表
+_COMPACT_SIZE = 1024
+
+# 某个msg id的帧以及对应的时间戳
+History = Tuple[Sequence[Frame], Sequence[int]]
+
+
+@unique
+class StackPolicyEnum(Enum):
+    """
+    栈满了之后的处理策略
+
+    OVERWRITE、DROP
+    """
+    # 覆盖最早收到的帧
+    OVERWRITE = "overwrite"
+    # 丢弃新收到的帧
+    DROP = "drop"
+
+
+def _frames_between(history: History, start_time: int, end_time: int, lo: int = 0) -> List[Frame]:
+    frames, time_stamps = history
+    start = bisect_left(time_stamps, start_time, lo)
+    end = bisect_right(time_stamps, end_time, start)
+    return list(frames[start:end])
+
+
+def _last_before(history: History, time_stamp: int, lo: int = 0) -> Optional[Frame]:
+    frames, time_stamps = history
+    index = bisect_right(time_stamps, time_stamp, lo)
+    return frames[index - 1] if index > lo else None
+
+
+class StackSnapshot(list):
+    """
+    FrameStack的快照，按照接收的顺序保存所有的帧，同时保存了按照msg id分组的帧以及时间戳
+    """
+
+    def __init__(self, frames: Iterable[Frame] = (), histories: Optional[Dict[int, History]] = None):
+        super().__init__(frames)
+        self.__histories = histories if histories is not None else dict()
+
+    def get_frames(self, msg_id: int) -> List[Frame]:
+        """
+        获取某个msg id的所有帧
+
+        :param msg_id: msg id
+
+        :return: 按照接收的顺序排列的帧
+        """
+        if msg_id not in self.__histories:
+            return []
+        return list(self.__histories[msg_id][0])
+
+    def frames_between(self, msg_id: int, start_time: int, end_time: int) -> List[Frame]:
+        """
+        获取某个msg id在[start_time, end_time]之间收到的帧，参考FrameStack.frames_between
+        """
+        if msg_id not in self.__histories:
+            return []
+        return _frames_between(self.__histories[msg_id], start_time, end_time)
+
+    def last_before(self, msg_id: int, time_stamp: int) -> Optional[Frame]:
+        """
+        获取某个msg id在time_stamp(包含)之前收到的最后一帧，参考FrameStack.last_before
+        """
+        if msg_id not in self.__histories:
+            return None
+        return _last_before(self.__histories[msg_id], time_stamp)
+
+
+def group_frames(frames: Iterable[Frame], msg_ids: Iterable[int]) -> Dict[int, List[Frame]]:
+    """
+    按照msg id对帧进行分组，frames为StackSnapshot的时候直接使用保存的分组，否则遍历一次frames
+
+    :param frames: 帧的集合，如get_stack()获取到的栈
+
+    :param msg_ids: 需要的msg id
+
+    :return: {msg_id: 按照接收的顺序排列的帧}
+    """
+    if isinstance(frames, StackSnapshot):
+        return dict((msg_id, frames.get_frames(msg_id)) for msg_id in msg_ids)
+    groups = dict((msg_id, []) for msg_id in msg_ids)
+    for frame in frames:
+        if frame.msg_id in groups:
+            groups[frame.msg_id].append(frame)
+    return groups
+
+
+def filter_frames(frames: Iterable[Frame], msg_id: int) -> List[Frame]:
+    """
+    获取某个msg id的所有帧，参考group_frames
+
+    :param frames: 帧的集合，如get_stack()获取到的栈
+
+    :param msg_id: msg id
+
+    :return: 按照接收的顺序排列的帧
+    """
+    return group_frames(frames, (msg_id,))[msg_id]
+
+
+class _History(object):
+    """
+    某个msg id的帧以及时间戳，移除最早的帧的时候只移动起始位置
+    """
+    __slots__ = ("frames", "time_stamps", "head")
+
+    def __init__(self):
+        self.frames = []
+        self.time_stamps = []
+        # 第一个有效的帧的位置
+        self.head = 0
+
+    def __len__(self) -> int:
+        return len(self.frames) - self.head
+
+    def append(self, frame: Frame):
+        self.frames.append(frame)
+        self.time_stamps.append(frame.time_stamp)
+
+    def pop_oldest(self):
+        self.head += 1
+        if self.head >= _COMPACT_SIZE and self.head * 2 >= len(self.frames):
+            del self.frames[:self.head]
+            del self.time_stamps[:self.head]
+            self.head = 0
+
+    def copy(self) -> History:
+        return tuple(self.frames[self.head:]), tuple(self.time_stamps[self.head:])
+
+
+class _Watcher(object):
+    """
+    等待帧的线程，接收线程把收到的帧放入frames并唤醒等待的线程
+    """
+    __slots__ = ("frames", "condition")
+
+    def __init__(self, lock: Lock):
+        self.frames = []
+        self.condition = Condition(lock)
+
+
+class FrameStack(object):
+    """
+    固定容量的环形缓冲区，接收线程写入，测试代码通过snapshot获取收到的帧
+
+    栈满了之后被覆盖或者丢弃的帧都会计入dropped
+
+    时间戳比上一帧小的时候保证时间戳单调不减：
+
+        变小的值小于TIME_STAMP_RESET_THRESHOLD的时候(抖动或者乱序)只把这一帧的时间戳改为上一帧的时间戳
+
+        否则认为设备时钟回绕或者重置，之后的帧的时间戳都会加上偏移量接在之前的时间戳后面
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, policy: StackPolicyEnum = StackPolicyEnum.OVERWRITE):
+        """
+        :param capacity: 容量(帧数)
+
+        :param policy: 栈满了之后的处理策略
+        """
+        if capacity <= 0:
+            raise ValueError(f"capacity[{capacity}] must be greater than 0")
+        self.__capacity = capacity
+        self.__policy = policy
+        # 预先分配的空间
+        self.__frames = [None] * capacity
+        # 下一帧写入的位置
+        self.__position = 0
+        # 当前保存的帧数
+        self.__size = 0
+        # 被覆盖或者丢弃的帧数
+        self.__dropped = 0
+        # 每个msg id的帧，与环形缓冲区中保存的帧保持一致
+        self.__histories = dict()
+        # 最后一帧的时间戳以及设备时间戳变小后需要加上的偏移量，clear的时候不清除
+        self.__last_time_stamp = None
+        self.__offset = 0
+        # 最后收到帧的时间(time.monotonic)，用于判断总线是否静默
+        self.__receive_time = None
+        # 等待帧的线程，{msg_id: [_Watcher]}，msg_id为None的等待任意帧
+        self.__watchers = dict()
+        self.__lock = Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def policy(self) -> StackPolicyEnum:
+        return self.__policy
+
+    @property
+    def dropped(self) -> int:
+        """
+        栈满了之后被覆盖或者丢弃的帧数，clear的时候不会清零
+        """
+        return self.__dropped
+
+    @property
+    def last_time_stamp(self) -> Optional[int]:
+        """
+        最后收到的帧的时间戳，还没有收到过帧的时候为None，clear的时候不会清除
+        """
+        return self.__last_time_stamp
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __iter__(self) -> Iterator[Frame]:
+        return iter(self.snapshot())
+
+    def append(self, frame: Frame):
+        """
+        保存收到的帧
+
+        :param frame: 帧，时间戳比上一帧小的时候会修改帧的时间戳
+        """
+        with self.__lock:
+            self.__receive_time = monotonic()
+            self.__append(frame)
+
+    def extend(self, frames: Iterable[Frame]):
+        """
+        保存接收线程一次读取到的一批帧，只加锁一次
+
+        :param frames: 按照接收顺序排列的帧
+        """
+        with self.__lock:
+            self.__receive_time = monotonic()
+            for frame in frames:
+                self.__append(frame)
+
+    def notify(self, frames: Iterable[Frame]):
+        """
+        只唤醒等待帧的线程并记录收到帧的时间，不保存帧，用于帧录制到其他地方(参考FrameCapture)的时候
+
+        :param frames: 按照接收顺序排列的帧
+        """
+        with self.__lock:
+            self.__receive_time = monotonic()
+            if self.__watchers:
+                for frame in frames:
+                    self.__notify(frame)
+
+    def __append(self, frame: Frame):
+        time_stamp = frame.time_stamp + self.__offset
+        last_time_stamp = self.__last_time_stamp
+        if last_time_stamp is not None and time_stamp < last_time_stamp:
+            if last_time_stamp - time_stamp >= TIME_STAMP_RESET_THRESHOLD:
+                self.__offset += last_time_stamp - time_stamp
+            time_stamp = last_time_stamp
+        if time_stamp != frame.time_stamp:
+            frame.time_stamp = time_stamp
+        self.__last_time_stamp = time_stamp
+        if self.__watchers:
+            self.__notify(frame)
+        histories = self.__histories
+        if self.__size == self.__capacity:
+            self.__dropped += 1
+            if self.__policy == StackPolicyEnum.DROP:
+                return
+            # 栈满的时候写入的位置就是最早的帧，也是这个msg id最早的帧
+            oldest = self.__frames[self.__position]
+            history = histories[oldest.msg_id]
+            history.pop_oldest()
+            if not history:
+                del histories[oldest.msg_id]
+        else:
+            self.__size += 1
+        self.__frames[self.__position] = frame
+        history = histories.get(frame.msg_id)
+        if history is None:
+            history = histories[frame.msg_id] = _History()
+        history.append(frame)
+        self.__position += 1
+        if self.__position == self.__capacity:
+            self.__position = 0
+
+    def __notify(self, frame: Frame):
+        for msg_id in (frame.msg_id, None):
+            for watcher in self.__watchers.get(msg_id, ()):
+                watcher.frames.append(frame)
+                watcher.condition.notify()
+
+    def wait_for_frame(self,
+                       msg_id: Optional[int] = None,
+                       predicate: Optional[Callable[[Frame], bool]] = None,
+                       timeout: Optional[float] = None,
+                       latest: bool = False) -> Optional[Frame]:
+        """
+        等待收到满足条件的帧，收到帧的时候立即返回，不会错过等待期间收到的任何帧(包括栈满后被丢弃的帧)
+
+        :param msg_id: msg id，为None的时候等待任意帧
+
+        :param predicate: 帧需要满足的条件，在等待的线程中调用，为None的时候收到帧就返回
+
+        :param timeout: 超时时间，单位秒，为None的时候一直等待
+
+        :param latest: 是否先检查栈中最后收到的帧，为False的时候只检查调用之后收到的帧
+
+        :return: 第一个满足条件的帧，超时返回None
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        watcher = _Watcher(self.__lock)
+        with self.__lock:
+            if latest and self.__size:
+                if msg_id is None:
+                    watcher.frames.append(self.__frames[self.__position - 1])
+                elif msg_id in self.__histories:
+                    watcher.frames.append(self.__histories[msg_id].frames[-1])
+            self.__watchers.setdefault(msg_id, []).append(watcher)
+        try:
+            while True:
+                with self.__lock:
+                    while not watcher.frames:
+                        remaining = None if deadline is None else deadline - monotonic()
+                        if remaining is not None and remaining <= 0:
+                            return None
+                        watcher.condition.wait(remaining)
+                    frames = watcher.frames
+                    watcher.frames = []
+                for frame in frames:
+                    if predicate is None or predicate(frame):
+                        return frame
+        finally:
+            with self.__lock:
+                watchers = self.__watchers[msg_id]
+                watchers.remove(watcher)
+                if not watchers:
+                    del self.__watchers[msg_id]
+
+    def wait_for_silence(self, duration: float, timeout: Optional[float] = None) -> bool:
+        """
+        等待总线静默，即连续duration时间内没有收到任何帧，静默的时间从调用的时候开始计算
+
+        :param duration: 静默时间，单位秒
+
+        :param timeout: 超时时间，单位秒，为None的时候一直等待
+
+        :return: 是否等到了静默，超时返回False
+        """
+        start = monotonic()
+        deadline = None if timeout is None else start + timeout
+        while True:
+            with self.__lock:
+                receive_time = self.__receive_time
+            # 静默开始的时间
+            quiet_time = start if receive_time is None else max(start, receive_time)
+            now = monotonic()
+            if now - quiet_time >= duration:
+                return True
+            if deadline is not None and now >= deadline:
+                return False
+            wait_time = quiet_time + duration - now
+            if deadline is not None:
+                wait_time = min(wait_time, deadline - now)
+            sleep(wait_time)
+
+    def snapshot(self) -> StackSnapshot:
+        """
+        按照接收的顺序获取当前保存的帧，返回的是新的列表，不会受到之后接收或者清除的影响
+
+        :return: 帧的列表，同时保存了按照msg id分组的帧
+        """
+        with self.__lock:
+            start = self.__position - self.__size
+            if start >= 0:
+                frames = self.__frames[start:self.__position]
+            else:
+                frames = self.__frames[start:] + self.__frames[:self.__position]
+            histories = dict((msg_id, history.copy()) for msg_id, history in self.__histories.items())
+        return StackSnapshot(frames, histories)
+
+    def get_frames(self, msg_id: int) -> List[Frame]:
+        """
+        获取当前保存的某个msg id的所有帧，只复制这个msg id的帧
+
+        :param msg_id: msg id
+
+        :return: 按照接收的顺序排列的帧
+        """
+        with self.__lock:
+            if msg_id not in self.__histories:
+                return []
+            history = self.__histories[msg_id]
+            return history.frames[history.head:]
+
+    def frames_between(self, msg_id: int, start_time: int, end_time: int) -> List[Frame]:
+        """
+        通过二分查找获取某个msg id在[start_time, end_time]之间收到的帧，只复制找到的帧
+
+        :param msg_id: msg id
+
+        :param start_time: 开始时间(包含)，单位微秒
+
+        :param end_time: 结束时间(包含)，单位微秒
+
+        :return: 按照接收的顺序排列的帧
+        """
+        with self.__lock:
+            if msg_id not in self.__histories:
+                return []
+            history = self.__histories[msg_id]
+            return _frames_between((history.frames, history.time_stamps), start_time, end_time, history.head)
+
+    def last_before(self, msg_id: int, time_stamp: int) -> Optional[Frame]:
+        """
+        通过二分查找获取某个msg id在time_stamp(包含)之前收到的最后一帧
+
+        :param msg_id: msg id
+
+        :param time_stamp: 时间戳，单位微秒
+
+        :return: 帧，没有的时候返回None
+        """
+        with self.__lock:
+            if msg_id not in self.__histories:
+                return None
+            history = self.__histories[msg_id]
+            return _last_before((history.frames, history.time_stamps), time_stamp, history.head)
+
+    def time_range(self) -> Optional[Tuple[int, int]]:
+        """
+        当前保存的帧的时间范围
+
+        :return: (最早的帧的时间戳, 最后的帧的时间戳)，没有帧的时候返回None
+        """
+        with self.__lock:
+            if self.__size == 0:
+                return None
+            return self.__frames[self.__position - self.__size].time_stamp, self.__last_time_stamp
+
+    def clear(self):
+        """
+        清除保存的帧
+        """
+        with self.__lock:
+            self.__frames = [None] * self.__capacity
+            self.__histories = dict()
+            self.__position = 0
+            self.__size = 0
@@ -6,11 +6,10 @@
 # @Author:      philosophy
 # @Created:     2022/02/19 - 22:51
 # --------------------------------------------------------
-from time import sleep
-from typing import List
+from typing import List, Any
 
-from autotest.logger import logger
-from autotest.can.message import Message
+from autotest.logger import logger, log_switch
+from autotest.can.message import Frame
 from autotest.can.abstract_class import BaseCanBus, BaudRateEnum
 from .tsmaster_device import TSMasterDevice
 
@@ -24,49 +23,41 @@ class TsMasterCanBus(BaseCanBus):
         # 实例化同星
         self._can = TSMasterDevice(can_fd)
 
-    @staticmethod
-    def __get_data(data, length: int) -> List:
-        msg_data = []
-        for i in range(length):
-            msg_data.append(data[i])
-        return msg_data
+    def __get_frames(self, count: int, p_receive: Any) -> List[Frame]:
+        """
+        把接收缓冲区中的帧批量转换成Frame，data通过bytes()一次复制，时间戳单位为微秒，不需要转换
+
+        :param count: 帧数
+
+        :param p_receive: 接收缓冲区
+
+        :return: Frame对象的列表
+        """
+        get_length = self._get_dlc_length
+        # todo 同星的dll存在64bit， 标准can消息接收的问题，所以修改为过滤ID不为空的处理方式
+        # 接收缓冲区是复用的，count之后是之前接收的旧数据
+        return self._to_frames((item for item in p_receive[:count] if item.FIdentifier != 0x00),
+                               lambda item: Frame(item.FIdentifier, bytes(item.FData)[:get_length(item.FDLC)],
+                                                  item.FTimeUS))
 
-    def __get_message(self, p_receive) -> Message:
+    def __handle(self, count: int, p_receive: Any):
         """
-        获取message对象
+        处理读取到的帧
 
-        :param p_receive: message信息
+        :param count: 帧数
 
-        :return: PeakCanMessage对象
+        :param p_receive: 帧的数组
         """
-        msg = Message()
-        msg.msg_id = p_receive.FIdentifier
-        msg.time_stamp = p_receive.FTimeUS
-        msg.data = self.__get_data(p_receive.FData, self._get_dlc_length(p_receive.FDLC))
-        msg.data_length = len(msg.data)
-        return msg
+        if log_switch.trace:
+            logger.trace(f"receive count is {count}")
+        self._save_frames(self.__get_frames(count, p_receive))
 
     def __receive(self):
         """
         CAN接收帧函数，在接收线程中执行
         """
         logger.debug(f"start receive and tsmaster status {self._can.is_open} and need_receive {self._need_receive}")
-        while self._can.is_open and self._need_receive:
-            try:
-                count, p_receive = self._can.receive()
-                logger.trace(f"receive count is {count}")
-                # todo 同星的dll存在64bit， 标准can消息接收的问题，所以修改为过滤ID不为空的处理方式
-                messages = list(filter(lambda x: x.FIdentifier != 0x00, p_receive))
-                for p_receive in messages:
-                    message = self.__get_message(p_receive)
-                    logger.trace(f"message_id = {hex(message.msg_id)}")
-                    self._receive_messages[message.msg_id] = message
-                    self._stack.append(message)
-            except RuntimeError as e:
-                logger.trace(e)
-                continue
-            finally:
-                sleep(0.001)
+        self._receive_loop(self.__handle)
 
     def open_can(self):
         """
@@ -8,11 +8,11 @@
 # --------------------------------------------------------
 import os
 import platform
-from ctypes import CDLL, byref, c_size_t, c_int32, c_double, c_ubyte, POINTER, cast, c_int
+from ctypes import CDLL, byref, c_size_t, c_int32, c_double, c_ubyte, c_int
 from typing import List, Tuple, Any
 from autotest.checker import tsmaster_control_decorator, check_connect, can_tips
-from autotest.logger import logger
-from ..abstract_class import BaseCanDevice, BaudRateEnum
+from autotest.logger import logger, log_switch
+from ..abstract_class import BaseCanDevice, BaudRateEnum, RECEIVE_BUFFER_SIZE
 from ..message import Message
 from .tsmaster_basic import TRUE, APP_CHANNEL, TLIBCANFDControllerMode, TLIBCANFDControllerType, TLibCAN, \
     TLibCANFD, FALSE
@@ -25,6 +25,9 @@ class TSMasterDevice(BaseCanDevice):
         self.__is_fd = is_fd
         self.__device_handler = c_size_t(0)
         self.__channel = None
+        # 接收缓冲区以及读取的帧数(IN OUT参数)，打开设备的时候分配
+        self.__receive_buffer = None
+        self.__receive_count = c_int(0)
         # 需要在硬件文档中查询获取
         self.__dll_path = self.__get_dll_path()
         logger.debug(f"use dll path is {self.__dll_path}")
@@ -144,6 +147,8 @@ class TSMasterDevice(BaseCanDevice):
                 logger.info("ts master connect")
                 self._is_open = True
                 self.__set_baud_rate(baud_rate.value, data_rate.value, channel)
+                data_type = TLibCANFD if self.__is_fd else TLibCAN
+                self.__receive_buffer = (data_type * RECEIVE_BUFFER_SIZE)()
             else:
                 self._is_open = False
                 raise RuntimeError(f"open tsmaster failed, result is {result}")
@@ -157,6 +162,7 @@ class TSMasterDevice(BaseCanDevice):
             if result == 0:
                 self._is_open = False
                 self.__channel = None
+                self.__receive_buffer = None
                 # //释放TSCANAPI模块
                 # typedef void(__stdcall* finalize_lib_tscan_t)(void);
                 # logger.trace("try to finalize_lib_tscan")
@@ -167,7 +173,8 @@ class TSMasterDevice(BaseCanDevice):
     @check_connect("_is_open", can_tips)
     def transmit(self, message: Message):
         if self.__is_fd:
-            logger.trace("transmit by can fd")
+            if log_switch.trace:
+                logger.trace("transmit by can fd")
             etcan_fd = self.__data_package_fd(message.data, message.msg_id)
             # //异步发送CANFD报文
             # typedef c_uint(__stdcall* tscan_transmit_canfd_async_t)(const size_t ADeviceHandle, const TLibCANFD* ACAN);
@@ -175,7 +182,8 @@ class TSMasterDevice(BaseCanDevice):
             if result != 0:
                 raise RuntimeError(f"transmit can fd failed. error code is {result}")
         else:
-            logger.trace("transmit by can")
+            if log_switch.trace:
+                logger.trace("transmit by can")
             etcan = self.__data_package(message.data, message.msg_id)
             # //异步发送CAN报文
             # typedef c_uint(__stdcall* tscan_transmit_can_async_t)(const size_t ADeviceHandle, const TLibCAN* ACAN);
@@ -183,19 +191,36 @@ class TSMasterDevice(BaseCanDevice):
             if result != 0:
                 raise RuntimeError(f"transmit failed. error code is {result}")
 
+    @check_connect("_is_open", can_tips)
+    def read(self, timeout: float) -> Tuple[int, Any]:
+        """
+        接收线程读取CAN消息，没有数据的时候返回0
+
+        同星的FIFO接口不支持阻塞读取，会立即返回，由接收线程自动增加轮询间隔
+
+        :param timeout: 最长等待时间，单位秒，不使用
+
+        :return: (帧数, 帧的数组)
+        """
+        return self.receive()
+
     @check_connect("_is_open", can_tips)
     def receive(self) -> Tuple[int, Any]:
-        # 设置缓存大小， 这个是IN OUT模式，即输入的2500不代表一定有这么多数据，这个只是一个最大值，在执行完成函数后在读取值能知道实际的数量
-        buffer_size = 2500
-        p_buffer_size = byref(c_int(buffer_size))
+        """
+        读取FIFO中的CAN消息，没有数据的时候返回0
+
+        :return: (帧数, 复用的接收缓冲区)，缓冲区中的数据在下一次接收的时候会被覆盖
+        """
+        # 设置缓存大小， 这个是IN OUT模式，即输入的缓冲区大小不代表一定有这么多数据，这个只是一个最大值，在执行完成函数后在读取值能知道实际的数量
+        self.__receive_count.value = len(self.__receive_buffer)
+        p_buffer_size = byref(self.__receive_count)
+        data = byref(self.__receive_buffer)
         if self.__is_fd:
             # //读取CANFD报文
             # //ADeviceHandle：设备句柄；ACANBuffers:存储接收报文的数组；ACANBufferSize：存储数组的长度
             # //返回值：实际收到的报文数量
             # typedef c_uint(__stdcall* tsfifo_receive_canfd_msgs_t)(const size_t ADeviceHandle, const TLibCANFD* ACANBuffers, c_uint ACANBufferSize, c_uint8 AChn, c_uint8 ARXTX);
             # 0-RX, 1-TX
-            p_receive = [TLibCANFD() for _ in range(buffer_size)]
-            data = POINTER(TLibCANFD * len(p_receive))((TLibCANFD * len(p_receive))(*p_receive))
             result = self.__lib_can.tsfifo_receive_canfd_msgs(self.__device_handler,
                                                               data,
                                                               p_buffer_size,
@@ -207,10 +232,6 @@ class TSMasterDevice(BaseCanDevice):
             # //返回值：实际收到的报文数量
             # typedef c_uint(__stdcall* tsfifo_receive_can_msgs_t)(const size_t ADeviceHandle, const TLibCAN* ACANBuffers, c_uint ACANBufferSize, c_uint8 AChn, c_uint8 ARXTX);
             # 0-RX, 1-TX
-            # p_receive = (TLibCAN * buffer_size)()
-            # temp_size = copy.copy(p_buffer_size)
-            p_receive = [TLibCAN() for _ in range(buffer_size)]
-            data = POINTER(TLibCAN * len(p_receive))((TLibCAN * len(p_receive))(*p_receive))
             result = self.__lib_can.tsfifo_receive_can_msgs(self.__device_handler,
                                                             data,
                                                             p_buffer_size,
@@ -218,8 +239,6 @@ class TSMasterDevice(BaseCanDevice):
                                                             c_ubyte(0))
         if result == 0:
             # 真实收到的数据长度
-            cast_value = cast(p_buffer_size, POINTER(c_int32)).contents.value
-            # print(cast_value)
-            return cast_value, data.contents
+            return self.__receive_count.value, self.__receive_buffer
         else:
             raise RuntimeError(f"receive failed, frame receive count is {result}")
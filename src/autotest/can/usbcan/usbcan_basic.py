@@ -42,6 +42,12 @@ band_rate_list = {
     83.33: (0x03, 0x6F)
 }
 
+# VCI_ReadErrInfo读取到的错误码中表示接收缓冲区溢出的位
+# CAN控制器内部FIFO溢出
+ERR_CAN_OVERFLOW = 0x0001
+# CAN控制器内部BUFFER溢出
+ERR_CAN_BUFFER_OVERFLOW = 0x0040
+
 
 # ===============================================================================
 # 定义结构体
@@ -97,6 +103,18 @@ class VciCanObj(Structure):
     ]
 
 
+# 错误信息，结构体将在VCI_ReadErrInfo函数中被填充
+class VciErrInfo(Structure):
+    _fields_ = [
+        # 错误码
+        ('ErrCode', UINT),
+        # 消极错误时的错误标识数据
+        ('Passive_ErrData', BYTE * 3),
+        # 仲裁丢失时的仲裁丢失错误标识数据
+        ('ArLost_ErrData', BYTE)
+    ]
+
+
 # 定义了初始化CAN的配置。结构体将在VCI_InitCan函数中被填充，
 # 即初始化之前，要先填好这个结构体变量
 class VciInitConfig(Structure):
@@ -6,11 +6,12 @@
 # @Author:      philosophy
 # @Created:     2022/02/19 - 22:51
 # --------------------------------------------------------
-from time import sleep
-from autotest.logger import logger
+from typing import Any, List
+
+from autotest.logger import logger, log_switch
 from .usbcan_device import UsbCanDevice
 from ..abstract_class import BaudRateEnum, CanBoxDeviceEnum, BaseCanBus
-from ..message import Message
+from ..message import Frame
 
 
 class UsbCanBus(BaseCanBus):
@@ -31,81 +32,41 @@ class UsbCanBus(BaseCanBus):
         self.__time_flag = 1
 
     @staticmethod
-    def __get_data(data, length: int) -> list:
+    def __get_frames(count: int, p_receive: Any) -> List[Frame]:
         """
-        转换CAN BOX收的data为list
-
-        :param data: 收到的data数据
+        把接收缓冲区中的标准帧批量转换成Frame，data通过bytes()一次复制(最多8byte)
 
-        :param length:  长度
-
-        :return: 8byte的列表
-        """
-        msg_data = []
-        for i in range(length):
-            msg_data.append(data[i])
-        return msg_data
-
-    @staticmethod
-    def __get_reserved(reserved_value) -> list:
-        """
-        获取reversed参数
+        :param count: 帧数
 
-        :param reserved_value:  reversed的内容(can上收到的)
+        :param p_receive: 接收缓冲区
 
-        :return: 解析后的列表
+        :return: Frame对象的列表
         """
-        reserved_list = []
-        for i in range(3):
-            reserved_list.append(reserved_value[i])
-        return reserved_list
+        # 时间标识的单位为0.1ms，转换成微秒
+        return [Frame(item.id, bytes(item.data)[:item.data_len], item.time_stamp * 100)
+                for item in p_receive[:count] if item.extern_flag == 0]
 
-    def __get_message(self, p_receive) -> Message:
+    def __handle(self, ret: int, p_receive: Any):
         """
-        获取message对象
+        处理读取到的帧
 
-        :param p_receive: message信息
+        :param ret: 帧数
 
-        :return: PeakCanMessage对象
+        :param p_receive: 帧的数组
         """
-        msg = Message()
-        msg.msg_id = p_receive.id
-        # 转换成毫秒
-        msg.time_stamp = int(p_receive.time_stamp / 10)
-        # msg.time_stamp = hex(p_receive.time_stamp)
-        msg.time_flag = p_receive.time_flag
-        msg.send_type = p_receive.send_type
-        msg.remote_flag = p_receive.remote_flag
-        msg.external_flag = p_receive.extern_flag
-        msg.reserved = self.__get_reserved(p_receive.reserved)
-        msg.data_length = 8 if p_receive.data_len > 8 else p_receive.data_len
-        msg.data = self.__get_data(p_receive.data, msg.data_length)
-        return msg
+        if log_switch.trace:
+            logger.trace(f"return size is {ret}")
+        frames = self.__get_frames(ret, p_receive)
+        # 扩展帧
+        if len(frames) < ret and log_switch.debug:
+            logger.debug("type is external frame, not implement")
+        self._save_frames(frames)
 
     def __receive(self):
         """
         CAN接收帧函数，在接收线程中执行
         """
-        while self._can.is_open and self._need_receive:
-            try:
-                ret, p_receive = self._can.receive()
-                logger.trace(f"return size is {ret}")
-                for i in range(ret):
-                    receive_message = self.__get_message(p_receive[i])
-                    logger.trace(f"msg id = {hex(receive_message.msg_id)}")
-                    # 单帧数据
-                    if receive_message.external_flag == 0:
-                        # 获取数据并保存到self._receive_msg字典中
-                        self._receive_messages[receive_message.msg_id] = receive_message
-                        self._stack.append(receive_message)
-                    # 扩展帧
-                    else:
-                        logger.debug("type is external frame, not implement")
-            except RuntimeError as e:
-                logger.trace(e)
-                continue
-            finally:
-                sleep(0.001)
+        self._receive_loop(self.__handle)
 
     def open_can(self):
         """
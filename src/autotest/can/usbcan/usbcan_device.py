@@ -10,15 +10,17 @@ import platform
 import sys
 import os
 from ctypes import c_int, byref, POINTER, memmove, c_long, CDLL
-from time import time
+from time import time, monotonic
 from platform import architecture
 from inspect import stack
 from typing import Tuple, Any, List, Optional
 
-from autotest.logger import logger
+from autotest.logger import logger, log_switch
 from autotest.checker import control_decorator, check_connect, can_tips
-from .usbcan_basic import band_rate_list, VciInitConfig, UCHAR, DWORD, UINT, BYTE, VciCanObj
-from ..abstract_class import BaseCanDevice, BaudRateEnum, CanBoxDeviceEnum
+from .usbcan_basic import band_rate_list, VciInitConfig, UCHAR, DWORD, UINT, BYTE, VciCanObj, VciErrInfo, \
+    ERR_CAN_OVERFLOW, ERR_CAN_BUFFER_OVERFLOW
+from ..abstract_class import BaseCanDevice, BaudRateEnum, CanBoxDeviceEnum, OVERRUN_CHECK_INTERVAL, \
+    RECEIVE_BUFFER_SIZE
 from ..message import Message
 
 
@@ -49,6 +51,7 @@ class UsbCanDevice(BaseCanDevice):
         logger.debug(f"use dll path is {self.__dll_path}")
         if platform.system() == "Windows":
             self.__lib_can = CDLL(self.__dll_path)
+            self.__lib_can.VCI_Receive.restype = c_long
         else:
             raise RuntimeError("can not support linux")
         self.__start_time = 0
@@ -66,6 +69,10 @@ class UsbCanDevice(BaseCanDevice):
         self.__access_code = 0
         #  CAN通道索引。 第几路 CAN。即对应卡的CAN通道号， CAN1为0， CAN2为1
         self.__can_index = 0
+        # 上次检查接收缓冲区是否溢出的时间
+        self.__overrun_check_time = 0
+        # 接收缓冲区，打开设备的时候分配
+        self.__receive_buffer = None
 
     @staticmethod
     def __get_string(raw: int) -> str:
@@ -318,6 +325,7 @@ class UsbCanDevice(BaseCanDevice):
             logger.debug(f"device is opened")
             if self.__init_device(baud_rate.value, channel) == 1:
                 self.__start_device()
+                self.__get_receive_buffer(RECEIVE_BUFFER_SIZE)
             else:
                 raise RuntimeError("open can box failed")
         else:
@@ -330,6 +338,7 @@ class UsbCanDevice(BaseCanDevice):
         if self._is_open:
             if self.__lib_can.VCI_CloseDevice(self.__device_type, self.__device_index) == 1:
                 self._is_open = False
+                self.__receive_buffer = None
                 logger.debug(f"device is closed")
 
     @check_connect("_is_open", can_tips)
@@ -379,9 +388,11 @@ class UsbCanDevice(BaseCanDevice):
         try:
             ret = self.__lib_can.VCI_Transmit(self.__device_type, self.__device_index, self.__can_index, byref(p_send),
                                               message.frame_length)
-            logger.trace(f"ret = {ret}")
+            if log_switch.trace:
+                logger.trace(f"ret = {ret}")
             if ret > 0:
-                logger.trace(f"Usb CAN CAN{self.__can_index} Transmit Success.")
+                if log_switch.trace:
+                    logger.trace(f"Usb CAN CAN{self.__can_index} Transmit Success.")
             elif ret == 0:
                 raise RuntimeError(f"Usb CAN CAN{self.__can_index} Transmit Failed.")
             elif ret == -1:
@@ -391,11 +402,59 @@ class UsbCanDevice(BaseCanDevice):
                 raise RuntimeError("Unknown error.")
         except Exception:
             error = sys.exc_info()
-            logger.trace('ERROR: ' + str(error[0]) + ' : ' + str(error[1]))
+            if log_switch.trace:
+                logger.trace('ERROR: ' + str(error[0]) + ' : ' + str(error[1]))
             raise RuntimeError(error[1])
 
+    def __get_receive_buffer(self, frame_length: int):
+        """
+        获取接收缓冲区，需要的帧数超过当前缓冲区大小的时候才重新分配
+
+        :param frame_length: 需要的帧数
+
+        :return: VciCanObj数组
+        """
+        if self.__receive_buffer is None or len(self.__receive_buffer) < frame_length:
+            self.__receive_buffer = (VciCanObj * frame_length)()
+        return self.__receive_buffer
+
+    def __check_overrun(self):
+        """
+        定时读取错误信息，检查接收缓冲区是否溢出
+        """
+        now = monotonic()
+        if now - self.__overrun_check_time < OVERRUN_CHECK_INTERVAL:
+            return
+        self.__overrun_check_time = now
+        error_info = VciErrInfo()
+        if self.__lib_can.VCI_ReadErrInfo(self.__device_type, self.__device_index, self.__can_index,
+                                          byref(error_info)) == 1:
+            if error_info.ErrCode & (ERR_CAN_OVERFLOW | ERR_CAN_BUFFER_OVERFLOW):
+                self._overruns += 1
+
+    @check_connect("_is_open", can_tips)
+    def read(self, timeout: float, frame_length: int = RECEIVE_BUFFER_SIZE) -> Tuple[int, Any]:
+        """
+        接收线程读取CAN消息，没有数据的时候返回0
+
+        WaitTime为缓冲区无数据时阻塞等待的时间，部分设备(如CANalyst-II)的驱动中为保留参数，不会等待，由接收线程自动增加轮询间隔
+
+        :param timeout: 最长等待时间，单位秒
+
+        :param frame_length: 用来接收的帧结构体数组的长度，参考receive
+
+        :return: (帧数, 复用的接收缓冲区)，缓冲区中的数据在下一次接收的时候会被覆盖
+        """
+        p_receive = self.__get_receive_buffer(frame_length)
+        ret = self.__lib_can.VCI_Receive(self.__device_type, self.__device_index, self.__can_index,
+                                         byref(p_receive), frame_length, int(timeout * 1000))
+        if ret < 0:
+            raise RuntimeError(f"Usb CAN CAN{self.__can_index} Receive Failed, Usb CAN not exist.")
+        self.__check_overrun()
+        return ret, p_receive
+
     @check_connect("_is_open", can_tips)
-    def receive(self, frame_length: int = 2500, wait_time: int = 100) -> Tuple[int, Any]:
+    def receive(self, frame_length: int = RECEIVE_BUFFER_SIZE, wait_time: int = 100) -> Tuple[int, Any]:
         """
         接收函数。此函数从指定的设备CAN通道的接收缓冲区中读取数据。
 
@@ -411,15 +470,15 @@ class UsbCanDevice(BaseCanDevice):
         :param wait_time: 保留参数。
 
 
-        :return: 返回实际读取的帧数
+        :return: 返回实际读取的帧数以及复用的接收缓冲区，缓冲区中的数据在下一次接收的时候会被覆盖
         """
-        p_receive = (VciCanObj * frame_length)()
-        self.__lib_can.VCI_Receive.restype = c_long
+        p_receive = self.__get_receive_buffer(frame_length)
         try:
             ret = self.__lib_can.VCI_Receive(self.__device_type, self.__device_index, self.__can_index,
                                              byref(p_receive), frame_length, wait_time)
             if ret > 0:
-                logger.trace(f"Usb CAN CAN{self.__can_index} Receive Success.")
+                if log_switch.trace:
+                    logger.trace(f"Usb CAN CAN{self.__can_index} Receive Success.")
                 return ret, p_receive
             elif ret == 0:
                 raise RuntimeError(f"Usb CAN CAN{self.__can_index} Transmit Failed.")
@@ -430,5 +489,6 @@ class UsbCanDevice(BaseCanDevice):
                 raise RuntimeError("Unknown error.")
         except Exception:
             error = sys.exc_info()
-            logger.trace('ERROR: ' + str(error[0]) + ' : ' + str(error[1]))
+            if log_switch.trace:
+                logger.trace('ERROR: ' + str(error[0]) + ' : ' + str(error[1]))
             raise RuntimeError(error[1])
@@ -70,6 +70,10 @@ ZCAN_STATUS_ONLINE = 2
 ZCAN_STATUS_OFFLINE = 3
 ZCAN_STATUS_UNSUPPORTED = 4
 
+# ZCAN_ReadChannelErrInfo读取到的错误码中表示接收缓冲区溢出的位
+ZCAN_ERROR_CAN_OVERFLOW = 0x0001
+ZCAN_ERROR_CAN_BUFFER_OVERFLOW = 0x0040
+
 # CAN type
 ZCAN_TYPE_CAN = c_uint(0)
 ZCAN_TYPE_CANFD = c_uint(1)
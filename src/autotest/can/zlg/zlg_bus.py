@@ -6,12 +6,11 @@
 # @Author:      philosophy
 # @Created:     2022/02/19 - 22:51
 # --------------------------------------------------------
-from time import sleep
-from typing import List
+from typing import List, Any
 
-from autotest.logger import logger
+from autotest.logger import logger, log_switch
 from ..abstract_class import BaseCanBus, BaudRateEnum
-from ..message import Message
+from ..message import Frame
 from .zlg_device import ZlgUsbCanDevice
 
 
@@ -25,51 +24,41 @@ class ZlgCanBus(BaseCanBus):
         # 实例化周立功
         self._can = ZlgUsbCanDevice(can_fd)
 
-    @staticmethod
-    def __get_data(data, length: int) -> List:
-        msg_data = []
-        for i in range(length):
-            msg_data.append(data[i])
-        return msg_data
-
-    def __get_message(self, p_receive) -> Message:
+    def __get_frames(self, count: int, p_receive: Any) -> List[Frame]:
         """
-        获取message对象
+        把接收缓冲区中的帧批量转换成Frame，data通过bytes()一次复制，时间戳单位为微秒，不需要转换
+
+        :param count: 帧数
 
-        :param p_receive: message信息
+        :param p_receive: 接收缓冲区
 
-        :return: PeakCanMessage对象
+        :return: Frame对象的列表
         """
-        msg = Message()
-        msg.msg_id = p_receive.frame.can_id
-        msg.time_stamp = p_receive.timestamp
+        get_length = self._get_dlc_length
         if self.__can_fd:
-            dlc = p_receive.frame.len
-        else:
-            dlc = p_receive.frame.can_dlc
-        msg.data = self.__get_data(p_receive.frame.data, self._get_dlc_length(dlc))
-        msg.data_length = len(msg.data)
-        return msg
+            return self._to_frames(p_receive[:count], lambda item: Frame(
+                item.frame.can_id, bytes(item.frame.data)[:get_length(item.frame.len)], item.timestamp))
+        return self._to_frames(p_receive[:count], lambda item: Frame(
+            item.frame.can_id, bytes(item.frame.data)[:get_length(item.frame.can_dlc)], item.timestamp))
+
+    def __handle(self, count: int, p_receive: Any):
+        """
+        处理读取到的帧
+
+        :param count: 帧数
+
+        :param p_receive: 帧的数组
+        """
+        if log_switch.trace:
+            logger.trace(f"receive count is {count}")
+        self._save_frames(self.__get_frames(count, p_receive))
 
     def __receive(self):
         """
         CAN接收帧函数，在接收线程中执行
         """
-        logger.debug(f"start receive and tsmaster status {self._can.is_open} and need_receive {self._need_receive}")
-        while self._can.is_open and self._need_receive:
-            try:
-                count, p_receive = self._can.receive()
-                logger.trace(f"receive count is {count}")
-                for i in range(count):
-                    message = self.__get_message(p_receive)
-                    logger.trace(f"message_id = {hex(message.msg_id)}")
-                    self._receive_messages[message.msg_id] = message
-                    self._stack.append(message)
-            except RuntimeError as e:
-                logger.trace(e)
-                continue
-            finally:
-                sleep(0.001)
+        logger.debug(f"start receive and zlg status {self._can.is_open} and need_receive {self._need_receive}")
+        self._receive_loop(self.__handle)
 
     def open_can(self):
         """
@@ -8,16 +8,18 @@
 # --------------------------------------------------------
 import os
 import platform
+from time import monotonic
 from ctypes import CDLL, POINTER, CFUNCTYPE, c_uint, c_char_p, byref, c_int
 from typing import Tuple, Any
 
-from autotest.logger import logger
+from autotest.logger import logger, log_switch
 from autotest.checker import control_decorator, check_connect, can_tips
 from .zlg_basic import ZCAN_USBCANFD_200U, ZCAN_TYPE_CANFD, ZCAN_TYPE_CAN, \
     INVALID_DEVICE_HANDLE, IProperty, ZCAN_CHANNEL_INIT_CONFIG, ZCAN_STATUS_OK, ZCAN_DEVICE_INFO, \
-    ZCAN_Transmit_Data, ZCAN_TransmitFD_Data, ZCAN_Receive_Data, ZCAN_ReceiveFD_Data, BAUD_RATE, DATA_RATE
+    ZCAN_Transmit_Data, ZCAN_TransmitFD_Data, ZCAN_Receive_Data, ZCAN_ReceiveFD_Data, BAUD_RATE, DATA_RATE, \
+    ZCAN_CHANNEL_ERR_INFO, ZCAN_ERROR_CAN_OVERFLOW, ZCAN_ERROR_CAN_BUFFER_OVERFLOW
 from ..message import Message
-from ..abstract_class import BaudRateEnum, BaseCanDevice
+from ..abstract_class import BaudRateEnum, BaseCanDevice, OVERRUN_CHECK_INTERVAL, RECEIVE_BUFFER_SIZE
 
 
 class ZlgUsbCanDevice(BaseCanDevice):
@@ -38,6 +40,10 @@ class ZlgUsbCanDevice(BaseCanDevice):
         self.__dll_path = self.__get_dll_path()
         self.__device_handler = None
         self.__channel_handler = None
+        # 上次检查接收缓冲区是否溢出的时间
+        self.__overrun_check_time = 0
+        # 接收缓冲区，打开设备的时候分配
+        self.__receive_buffer = None
         logger.debug(f"use dll path is {self.__dll_path}")
         if platform.system() == "Windows":
             self.__lib_can = CDLL(self.__dll_path)
@@ -93,7 +99,8 @@ class ZlgUsbCanDevice(BaseCanDevice):
 
     def __data_package(self, message: Message, transmit_num: int = 1):
         if self.__is_fd:
-            logger.trace("package canfd")
+            if log_switch.trace:
+                logger.trace("package canfd")
             msgs = (ZCAN_TransmitFD_Data * transmit_num)()
             for i in range(transmit_num):
                 # 发送方式，0=正常发送，1=单次发送，2=自发自收，3=单次自发自收。
@@ -103,7 +110,8 @@ class ZlgUsbCanDevice(BaseCanDevice):
                 for j, value in enumerate(message.data):
                     msgs[i].frame.data[j] = value
         else:
-            logger.trace("package can")
+            if log_switch.trace:
+                logger.trace("package can")
             msgs = (ZCAN_Transmit_Data * transmit_num)()
             for i in range(transmit_num):
                 # 发送方式，0=正常发送，1=单次发送，2=自发自收，3=单次自发自收。
@@ -149,6 +157,7 @@ class ZlgUsbCanDevice(BaseCanDevice):
             logger.debug("device is opened")
             self.__init_device(baud_rate, data_rate)
             self.__start_device()
+            self.__get_receive_buffer(RECEIVE_BUFFER_SIZE)
 
     def close_device(self):
         if self._is_open:
@@ -156,6 +165,7 @@ class ZlgUsbCanDevice(BaseCanDevice):
                 self._is_open = False
                 self.__channel_handler = None
                 self.__channel_index = None
+                self.__receive_buffer = None
                 logger.debug(f"device is closed")
 
     @check_connect("_is_open", can_tips)
@@ -175,36 +185,88 @@ class ZlgUsbCanDevice(BaseCanDevice):
         transmit_num = 1
         msgs = self.__data_package(message, transmit_num)
         if self.__is_fd:
-            logger.trace("transmit fd")
+            if log_switch.trace:
+                logger.trace("transmit fd")
             result = self.__lib_can.ZCAN_TransmitFD(self.__channel_handler, msgs, transmit_num)
             if result != ZCAN_STATUS_OK:
                 raise RuntimeError("transmit fd failed")
         else:
-            logger.trace("transmit can")
+            if log_switch.trace:
+                logger.trace("transmit can")
             result = self.__lib_can.ZCAN_Transmit(self.__channel_handler, msgs, transmit_num)
             if result != ZCAN_STATUS_OK:
                 raise RuntimeError("transmit failed")
 
+    def __get_receive_buffer(self, frame_length: int):
+        """
+        获取接收缓冲区，需要的帧数超过当前缓冲区大小的时候才重新分配
+
+        :param frame_length: 需要的帧数
+
+        :return: ZCAN_ReceiveFD_Data或者ZCAN_Receive_Data数组
+        """
+        if self.__receive_buffer is None or len(self.__receive_buffer) < frame_length:
+            data_type = ZCAN_ReceiveFD_Data if self.__is_fd else ZCAN_Receive_Data
+            self.__receive_buffer = (data_type * frame_length)()
+        return self.__receive_buffer
+
+    def __check_overrun(self):
+        """
+        定时读取通道的错误信息，检查接收缓冲区是否溢出
+        """
+        now = monotonic()
+        if now - self.__overrun_check_time < OVERRUN_CHECK_INTERVAL:
+            return
+        self.__overrun_check_time = now
+        error_info = ZCAN_CHANNEL_ERR_INFO()
+        if self.__lib_can.ZCAN_ReadChannelErrInfo(self.__channel_handler, byref(error_info)) == ZCAN_STATUS_OK:
+            if error_info.error_code & (ZCAN_ERROR_CAN_OVERFLOW | ZCAN_ERROR_CAN_BUFFER_OVERFLOW):
+                self._overruns += 1
+
+    @check_connect("_is_open", can_tips)
+    def read(self, timeout: float, frame_length: int = RECEIVE_BUFFER_SIZE) -> Tuple[int, Any]:
+        """
+        接收线程读取CAN消息，缓冲区没有数据的时候阻塞等待到有数据或者超时，超时返回0
+
+        :param timeout: 最长等待时间，单位秒
+
+        :param frame_length: 一次最多读取的帧数
+
+        :return: (帧数, 复用的接收缓冲区)，缓冲区中的数据在下一次接收的时候会被覆盖
+        """
+        wait_time = c_int(int(timeout * 1000))
+        p_receive = self.__get_receive_buffer(frame_length)
+        if self.__is_fd:
+            count = self.__lib_can.ZCAN_ReceiveFD(self.__channel_handler, byref(p_receive), frame_length, wait_time)
+        else:
+            count = self.__lib_can.ZCAN_Receive(self.__channel_handler, byref(p_receive), frame_length, wait_time)
+        self.__check_overrun()
+        return count, p_receive
+
     @check_connect("_is_open", can_tips)
     def receive(self, wait_time=c_int(-1)) -> Tuple[int, Any]:
         if self.__is_fd:
             rcv_num = self.__lib_can.ZCAN_GetReceiveNum(self.__channel_handler, ZCAN_TYPE_CANFD)
-            logger.trace(f"receive count is {rcv_num}")
+            if log_switch.trace:
+                logger.trace(f"receive count is {rcv_num}")
             if rcv_num:
-                rcv_canfd_msgs = (ZCAN_ReceiveFD_Data * rcv_num)()
+                rcv_canfd_msgs = self.__get_receive_buffer(rcv_num)
                 counts = self.__lib_can.ZCAN_ReceiveFD(self.__channel_handler, byref(rcv_canfd_msgs), rcv_num,
                                                        wait_time)
-                logger.info(f"real receive count is {counts}")
+                if log_switch.trace:
+                    logger.trace(f"real receive count is {counts}")
                 return counts, rcv_canfd_msgs
             else:
                 raise RuntimeError("receive failed")
         else:
             rcv_num = self.__lib_can.ZCAN_GetReceiveNum(self.__channel_handler, ZCAN_TYPE_CAN)
-            logger.trace(f"receive count is {rcv_num}")
+            if log_switch.trace:
+                logger.trace(f"receive count is {rcv_num}")
             if rcv_num:
-                rcv_can_msgs = (ZCAN_Receive_Data * rcv_num)()
+                rcv_can_msgs = self.__get_receive_buffer(rcv_num)
                 counts = self.__lib_can.ZCAN_Receive(self.__channel_handler, byref(rcv_can_msgs), rcv_num, wait_time)
-                logger.info(f"real receive count is {counts}")
+                if log_switch.trace:
+                    logger.trace(f"real receive count is {counts}")
                 return counts, rcv_can_msgs
             else:
                 raise RuntimeError("receive buffer not  failed")
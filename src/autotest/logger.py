@@ -24,6 +24,13 @@ from loguru import logger as _logger
     2、 在运行代码目录及父目录到根目录的任意目录放置config.yml文件，其中yml中包含level和log_folder用于定义log等级及log存放文件路径
 
     3、 如果找不到配置文件，默认使用info级别输出log，并且不保存log内容到文件
+
+    4、 编解码、收发线程等热点路径中的trace/debug log需要先判断log_switch，如：
+
+        if log_switch.trace:
+            logger.trace(f"msg id = {hex(msg_id)}")
+
+        log等级不满足的时候只有一次属性判断，不会格式化字符串
 """
 
 config_file_name = "config.yml"
@@ -31,6 +38,31 @@ current_path = os.getcwd()
 log_level_type = "trace", "debug", "info", "warning", "error"
 
 
+class LogSwitch(object):
+    """
+    热点路径中trace/debug log的开关，在set_logger的时候根据log等级计算一次
+    """
+
+    def __init__(self):
+        # 是否输出trace log
+        self.trace = False
+        # 是否输出debug log
+        self.debug = False
+
+    def update(self, level: str):
+        """
+        根据log等级更新开关
+
+        :param level: log等级，如trace、debug、info
+        """
+        level_no = _logger.level(level.upper()).no
+        self.trace = level_no <= _logger.level("TRACE").no
+        self.debug = level_no <= _logger.level("DEBUG").no
+
+
+log_switch = LogSwitch()
+
+
 def set_logger(level: str = "debug", folder: Optional[str] = None):
     # LOG的格式
     formats = "<g>[{time:YYYY-MM-DD HH:mm:ss.SSS}]</g>" \
@@ -51,6 +83,7 @@ def set_logger(level: str = "debug", folder: Optional[str] = None):
             flag = False
     # 控制台输出
     _logger.add(sys.stdout, level=level.upper(), format=formats)
+    log_switch.update(level)
 
     if folder:
         file_path = folder
@@ -0,0 +1,27 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        conftest
+# @Author:      philosophy
+# @Created:     2024/04/27 - 10:15
+# --------------------------------------------------------
+import os
+import sys
+
+import pytest
+
+# 没有安装autotest的时候直接使用src目录下的源代码
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def cache_folder(tmp_path, monkeypatch):
+    """
+    矩阵表以及编解码模块的缓存写入到临时目录，不使用用户目录下的缓存
+    """
+    from autotest.can.cache import CACHE_FOLDER_ENV
+    folder = tmp_path / "cache"
+    monkeypatch.setenv(CACHE_FOLDER_ENV, str(folder))
+    return folder
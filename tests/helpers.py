@@ -0,0 +1,94 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        helpers
+# @Author:      philosophy
+# @Created:     2024/04/27 - 11:05
+# --------------------------------------------------------
+from threading import Condition
+from typing import Dict, Any, List, Tuple
+
+from autotest.can.abstract_class import BaseCanDevice, BaseCanBus
+from autotest.can.message import Message
+
+"""
+测试用的矩阵表以及CAN设备
+"""
+
+
+def make_signal(name: str, start_bit: int, signal_size: int, byte_type: bool = True, factor: Any = 1,
+                offset: Any = 0, start_value: int = 0) -> Dict[str, Any]:
+    return dict(name=name, signal_size=signal_size, start_bit=start_bit, is_sign=False, byte_type=byte_type,
+                factor=factor, offset=offset, minimum=0, maximum=(1 << signal_size) - 1, unit="", receiver="HU",
+                start_value=start_value)
+
+
+def make_message(msg_id: int, name: str, signals: List[Dict[str, Any]], length: int = 8) -> Dict[str, Any]:
+    return dict(id=msg_id, name=name, length=length, sender="GW", msg_send_type="Cycle", msg_cycle_time=100,
+                diag_request=False, diag_response=False, diag_state=False, signals=signals)
+
+
+def make_matrix(count: int = 3) -> List[Dict[str, Any]]:
+    """
+    生成count个message，每个message有两个Intel的signal
+
+    :param count: message的数量
+    """
+    return [make_message(0x100 + index, f"MSG_{index}", [
+        make_signal(f"SIG_{index}_A", 0, 8, factor=0.5, offset=10),
+        make_signal(f"SIG_{index}_B", 8, 12, factor=2)
+    ]) for index in range(count)]
+
+
+class FakeCanDevice(BaseCanDevice):
+    """
+    测试用的CAN设备，put放入的一批数据由read阻塞读取
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._is_open = True
+        self.__batches = []
+        self.__condition = Condition()
+
+    def open_device(self, *args, **kwargs):
+        self._is_open = True
+
+    def close_device(self):
+        with self.__condition:
+            self._is_open = False
+            self.__condition.notify_all()
+
+    def transmit(self, message: Message):
+        pass
+
+    def receive(self) -> Tuple[int, Any]:
+        raise RuntimeError("use read instead")
+
+    def read(self, timeout: float) -> Tuple[int, Any]:
+        with self.__condition:
+            if not self.__batches:
+                self.__condition.wait(timeout)
+            if not self.__batches:
+                return 0, None
+            batch = self.__batches.pop(0)
+            return len(batch), batch
+
+    def put(self, batch: List[Any]):
+        with self.__condition:
+            self.__batches.append(batch)
+            self.__condition.notify_all()
+
+
+class FakeCanBus(BaseCanBus):
+    """
+    测试用的CAN总线，使用FakeCanDevice，不启动接收线程
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._can = FakeCanDevice()
+
+    def open_can(self):
+        pass
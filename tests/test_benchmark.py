@@ -0,0 +1,42 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        test_benchmark
+# @Author:      philosophy
+# @Created:     2024/04/27 - 18:40
+# --------------------------------------------------------
+import os
+
+from autotest.can.benchmark import tracing, parser
+from autotest.can.benchmark.matrix import PROFILES
+from autotest.can.cache import CACHE_FOLDER_ENV
+from autotest.logger import log_switch, LogSwitch
+
+
+def test_log_switch():
+    switch = LogSwitch()
+    switch.update("info")
+    assert not switch.trace and not switch.debug
+    switch.update("debug")
+    assert not switch.trace and switch.debug
+    switch.update("TRACE")
+    assert switch.trace and switch.debug
+
+
+def test_tracing_benchmark():
+    trace, debug = log_switch.trace, log_switch.debug
+    result = tracing.run(message_count=3, rounds=2, frame_count=5000)
+    assert (log_switch.trace, log_switch.debug) == (trace, debug)
+    for name in ("codec", "receive"):
+        assert result[name]["off"] > 0 and result[name]["on"] > 0
+
+
+def test_parser_benchmark(cache_folder):
+    result = parser.run(sizes=(5,), profiles=PROFILES)
+    assert [(item["messages"], item["profile"]) for item in result["benchmarks"]] == [(5, x) for x in PROFILES]
+    for item in result["benchmarks"]:
+        assert set(item["results"]) == {"parse", "parse_to_file", "get_message_cold", "get_message_warm"}
+    # 使用临时的缓存目录，结束后恢复
+    assert os.environ[CACHE_FOLDER_ENV] == str(cache_folder)
+    assert not cache_folder.exists() or os.listdir(cache_folder) == []
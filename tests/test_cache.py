@@ -0,0 +1,102 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        test_cache
+# @Author:      philosophy
+# @Created:     2024/04/27 - 18:10
+# --------------------------------------------------------
+import json
+import os
+
+import pytest
+
+import autotest.can.message as message_module
+from autotest.can.cache import write_atomic, read_cache, write_cache, get_cache_folder
+from autotest.can.codec import CODEC_PREFIX
+from autotest.can.message import load_messages, get_message, clear_matrix_cache, MATRIX_PREFIX
+from helpers import make_matrix
+
+
+def _write_matrix(path, matrix) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(matrix, f)
+    return str(path)
+
+
+def _cache_files(prefix: str):
+    return sorted(name for name in os.listdir(get_cache_folder()) if name.startswith(prefix))
+
+
+def test_write_atomic(tmp_path):
+    file = str(tmp_path / "file.bin")
+    write_atomic(file, b"first")
+    write_atomic(file, b"second")
+    with open(file, "rb") as f:
+        assert f.read() == b"second"
+    assert os.listdir(tmp_path) == ["file.bin"]
+
+
+def test_write_atomic_failed_keeps_old_file(tmp_path, monkeypatch):
+    file = str(tmp_path / "file.bin")
+    write_atomic(file, b"first")
+
+    def replace(*args):
+        raise OSError("replace failed")
+
+    monkeypatch.setattr(os, "replace", replace)
+    with pytest.raises(OSError):
+        write_atomic(file, b"second")
+    # 临时文件被删除，原来的文件不变
+    assert os.listdir(tmp_path) == ["file.bin"]
+    with open(file, "rb") as f:
+        assert f.read() == b"first"
+
+
+def test_broken_cache_is_ignored():
+    write_cache("broken.pickle", {"a": 1})
+    assert read_cache("broken.pickle") == {"a": 1}
+    with open(os.path.join(get_cache_folder(), "broken.pickle"), "wb") as f:
+        f.write(b"\x80\x05broken")
+    assert read_cache("broken.pickle") is None
+    assert read_cache("missing.pickle") is None
+
+
+def test_matrix_cache_is_invalidated_by_content(tmp_path, monkeypatch):
+    file = _write_matrix(tmp_path / "matrix.json", make_matrix(2))
+    messages, content_hash = load_messages(file)
+    assert len(_cache_files(MATRIX_PREFIX)) == 1
+
+    def get_json_obj(*args, **kwargs):
+        raise AssertionError("matrix should be loaded from cache")
+
+    # 内容不变的时候从缓存读取，不再解析
+    with monkeypatch.context() as patch:
+        patch.setattr(message_module, "get_json_obj", get_json_obj)
+        assert load_messages(file) == (messages, content_hash)
+    # 内容变化之后哈希值变化，重新解析
+    matrix = make_matrix(2)
+    matrix[0]["signals"][0]["factor"] = 3
+    _write_matrix(tmp_path / "matrix.json", matrix)
+    new_messages, new_hash = load_messages(file)
+    assert new_hash != content_hash
+    assert new_messages[0]["signals"][0]["factor"] == 3
+    assert len(_cache_files(MATRIX_PREFIX)) == 2
+
+
+def test_codec_cache_and_clear(tmp_path):
+    file = _write_matrix(tmp_path / "matrix.json", make_matrix(2))
+    messages, content_hash = load_messages(file)
+    id_messages, _ = get_message(messages, content_hash=content_hash)
+    codec_files = _cache_files(CODEC_PREFIX)
+    # 源代码以及编译后的代码
+    assert len(codec_files) == 2
+    # 第二次从缓存的编译后的代码加载，结果一致
+    cached_messages, _ = get_message(messages, content_hash=content_hash)
+    assert _cache_files(CODEC_PREFIX) == codec_files
+    for message in (id_messages[0x100], cached_messages[0x100]):
+        message.signals["SIG_0_A"].physical_value = 20
+        message.update(True)
+    assert list(id_messages[0x100].data) == list(cached_messages[0x100].data)
+    assert clear_matrix_cache(file) == 3
+    assert _cache_files(MATRIX_PREFIX) == [] and _cache_files(CODEC_PREFIX) == []
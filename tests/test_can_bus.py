@@ -0,0 +1,83 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        test_can_bus
+# @Author:      philosophy
+# @Created:     2024/04/27 - 16:10
+# --------------------------------------------------------
+from threading import Thread, Timer
+
+import pytest
+
+from autotest.can.message import Frame
+from helpers import FakeCanBus
+
+
+def test_receive_loop_survives_handle_exception():
+    bus = FakeCanBus()
+    handled = []
+
+    def handle(count, batch):
+        if batch[0] == "bad":
+            raise ValueError("bad batch")
+        bus._save_frames(batch)
+        handled.append(count)
+
+    thread = Thread(target=bus._receive_loop, args=(handle,))
+    thread.start()
+    try:
+        bus.can_device.put(["bad"])
+        bus.can_device.put([Frame(1, b"\x01", 1), Frame(2, b"\x02", 2)])
+        # 处理失败的一批数据之后接收线程仍然在运行
+        assert bus.wait_for_frame(2, timeout=2, latest=True) is not None
+        assert thread.is_alive()
+        assert handled == [2]
+        assert [frame.msg_id for frame in bus.get_stack()] == [1, 2]
+    finally:
+        bus.can_device.close_device()
+        thread.join(2)
+
+
+def test_bad_frame_is_skipped_in_batch():
+    # (msg id, dlc)，dlc为20的帧转换失败，只跳过这一帧
+    items = [(1, 8), (2, 20), (3, 15)]
+
+    def convert(item):
+        msg_id, dlc = item
+        return Frame(msg_id, bytes(FakeCanBus._get_dlc_length(dlc)), 0)
+
+    frames = FakeCanBus._to_frames(items, convert)
+    assert [(frame.msg_id, len(frame.data)) for frame in frames] == [(1, 8), (3, 64)]
+
+
+def test_waiters_are_notified_while_capturing():
+    pytest.importorskip("numpy")
+    bus = FakeCanBus()
+    bus._save_frames([Frame(1, b"\x01", 1)])
+    capture = bus.start_capture()
+    thread = Timer(0.05, bus._save_frames, args=([Frame(2, b"\x05", 10)],))
+    thread.start()
+    # 录制的时候不保存到栈中，但是等待帧的线程仍然会被唤醒
+    frame = bus.wait_for_frame(2, lambda x: x.data == b"\x05", timeout=2)
+    thread.join()
+    assert frame is not None and frame.time_stamp == 10
+    assert len(capture) == 1
+    assert not bus.wait_for_silence(1, timeout=0)
+    # 栈中的帧不是最新的，查询栈的时候抛出异常
+    for query in (bus.get_stack, bus.time_range, lambda: bus.get_frames(2), lambda: bus.frames_between(2, 0, 10),
+                  lambda: bus.last_before(2, 10)):
+        with pytest.raises(RuntimeError):
+            query()
+    assert bus.stop_capture() is capture
+    bus._save_frames([Frame(3, b"", 20)])
+    assert [frame.msg_id for frame in bus.get_stack()] == [3]
+
+
+def test_capture_with_stack():
+    pytest.importorskip("numpy")
+    bus = FakeCanBus()
+    capture = bus.start_capture(save_stack=True)
+    bus._save_frames([Frame(1, b"\x01", 1), Frame(2, b"\x02", 2)])
+    assert len(capture) == 2
+    assert bus.time_range() == (1, 2)
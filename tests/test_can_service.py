@@ -0,0 +1,82 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        test_can_service
+# @Author:      philosophy
+# @Created:     2024/04/27 - 17:20
+# --------------------------------------------------------
+import copy
+import json
+
+import autotest.can.can_service as can_service
+from autotest.can.can_service import CanService
+from autotest.can.message import load_messages, get_message
+from helpers import make_matrix, make_message, make_signal
+
+
+def _write_matrix(path, matrix) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(matrix, f)
+    return str(path)
+
+
+def _create_service(file: str) -> CanService:
+    """
+    不打开CAN设备，只创建矩阵表相关的部分
+    """
+    service = object.__new__(CanService)
+    messages, content_hash = load_messages(file)
+    service._CanService__messages, service._CanService__name_messages = get_message(messages,
+                                                                                   content_hash=content_hash)
+    service._CanService__sources = dict((msg["id"], msg) for msg in messages)
+    service._CanService__default_snapshots = dict((msg_id, message.get_snapshot())
+                                                  for msg_id, message in service.messages.items())
+    return service
+
+
+def test_reload_only_generates_codec_for_changed_messages(tmp_path, monkeypatch):
+    matrix = make_matrix(300)
+    service = _create_service(_write_matrix(tmp_path / "a.json", matrix))
+    matrix[7]["signals"][0]["factor"] = 3
+    counts = []
+    load_codec = can_service.load_codec
+
+    def record(messages, *args):
+        counts.append(len(messages))
+        return load_codec(messages, *args)
+
+    monkeypatch.setattr(can_service, "load_codec", record)
+    assert service.reload_matrix(_write_matrix(tmp_path / "b.json", matrix)) == ([], [0x107], [])
+    assert counts == [1]
+    assert service.messages[0x107].signals["SIG_7_A"].factor == 3
+    # 没有变化的时候不生成编解码函数
+    assert service.reload_matrix(_write_matrix(tmp_path / "c.json", matrix)) == ([], [], [])
+    assert counts == [1]
+
+
+def test_reload_added_changed_removed(tmp_path):
+    matrix = make_matrix(4)
+    service = _create_service(_write_matrix(tmp_path / "a.json", matrix))
+    old_messages = dict(service.messages)
+    message = service.messages[0x100]
+    message.signals["SIG_0_A"].physical_value = 20
+    message.signals["SIG_0_B"].physical_value = 100
+    message.update(True)
+    new_matrix = copy.deepcopy(matrix)
+    # SIG_0_A布局不变保留当前值，SIG_0_B布局变化使用初始值
+    new_matrix[0]["signals"][1] = make_signal("SIG_0_B", 8, 10, factor=2, start_value=5)
+    new_matrix[1]["name"] = "RENAMED"
+    del new_matrix[3]
+    new_matrix.append(make_message(0x200, "NEW", [make_signal("SIG_NEW", 0, 8)]))
+    added, changed, removed = service.reload_matrix(_write_matrix(tmp_path / "b.json", new_matrix))
+    assert (added, changed, removed) == ([0x200], [0x100, 0x101], [0x103])
+    # 修改的message原地替换，发送线程持有的对象不变
+    assert service.messages[0x100] is old_messages[0x100]
+    assert service.messages[0x102] is old_messages[0x102]
+    assert old_messages[0x103].stop_flag
+    assert message.signals["SIG_0_A"].physical_value == 20
+    assert message.signals["SIG_0_B"].value == 5
+    assert "RENAMED" in service.name_messages and "MSG_1" not in service.name_messages
+    assert "MSG_3" not in service.name_messages and 0x103 not in service.messages
+    assert service.messages[0x200].msg_name == "NEW"
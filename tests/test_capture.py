@@ -0,0 +1,58 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        test_capture
+# @Author:      philosophy
+# @Created:     2024/04/27 - 16:40
+# --------------------------------------------------------
+import pytest
+
+from autotest.can.message import Frame, get_message
+from helpers import make_matrix
+
+np = pytest.importorskip("numpy")
+
+from autotest.can.capture import FrameCapture, FLAG_FD, FRAME_DTYPE, MAX_DATA_LENGTH
+from autotest.can.columnar import decode_columns
+
+
+def test_frame_fields():
+    capture = FrameCapture(capacity=2, channel=3, can_fd=True)
+    lengths = [0, 3, 8, 10, 12, 33, 64]
+    capture.extend([Frame(0x100 + index, bytes(range(1, length + 1)), index * 10)
+                    for index, length in enumerate(lengths)])
+    frames = capture.frames
+    assert frames.dtype == FRAME_DTYPE
+    assert capture.capacity >= len(lengths) == len(capture)
+    assert frames["timestamp"].tolist() == [index * 10 for index in range(len(lengths))]
+    assert frames["id"].tolist() == [0x100 + index for index in range(len(lengths))]
+    assert set(frames["channel"].tolist()) == {3}
+    # FD标志按照通道设置
+    assert set(frames["flags"].tolist()) == {FLAG_FD}
+    # 不是标准长度的时候取能容纳该长度的最小dlc
+    assert frames["dlc"].tolist() == [0, 3, 8, 9, 9, 14, 15]
+    for row, length in zip(frames, lengths):
+        assert bytes(row["data"]) == bytes(range(1, length + 1)).ljust(MAX_DATA_LENGTH, b"\x00")
+
+
+def test_classic_channel_has_no_fd_flag():
+    capture = FrameCapture()
+    capture.extend([Frame(1, b"\x01", 1)])
+    assert capture.column("flags").tolist() == [0]
+
+
+def test_select_and_decode():
+    id_messages, _ = get_message(make_matrix(2))
+    frames = [Frame(0x100 + index % 2, bytes([index, index, 1, 0, 0, 0, 0, 0]), index * 100) for index in range(20)]
+    capture = FrameCapture(capacity=1)
+    for index in range(0, len(frames), 3):
+        capture.extend(frames[index:index + 3])
+    rows = capture.select(0x101, 500, 1500)
+    assert rows["timestamp"].tolist() == [500, 700, 900, 1100, 1300, 1500]
+    signals = {"SIG_1_A": 0x101, "SIG_1_B": 0x101}
+    expected = decode_columns(frames, id_messages, signals)
+    actual = capture.decode(id_messages, signals)
+    for name in signals:
+        for expected_column, actual_column in zip(expected[name], actual[name]):
+            assert np.array_equal(expected_column, actual_column)
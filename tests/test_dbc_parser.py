@@ -0,0 +1,72 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        test_dbc_parser
+# @Author:      philosophy
+# @Created:     2024/04/27 - 14:20
+# --------------------------------------------------------
+import os
+
+import pytest
+
+import legacy_dbc_parser
+from autotest.can.dbc_parser import DbcParser
+
+"""
+新的单次遍历DbcParser与原来的实现(legacy_dbc_parser)的对比测试
+
+data/dbc下的文件由benchmark.matrix.get_dbc生成：
+
+    {profile}_{count}.dbc: 每种类型5个和50个message，plain类型加了一条CM_ SG_注释，文件最后加了一条BA_DEF_REL_语句，
+
+        原来的实现会丢掉最后一条语句并且没有CM_的时候会丢掉最后一个message
+
+    other_comments.dbc: attributes_5.dbc加上CM_ BU_/BO_/EV_以及CM_ "注释"
+"""
+
+DBC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "dbc")
+# 原来的实现可以正确解析的文件
+COMPATIBLE = ("plain_5", "plain_50", "attributes_5", "attributes_50", "multiline_5", "multiline_50",
+              "gbk_5", "gbk_50", "other_comments")
+
+
+def _get_file(name: str) -> str:
+    return os.path.join(DBC_FOLDER, f"{name}.dbc")
+
+
+@pytest.mark.parametrize("name", COMPATIBLE)
+def test_same_as_legacy(name):
+    file = _get_file(name)
+    assert DbcParser().parse(file) == legacy_dbc_parser.DbcParser().parse(file)
+
+
+def test_no_comment_keeps_last_message():
+    # 没有CM_的时候原来的实现没有保存最后一个message，处理它的BA_的时候抛出RuntimeError
+    file = _get_file("no_comment")
+    with pytest.raises(RuntimeError):
+        legacy_dbc_parser.DbcParser().parse(file)
+    messages = DbcParser().parse(file)
+    assert [message["id"] for message in messages] == [0x100, 0x101, 0x102, 0x103, 0x104]
+    assert all(message["msg_cycle_time"] == 100 for message in messages)
+
+
+def test_trailing_val_is_parsed():
+    # 原来的实现丢掉了文件最后一条语句，最后一个signal没有值表
+    file = _get_file("trailing_val")
+    legacy_messages = legacy_dbc_parser.DbcParser().parse(file)
+    messages = DbcParser().parse(file)
+    assert "values" not in legacy_messages[-1]["signals"][-1]
+    assert messages[-1]["signals"][-1]["values"] == {"0": "Off", "1": "On", "2": "Invalid"}
+    # 除此之外结果一致
+    del messages[-1]["signals"][-1]["values"]
+    assert messages == legacy_messages
+
+
+def test_extended_ids_are_all_filtered():
+    # 原来的实现按照下标删除扩展帧，删除一个之后下标就错了，多个扩展帧的时候抛出IndexError
+    file = _get_file("extended_ids")
+    with pytest.raises(IndexError):
+        legacy_dbc_parser.DbcParser().parse(file)
+    messages = DbcParser().parse(file)
+    assert [message["id"] for message in messages] == [0x100, 0x102, 0x104]
@@ -0,0 +1,113 @@
+# -*- coding:utf-8 -*-
+# --------------------------------------------------------
+# Copyright (C), 2016-2024, philosophy, All rights reserved
+# --------------------------------------------------------
+# @Name:        test_stack
+# @Author:      philosophy
+# @Created:     2024/04/27 - 15:30
+# --------------------------------------------------------
+from threading import Timer
+
+import pytest
+
+from autotest.can.message import Frame
+from autotest.can.stack import FrameStack, StackPolicyEnum, TIME_STAMP_RESET_THRESHOLD
+
+
+def test_time_stamp_jitter_is_clamped_without_drift():
+    stack = FrameStack()
+    for msg_id, time_stamp in ((1, 5000000), (1, 5001000), (2, 5000990), (1, 5002000), (2, 5001995), (2, 5003000)):
+        stack.append(Frame(msg_id, b"", time_stamp))
+    # 抖动的帧改为上一帧的时间戳，之后的帧保持设备的时间戳
+    assert [frame.time_stamp for frame in stack] == [5000000, 5001000, 5001000, 5002000, 5002000, 5003000]
+    assert [frame.time_stamp for frame in stack.frames_between(1, 5001000, 5002000)] == [5001000, 5002000]
+    assert [frame.time_stamp for frame in stack.frames_between(2, 5001000, 5002000)] == [5001000, 5002000]
+    assert stack.last_before(2, 5002999).time_stamp == 5002000
+    assert stack.time_range() == (5000000, 5003000)
+
+
+def test_time_stamp_reset_is_rebased():
+    stack = FrameStack()
+    for time_stamp in (5000000, 5001000, 5002000):
+        stack.append(Frame(1, b"\x01", time_stamp))
+    # 设备时钟重置，之后的帧接在最后一帧后面
+    assert 5002000 - 10 >= TIME_STAMP_RESET_THRESHOLD
+    for time_stamp in (10, 1010, 2010):
+        stack.append(Frame(1, b"\x02", time_stamp))
+    stack.append(Frame(1, b"\x03", 2000))
+    assert [frame.time_stamp for frame in stack] == [5000000, 5001000, 5002000, 5002000, 5003000, 5004000, 5004000]
+    assert [frame.data for frame in stack.frames_between(1, 5002000, 5003000)] == [b"\x01", b"\x02", b"\x02"]
+    assert stack.last_before(1, 5002999).data == b"\x02"
+    assert stack.last_before(1, 4999999) is None
+    assert stack.last_time_stamp == 5004000
+
+
+def test_overwrite_keeps_latest_frames():
+    stack = FrameStack(capacity=4)
+    stack.extend(Frame(index % 2 + 1, bytes([index]), index) for index in range(10))
+    assert len(stack) == 4 and stack.dropped == 6
+    assert [frame.time_stamp for frame in stack] == [6, 7, 8, 9]
+    # 按照msg id分组的帧与环形缓冲区一致
+    assert [frame.time_stamp for frame in stack.snapshot().get_frames(1)] == [6, 8]
+    assert [frame.time_stamp for frame in stack.get_frames(2)] == [7, 9]
+    assert stack.time_range() == (6, 9)
+
+
+def test_drop_keeps_earliest_frames():
+    stack = FrameStack(capacity=4, policy=StackPolicyEnum.DROP)
+    stack.extend(Frame(1, b"", index) for index in range(10))
+    assert len(stack) == 4 and stack.dropped == 6
+    assert [frame.time_stamp for frame in stack] == [0, 1, 2, 3]
+    assert stack.last_time_stamp == 9
+
+
+def test_clear_keeps_dropped_and_last_time_stamp():
+    stack = FrameStack(capacity=2)
+    stack.extend(Frame(1, b"", index) for index in range(3))
+    stack.clear()
+    assert len(stack) == 0 and list(stack) == [] and stack.get_frames(1) == []
+    assert stack.dropped == 1 and stack.last_time_stamp == 2
+    stack.append(Frame(2, b"", 3))
+    assert [frame.msg_id for frame in stack] == [2]
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        FrameStack(capacity=0)
+
+
+def test_wait_for_frame_with_predicate():
+    stack = FrameStack(capacity=1, policy=StackPolicyEnum.DROP)
+    frames = [Frame(1, b"\x00", 1), Frame(2, b"\x01", 2), Frame(1, b"\x01", 3)]
+    timer = Timer(0.05, stack.extend, args=(frames,))
+    timer.start()
+    # 栈满后被丢弃的帧也会唤醒等待的线程
+    frame = stack.wait_for_frame(1, lambda x: x.data == b"\x01", timeout=2)
+    timer.join()
+    assert frame is frames[2]
+    assert stack.dropped == 2
+
+
+def test_wait_for_frame_timeout_and_latest():
+    stack = FrameStack()
+    assert stack.wait_for_frame(timeout=0.01) is None
+    stack.append(Frame(1, b"", 1))
+    stack.append(Frame(2, b"", 2))
+    assert stack.wait_for_frame(1, timeout=0.01) is None
+    assert stack.wait_for_frame(1, timeout=0.01, latest=True).time_stamp == 1
+    assert stack.wait_for_frame(timeout=0.01, latest=True).msg_id == 2
+    assert stack.wait_for_frame(3, timeout=0.01, latest=True) is None
+
+
+def test_wait_for_silence():
+    stack = FrameStack()
+    assert stack.wait_for_silence(0.01, timeout=1)
+    timer = Timer(0.05, stack.append, args=(Frame(1, b"", 1),))
+    timer.start()
+    # 等待期间收到帧，静默时间重新计算
+    assert not stack.wait_for_silence(0.3, timeout=0.35)
+    timer.join()
+    assert stack.wait_for_silence(0.05, timeout=1)
+    stack.notify([Frame(1, b"", 2)])
+    assert not stack.wait_for_silence(1, timeout=0)
+    assert len(stack) == 1